@@ -1,27 +1,106 @@
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+import time
+# Reference point for the time-to-first-frame metric
+STARTED = time.perf_counter()
+import argparse
 import os
-import json
-import math
 import socket
 import threading
-from PIL import Image, ImageTk
-from base_station_UI import *
+from collections import deque
+from base_station_Robot import Robot
+from base_station_world import GlobalWorldMap
+from base_station_events import EventBus, WORLD_UPDATED, ROBOT_STATUS, REFBOX_STATUS, REFBOX_MESSAGE, LOG, LINK_STATS, ROLES
+from base_station_ingest import RobotIngest
+from base_station_refbox import RefBoxStreamParser
+from base_station_recorder import MatchRecorder, REFBOX, WORLD, LINK, encode_world, encode_links
+from base_station_team import TeamChannel
+from base_station_uplink import WorldStateUplink
+from base_station_history import TrajectoryHistory
+from base_station_heatmap import OccupancyGrid
+from base_station_roles import RoleAllocator
+
+def create_team(size=5):
+    """Home robots at their placeholder positions, and opponents without a position.
+
+    Opponents only get a position once the opponent tracker confirms them.
+    """
+    # HOME ROBOTS
+    robots = [Robot(i + 1, "Player", color="blue") for i in range(max(size, 5))]
+    # Arbitrary positions
+    robots[0].position = (2, 4)
+    robots[0].orientation = 0
+    robots[1].position = (3, 2)
+    robots[1].orientation = 45
+    robots[2].position = (4, 6)
+    robots[2].orientation = 90
+    robots[3].position = (2, 7)
+    robots[3].orientation = 135
+    robots[4].position = (1, 1)
+    robots[4].orientation = 270
+
+    # robots[0].robot_ip = "192.168.123.88"
+    # robots[0].robot_port = 10001
+
+    # OPPONENT ROBOTS
+    opponents = [Robot(i + 1, "Opponent", color="red") for i in range(5)]
+    for opponent in opponents:
+        opponent.position = None
+    return robots, opponents
+
 
 class BaseStationLogic:
-    def __init__(self, ui):
-        self.ui = ui
-        self.robots = ui.robots
-        self.opponents = ui.opponents
-        self.global_world = ui.global_world
+    """Ingest, fusion and RefBox handling, independent of any display.
+
+    Front ends (the Tk UI, the headless runner) subscribe to events on
+    self.bus instead of being called directly from the background threads.
+    """
+
+    def __init__(self, bus=None, robots=None, opponents=None, refbox_history=500, team_size=5,
+                 link_interval=1.0, team_group=None, team_interface=None, team_name="Era", uplink_hz=10.0,
+                 roles=False):
+        self.bus = bus if bus is not None else EventBus()
+        if robots is None or opponents is None:
+            robots, opponents = create_team(team_size)
+        self.robots = robots
+        self.opponents = opponents
+        self.global_world = GlobalWorldMap()
         self.connection_status = False
+        # One selector loop receives from every robot socket
+        self.ingest = RobotIngest()
+        self.last_fused_update = None
+        self.running = False
+        # Recent trajectories of the ball, our robots and the opponents (for the trails)
+        self.history = TrajectoryHistory()
+        # Seconds our robots and the ball spent in each field cell (for the heatmap)
+        self.occupancy = OccupancyGrid(self.global_world.field_dimensions)
+        # Automatic role assignment each fusion tick (None when disabled)
+        self.role_allocator = RoleAllocator(self.global_world.field_dimensions) if roles else None
+        # Robots are pinged and link statistics published once per link_interval
+        self.link_interval = link_interval
+        self.next_link_poll = 0.0
+
+        # Match recording (telemetry, RefBox, commands and fused world state)
+        self.recorder = MatchRecorder()
+        # Team-wide commands: one multicast datagram, acknowledged per robot
+        self.team = TeamChannel(self.robots, team_group, team_interface)
+        self.team.recorder = self.recorder
+        for robot in self.robots:
+            robot.recorder = self.recorder
+            robot.team_channel = self.team
 
         # RefBox connection
         self.refbox_socket = None
         self.refbox_connected = False
-        self.refbox_messages = []  # store all messages from RefBox here
+        self.refbox_messages = deque(maxlen=refbox_history)  # most recent RefBox commands
+        self.refbox_parser = RefBoxStreamParser()
+        self.refbox_handlers = {
+            "START": self.on_refbox_start,
+            "STOP": self.on_refbox_stop,
+        }
+        self.game_running = False
         self.refbox_thread = None
         self.refbox_running = False
+        # World state streamed back to the RefBox while connected (uplink_hz 0 disables it)
+        self.uplink = WorldStateUplink(self, team_name, uplink_hz) if uplink_hz > 0 else None
 
     def connect_to_robots(self):
         self.connection_status = True
@@ -30,24 +109,28 @@ class BaseStationLogic:
                 robot.lock.acquire()
                 robot.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
                 robot.connected = True
-                robot.recieve_thread = threading.Thread(target=robot.receive_from_robot, daemon=True).start()
-
-                if hasattr(robot, "status_label"):
-                    robot.status_label.config(text="Connected", fg="green")
+                robot.link.reset()
+                robot.clock.reset()
+                robot.trajectory.clear()
+                robot.param_sync.reset()
+                self.ingest.register(robot)
                 robot.lock.release()
+                # Tells the robot where to stream its telemetry
+                robot.send_to_robot("HELLO")
+                self.bus.publish(ROBOT_STATUS, robot=robot, connected=True)
                 print("Connected to robot", robot.name)
+        self.ingest.start()
 
     def disconnect_from_robots(self):
         self.connection_status = False
+        self.ingest.stop()
         for robot in self.robots:
+            robot.connected = False
             if robot.socket:
+                self.ingest.unregister(robot)
                 robot.socket.close()
                 robot.socket = None
-                if robot.receive_thread and robot.receive_thread.is_alive():
-                    robot.receive_thread.join()
-            robot.connected = False
-            if hasattr(robot, "status_label"):
-                robot.status_label.config(text="Disconnected", fg="red")
+            self.bus.publish(ROBOT_STATUS, robot=robot, connected=False)
         print("Disconnected from robots")
 
     def connect_to_refbox(self, ip="127.0.0.1", port=28097):
@@ -70,29 +153,37 @@ class BaseStationLogic:
                 self.refbox_socket = s
                 self.refbox_connected = True
                 print(f"Connected to RefBox at {ip}:{port}")
-                self.ui.update_refbox_status(connected=True)
+                self.bus.publish(REFBOX_STATUS, connected=True)
+                self.refbox_parser.reset()
+                if self.uplink is not None:
+                    self.uplink.start(s)
 
                 while self.refbox_running:
-                    data = s.recv(1024)
+                    data = s.recv(4096)
                     if not data:
                         break
-                    message = data.decode("utf-8").strip()
-                    if message:
-                        self.refbox_messages.append(message)
+                    for command in self.refbox_parser.feed(data):
+                        self.refbox_messages.append(command)
+                        self.recorder.record(REFBOX, 0, command.raw.encode("utf-8"))
                         # Also log to the UI
-                        self.ui.log_refbox_message(message)
-                        self.parse_message(message)
+                        self.bus.publish(REFBOX_MESSAGE, command=command)
+                        self.parse_message(command)
 
         except (ConnectionError, OSError) as e:
             print(f"RefBox connection error: {e}")
         finally:
+            if self.uplink is not None:
+                self.uplink.stop()
             self.refbox_connected = False
-            self.ui.update_refbox_status(connected=False)
+            self.bus.publish(REFBOX_STATUS, connected=False)
             print("RefBox connection closed.")
 
     def stop_refbox(self):
         """Stop the RefBox reading loop."""
         self.refbox_running = False
+        if self.uplink is not None:
+            # Before closing the socket it sends on, so a normal stop is not reported as an error
+            self.uplink.stop()
         if self.refbox_socket:
             try:
                 self.refbox_socket.close()
@@ -100,30 +191,315 @@ class BaseStationLogic:
                 pass
         print("Stopped RefBox communication.")
 
+    def log(self, msg, level="INFO"):
+        print(msg, end="" if msg.endswith("\n") else "\n")
+        self.bus.publish(LOG, msg=msg, level=level)
+
+    def poll_links(self, now=None):
+        """Ping the robots and publish their link statistics once per link_interval.
+
+        Cheap to call every tick; the front end's loop calls it.
+        """
+        if now is None:
+            now = time.monotonic()
+        if now < self.next_link_poll:
+            return False
+        self.next_link_poll = now + self.link_interval
+        for robot in self.robots:
+            if not robot.connected:
+                continue
+            with robot.lock:
+                robot.link.update(now)
+            robot.ping(now)
+        if self.recorder.active:
+            self.recorder.record(LINK, 0, encode_links(self.robots))
+        self.bus.publish(LINK_STATS, robots=self.robots)
+        return True
+
+    def push_parameters(self, robot, values=None):
+        """Send robot one PARAMS bundle with the parameters changed since its last ACK.
+
+        Returns False if there was nothing to send. The ACK (or the failure
+        after the retries) is reported by poll_parameters.
+        """
+        if values is not None:
+            robot.parameters.update(values)
+        with robot.lock:
+            msg = robot.param_sync.push(robot.parameters, time.monotonic())
+        if msg is None:
+            self.log(f"{robot.name}: parameters already up to date\n")
+            return False
+        robot.send_to_robot(msg)
+        return True
+
+    def poll_parameters(self, now):
+        """Retransmit unacknowledged parameter bundles and report their outcome."""
+        for robot in self.robots:
+            if not robot.connected:
+                continue
+            with robot.lock:
+                msg = robot.param_sync.poll(now)
+                result = robot.param_sync.take_result()
+            if msg is not None:
+                robot.send_to_robot(msg)
+            if result is None:
+                continue
+            status, version, changed, elapsed = result
+            if status == "acked":
+                self.log(f"{robot.name} confirmed parameters v{version} "
+                         f"({changed} changed) in {1000 * elapsed:.0f} ms\n")
+            else:
+                self.log(f"{robot.name} did not acknowledge parameters v{version} "
+                         f"after {elapsed:.1f} s\n", "ERROR")
+
+    def send_to_robot(self, robot, msg):
+        robot.send_to_robot(msg)
+
+    def send_team_command(self, command):
+        """Send command to every robot at once through the team channel."""
+        seq = self.team.send(command)
+        print(f"Sent to team: {command} (seq {seq})")
+        return seq
+
+    def poll_team(self, now):
+        """Retry team commands to robots that missed them and report the outcome."""
+        self.team.poll(now)
+        for command, seq, acked, missed, elapsed in self.team.take_results():
+            if missed:
+                names = ", ".join(robot.name for robot in missed)
+                self.log(f"Team {command} (seq {seq}) not acknowledged by {names}\n", "ERROR")
+            else:
+                self.log(f"Team {command} (seq {seq}) acknowledged by {len(acked)} robots "
+                         f"in {1000 * elapsed:.0f} ms\n", "DEBUG")
+
+    def poll(self, now=None):
+        """Timer work for the front end's loop: link probes and command retransmission."""
+        if now is None:
+            now = time.monotonic()
+        self.poll_links(now)
+        self.poll_parameters(now)
+        self.poll_team(now)
+
     def update_world_state(self):
+        """Fuse robot data into the global world map. Returns True if the world changed."""
+        world = self.global_world
+        latest = max((r.last_update for r in self.robots if r.last_update is not None), default=None)
+        if latest is None or latest == self.last_fused_update:
+            # No new telemetry since the last fusion: keep fusing only while obstacles,
+            # tracks or the ball still have to age out, so they do not freeze on screen
+            if not world.has_live_state():
+                return False
+        else:
+            self.last_fused_update = latest
         # Update global world map from robots
-        self.global_world.update_from_robots(self.robots)
-        # Redraw field
-        self.ui.redraw_field()
-        # Re-check battery or other updates as needed
+        world.update_from_robots(self.robots)
+        world.opponent_tracker.apply_to(self.opponents)
+        now = time.monotonic()
+        self.history.record(now, world, self.robots + self.opponents)
+        self.occupancy.record(now, self.robots, world.ball_position if world.ball_tracked() else None)
+        if self.role_allocator is not None:
+            self.assign_roles(now)
+        if self.recorder.active:
+            self.recorder.record(WORLD, 0, encode_world(self.global_world, self.robots, self.opponents))
+        self.bus.publish(WORLD_UPDATED, world=self.global_world)
+        return True
+
+    def assign_roles(self, now=None):
+        """Re-run the role allocator on the fused world and send ROLE only to robots whose role changed."""
+        changes = self.role_allocator.update(self.robots, self.global_world.ball_position, now)
+        for robot, role in changes.items():
+            try:
+                robot.send_to_robot(f"ROLE {role}")
+            except OSError as e:
+                self.log(f"Sending role to {robot.name} failed: {e}\n", "ERROR")
+        if changes:
+            self.bus.publish(ROLES, roles=dict(self.role_allocator.roles))
+        return changes
 
-        # Keep scheduling next update
-        self.ui.root.after(100, self.update_world_state)
+    def run_headless(self, fusion_hz=50, status_interval=5.0, on_tick=None):
+        """Fuse and dispatch events on the calling thread until stop() is called.
 
-    def parse_message(self, message):
-        print(message)
+        on_tick, if given, runs once per tick after the events are dispatched.
+        """
+        period = 1.0 / fusion_hz
+        self.running = True
+        next_tick = time.perf_counter()
+        next_status = next_tick + status_interval
+        while self.running:
+            self.update_world_state()
+            self.poll()
+            self.bus.dispatch()
+            if on_tick is not None:
+                on_tick()
+            now = time.perf_counter()
+            if now >= next_status:
+                self.print_status()
+                next_status = now + status_interval
+            next_tick += period
+            if next_tick < now:
+                # Overran: skip the missed ticks
+                next_tick = now + period
+            time.sleep(max(next_tick - time.perf_counter(), 0))
+
+    def stop(self):
+        self.running = False
+
+    def print_status(self):
+        bx, by = self.global_world.ball_position
+        connected = sum(1 for r in self.robots if r.connected)
+        tracked = sum(1 for o in self.opponents if o.position is not None)
+        print(f"[status] robots {connected}/{len(self.robots)} connected, "
+              f"{self.ingest.packets_received} packets, ball ({bx:.2f}, {by:.2f}), "
+              f"{len(self.global_world.obstacles)} obstacles, {tracked} opponents tracked, "
+              f"RefBox {'connected' if self.refbox_connected else 'disconnected'}")
+        for robot in self.robots:
+            if robot.connected:
+                print(f"[link] {robot.name}: {robot.link.summary(sep='  ')}  {robot.clock.summary()}")
+        if self.role_allocator is not None and self.role_allocator.roles:
+            print("[roles] " + ", ".join(f"{robot.name} {role}" for robot, role in
+                                         sorted(self.role_allocator.roles.items(), key=lambda item: item[0].robot_id)))
+
+    def start_recording(self, path=None):
+        if path is None:
+            path = os.path.join("recordings", time.strftime("match_%Y%m%d_%H%M%S.erarec"))
+        self.recorder.start(path)
+        return path
+
+    def stop_recording(self):
+        self.recorder.stop()
+
+    def parse_message(self, command):
+        """Dispatch a RefBoxCommand to its handler."""
+        handler = self.refbox_handlers.get(command.command)
+        if handler:
+            handler(command)
+        else:
+            print(f"RefBox command: {command.command} (target {command.target_team})")
+
+    def on_refbox_start(self, command):
+        self.game_running = True
+        self.send_team_command("START")
+        print("RefBox: game started")
+
+    def on_refbox_stop(self, command):
+        self.game_running = False
+        self.send_team_command("STOP")
+        print("RefBox: game stopped")
+
+def parse_address(text, default_port):
+    host, _, port = text.rpartition(":")
+    if not host:
+        return text, default_port
+    return host, int(port)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Team Era RoboCup MSL base station")
+    parser.add_argument("--headless", action="store_true",
+                        help="run ingest, fusion and RefBox handling without a display")
+    parser.add_argument("--robot", action="append", default=[], metavar="ID=IP:PORT",
+                        help="address of a home robot (repeatable)")
+    parser.add_argument("--sim-fleet", type=int, metavar="N",
+                        help="use N simulated robots from base_station_sim.py on 127.0.0.1")
+    parser.add_argument("--sim-port", type=int, default=10001, help="UDP port of simulated robot 1")
+    parser.add_argument("--team-group", metavar="IP[:PORT]",
+                        help="multicast group or broadcast address for team-wide commands "
+                             "(default: unicast to each robot)")
+    parser.add_argument("--team-interface", metavar="IP",
+                        help="local interface address for team multicast")
+    parser.add_argument("--refbox", metavar="IP[:PORT]",
+                        help="connect to the RefBox at startup")
+    parser.add_argument("--team-name", default="Era", help="team name in the world state sent to the RefBox")
+    parser.add_argument("--uplink-hz", type=float, default=10,
+                        help="rate of world state updates to the RefBox (0 disables them)")
+    parser.add_argument("--roles", action="store_true",
+                        help="assign roles automatically every fusion tick and send them to the robots")
+    parser.add_argument("--record", metavar="FILE", nargs="?", const="",
+                        help="record the match from startup (default file under recordings/)")
+    parser.add_argument("--fusion-hz", type=float, default=50)
+    parser.add_argument("--fps", type=float, default=30, help="maximum render rate of the UI")
+    parser.add_argument("--worker", action="store_true",
+                        help="run ingest and fusion in a separate process, sharing the world "
+                             "with the UI through shared memory")
+    return parser.parse_args(argv)
 
-def main():
-    root = tk.Tk()
-    app = BaseStationUI(root)
-    # Create logic after UI so it can reference app
-    logic = BaseStationLogic(app)
-    app.logic = logic
 
+def robot_addresses(args):
+    """(robot id, ip, port) for every robot configured on the command line."""
+    addresses = {}
+    if args.sim_fleet:
+        for i in range(args.sim_fleet):
+            addresses[i + 1] = ("127.0.0.1", args.sim_port + i)
+    for spec in args.robot:
+        robot_id, _, address = spec.partition("=")
+        addresses[int(robot_id)] = parse_address(address, 10001)
+    return [(robot_id, ip, port) for robot_id, (ip, port) in sorted(addresses.items())]
+
+
+def create_logic(config):
+    """Build and start a BaseStationLogic from a config dict (see main)."""
+    logic = BaseStationLogic(team_size=config["team_size"], team_group=config["team_group"],
+                             team_interface=config["team_interface"], team_name=config["team_name"],
+                             uplink_hz=config["uplink_hz"], roles=config["roles"])
+    for robot_id, ip, port in config["robots"]:
+        robot = logic.robots[robot_id - 1]
+        robot.robot_ip, robot.robot_port = ip, port
+    return logic
+
+
+def start_logic(logic, config):
     # Example: logic.connect_to_robots() or logic.disconnect_from_robots()
     logic.connect_to_robots()
-    logic.update_world_state()
+    if config["refbox"]:
+        logic.connect_to_refbox(*config["refbox"])
+    if config["record"] is not None:
+        logic.start_recording(config["record"] or None)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = {
+        "team_size": args.sim_fleet or 5,
+        "robots": robot_addresses(args),
+        "team_group": parse_address(args.team_group, 10100) if args.team_group else None,
+        "team_interface": args.team_interface,
+        "refbox": parse_address(args.refbox, 28097) if args.refbox else None,
+        "team_name": args.team_name,
+        "uplink_hz": args.uplink_hz,
+        "roles": args.roles,
+        "record": args.record,
+        "fusion_hz": args.fusion_hz,
+    }
+
+    if args.worker and not args.headless:
+        # The worker must be started before Tk exists in this process
+        from base_station_worker import RemoteLogic
+        logic = RemoteLogic(config)
+        logic.start()
+    else:
+        logic = create_logic(config)
+        start_logic(logic, config)
+
+    if args.headless:
+        try:
+            logic.run_headless(fusion_hz=args.fusion_hz)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            logic.stop_recording()
+            logic.stop_refbox()
+            logic.disconnect_from_robots()
+        return
+
+    import tkinter as tk
+    from base_station_UI import BaseStationUI
+    root = tk.Tk()
+    app = BaseStationUI(root, logic, fusion_hz=args.fusion_hz, max_fps=args.fps, started=STARTED)
+    app.scheduler.start()
     root.mainloop()
+    logic.stop_recording()
+    if args.worker:
+        logic.close()
 
 
 if __name__ == "__main__":
@@ -1,30 +1,66 @@
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-import os
-import json
-import math
-import socket
 import threading
-from PIL import Image, ImageTk
+import time
+import base_station_telemetry as telemetry
+from base_station_recorder import TELEMETRY, COMMAND
+from base_station_link import LinkStats
+from base_station_clock import ClockSync
+from base_station_history import TrajectoryBuffer
+from base_station_params import ParameterSync
+
+
+def _state_field(name):
+    """Property that reads one field of Robot.state and replaces the snapshot on assignment."""
+    def get(self):
+        return getattr(self.state, name)
+
+    def set(self, value):
+        self.state = self.state._replace(**{name: value})
+    return property(get, set)
 
 
 class Robot:
+    # Views of the current RobotState snapshot
+    sequence = _state_field("sequence")
+    timestamp = _state_field("timestamp")
+    last_update = _state_field("last_update")
+    position = _state_field("position")
+    orientation = _state_field("orientation")
+    velocity = _state_field("velocity")
+    ball_visible = _state_field("ball_visible")
+    ball_position = _state_field("ball_position")
+    ball_confidence = _state_field("ball_confidence")
+    obstacles = _state_field("obstacles")
+
     def __init__(self, robot_id, name="Robot", color="blue", ip_address=None, port=None):
         self.robot_ip = ip_address
         self.robot_port = port
         self.socket = None
         self.robot_id = robot_id
-        self.recieve_thread = None
         self.name = f"{name} {robot_id}"
         self.connected = False
         self.color = color
-        self.ball_position = (6, 4.5)
-        self.obstacles = []
+        # Latest telemetry and pose as an immutable RobotState. Only ever replaced
+        # as a whole, so fusion and drawing read it without taking self.lock.
+        # Field positions in meters (assuming 12m x 9m field), orientation in
+        # degrees with 0 = facing "east", velocity in m/s estimated by the base station.
+        self.state = telemetry.INITIAL_STATE
+        self.bad_packets = 0
+        # Packet rate, loss, jitter and round-trip time of the robot's link
+        self.link = LinkStats()
+        # Offset and drift of the robot's clock, from the same PING/PONG exchanges
+        self.clock = ClockSync()
+        # Recent reported positions on the robot's own clock, for the velocity estimate
+        self.trajectory = TrajectoryBuffer(capacity=64)
+        # Acknowledged parameter bundles, see BaseStationLogic.push_parameters
+        self.param_sync = ParameterSync()
+        # MatchRecorder and TeamChannel shared by the base station, set by BaseStationLogic
+        self.recorder = None
+        self.team_channel = None
+        # Preallocated receive buffer, reused for every datagram
+        self.rx_buffer = bytearray(telemetry.MAX_DATAGRAM)
+        self.rx_view = memoryview(self.rx_buffer)
+        # Guards the socket and the link/parameter bookkeeping, never the state
         self.lock = threading.Lock()
-        # Field positions in meters (assuming 12m x 9m field)
-        self.position = (0, 0)
-        # Orientation in degrees, 0 = facing "east" in our coordinate assumption
-        self.orientation = 0
         self.local_world_map = {}
         self.parameters = {
             "max_speed": 2.0,
@@ -32,33 +68,105 @@ class Robot:
             "kick_power": 0.8,
             "acceleration": 1.5,
             "deceleration": 1.5,
-            "battery_level": 100,  # Default battery level
             "vision_range": 5.0,
             "ball_detection_threshold": 0.7,
             "obstacle_detection_threshold": 0.6,
             "communication_range": 20.0
         }
 
+    def update_state(self, **changes):
+        """Replace several state fields at once, e.g. update_state(position=p, orientation=a)."""
+        self.state = self.state._replace(**changes)
+
     def set_parameters(self, parameters):
         self.parameters.update(parameters)
         print(f"Updated parameters for {self.name}")
 
-    def send_to_robot(self, msg):
+    def send_to_robot(self, msg, quiet=False):
+        """Send a text command. quiet=True skips the console and the recorder (link probes)."""
         if self.socket:
-            self.socket.sendto(msg.encode(), (self.robot_ip, self.robot_port))
+            data = msg.encode()
+            self.socket.sendto(data, (self.robot_ip, self.robot_port))
+            if quiet:
+                return
+            if self.recorder is not None:
+                self.recorder.record(COMMAND, self.robot_id, data)
             print(f"Sent to {self.name}: {msg}")
         else:
             print(f"Socket not connected for {self.name}")
 
+    def ping(self, now=None):
+        """Send a PING; the robot's PONG reply gives the round-trip time and a clock sample."""
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            token = self.link.start_ping(now)
+        try:
+            self.send_to_robot(f"PING {token}", quiet=True)
+        except OSError as e:
+            print(f"Error pinging {self.name}: {e}")
+
     def receive_from_robot(self):
-        while self.connected:
-            try:
-                data, addr = self.socket.recvfrom(1024)
-                self.lock.acquire()
-                print(f"Received data from {self.name}: {data.decode()}")
-                #TODO: Parse data and update self.ball_position, position, orientation, obstacles
+        """Handle one pending datagram. Called by RobotIngest when the socket is readable.
 
-                self.lock.release()
-            except Exception as e:
-                print(f"Error receiving data from {self.name}: {e}")
-                break
+        Returns True if a datagram was consumed, False once the socket has nothing left.
+        """
+        sock = self.socket
+        if sock is None or not self.connected:
+            return False
+        try:
+            nbytes, addr = sock.recvfrom_into(self.rx_view)
+        except (BlockingIOError, InterruptedError):
+            return False
+        except OSError as e:
+            print(f"Error receiving data from {self.name}: {e}")
+            return False
+        if self.recorder is not None and self.recorder.active:
+            self.recorder.record(TELEMETRY, self.robot_id, bytes(self.rx_view[:nbytes]))
+        if telemetry.is_telemetry(self.rx_view, nbytes):
+            try:
+                state = telemetry.decode_state(self.rx_view, nbytes, self.state, time.monotonic(),
+                                                self.robot_id)
+            except telemetry.TelemetryError as e:
+                self.bad_packets += 1
+                print(f"Bad telemetry from {self.name}: {e}")
+                return True
+            # Velocity from the robot's own timestamps, so network jitter does not enter it
+            x, y = state.position
+            self.trajectory.append(state.timestamp, x, y)
+            state = state._replace(velocity=self.trajectory.velocity())
+            # Publish the new snapshot atomically
+            self.state = state
+            with self.lock:
+                self.link.on_packet(state.sequence, state.timestamp, state.last_update)
+        elif nbytes > 5 and self.rx_buffer.startswith(b"PONG "):
+            # PONG <token> [robot time]
+            fields = bytes(self.rx_view[5:nbytes]).split()
+            try:
+                token = int(fields[0])
+                robot_time = float(fields[1]) if len(fields) > 1 else None
+            except (IndexError, ValueError):
+                return True
+            now = time.monotonic()
+            with self.lock:
+                rtt = self.link.on_pong(token, now)
+                if rtt is not None and robot_time is not None:
+                    self.clock.on_pong(now - rtt, robot_time, now)
+        elif nbytes > 11 and self.rx_buffer.startswith(b"ACK PARAMS "):
+            try:
+                version = int(self.rx_view[11:nbytes])
+            except ValueError:
+                return True
+            with self.lock:
+                self.param_sync.on_ack(version, time.monotonic())
+        elif nbytes > 9 and self.rx_buffer.startswith(b"ACK TEAM "):
+            try:
+                seq = int(self.rx_view[9:nbytes])
+            except ValueError:
+                return True
+            if self.team_channel is not None:
+                self.team_channel.on_ack(self, seq, time.monotonic())
+        else:
+            text = bytes(self.rx_view[:nbytes]).decode(errors='replace')
+            print(f"Received data from {self.name}: {text}")
+        return True
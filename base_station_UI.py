@@ -1,81 +1,81 @@
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+from tkinter import filedialog, messagebox
 import os
 import json
 import math
-import socket
-import threading
-from PIL import Image, ImageTk
-from base_station_Robot import *
-
-class GlobalWorldMap:
-    def __init__(self):
-        # 12m x 9m field
-        self.field_dimensions = (12, 9)
-        # A global ball position
-        self.ball_position = [6, 4.5]  # Center of the field
-        self.obstacles = []
-
-    def update_from_robots(self, robots):
-        # Sensor fusion logic goes here
-        self.ball_position = [0, 0]
-        self.obstacles = []
-        for robot in robots:
-            robot.lock.acquire()
-            self.ball_position[0] += robot.ball_position[0]
-            self.ball_position[1] += robot.ball_position[1]
-            self.obstacles.extend(robot.obstacles)
-            robot.lock.release()
-        self.ball_position[0] /= len(robots)
-        self.ball_position[1] /= len(robots)
+import time
+from base_station_assets import AssetCache
+from base_station_events import WORLD_UPDATED, ROBOT_STATUS, REFBOX_STATUS, REFBOX_MESSAGE, LOG, LINK_STATS, ROLES
+from base_station_scheduler import FrameScheduler
+from base_station_log import LogPipeline, LEVELS
+
+# Short role names that fit the robot tiles
+ROLE_LABELS = {"GOALKEEPER": "Keeper", "ATTACKER": "Attacker", "DEFENDER_LEFT": "Def L",
+               "DEFENDER_RIGHT": "Def R", "SUPPORTER": "Support", "RESERVE": "Reserve"}
 
 class BaseStationUI:
-    def __init__(self, root):
+    def __init__(self, root, logic, fusion_hz=50, max_fps=30, started=None):
         self.root = root
         self.root.title("Team Era Base Station")
         self.root.geometry("1200x800")
+        # Decoded, pre-scaled images shared by every widget that shows them
+        self.assets = AssetCache(root)
+        # perf_counter() at process start; time_to_first_frame is measured from it
+        self.started = started
+        self.time_to_first_frame = None
 
-        self.global_world = GlobalWorldMap()
+        self.global_world = logic.global_world
         self.current_detailed_robot = None
+        # Link statistic labels of the open detail window, keyed by statistic
+        self.detail_link_labels = {}
+        # Retained-mode field canvas: size the static lines were built for,
+        # persistent item ids per entity and the state they were last drawn with
+        self.field_size = None
+        self.field_items = {}
+        self.field_drawn = {}
+        # Fading trails through each entity's recent trajectory, one polyline each
+        self.history = logic.history
+        self.trail_seconds = 3.0
+        self.trail_colors = {}
+        self.show_trails = tk.BooleanVar(value=True)
+        # Occupancy heatmap: one image item under the field lines, re-rendered at a low rate
+        self.occupancy = logic.occupancy
+        self.heatmap_interval = 1.0
+        self.heatmap_photo = None
+        self.show_heatmap = tk.BooleanVar(value=False)
         self.logging_text = None
-
-        # HOME ROBOTS
-        self.robots = [Robot(i + 1, "Player", color="blue") for i in range(5)]
-        # Arbitrary positions
-        self.robots[0].position = (2, 4)
-        self.robots[0].orientation = 0
-        self.robots[1].position = (3, 2)
-        self.robots[1].orientation = 45
-        self.robots[2].position = (4, 6)
-        self.robots[2].orientation = 90
-        self.robots[3].position = (2, 7)
-        self.robots[3].orientation = 135
-        self.robots[4].position = (1, 1)
-        self.robots[4].orientation = 270
-
-        # self.robots[0].robot_ip = "192.168.123.88"
-        # self.robots[0].robot_port = 10001
-
-        # OPPONENT ROBOTS
-        self.opponents = [Robot(i + 1, "Opponent", color="red") for i in range(5)]
-        # Arbitrary positions
-        self.opponents[0].position = (8, 4)
-        self.opponents[0].orientation = 180
-        self.opponents[1].position = (9, 2)
-        self.opponents[1].orientation = 220
-        self.opponents[2].position = (10, 6)
-        self.opponents[2].orientation = 45
-        self.opponents[3].position = (8, 7)
-        self.opponents[3].orientation = 315
-        self.opponents[4].position = (10, 3)
-        self.opponents[4].orientation = 90
-
-        # We'll create logic after the UI so we can pass self to it
-        self.logic = None
+        # Log lines from any thread are queued here and drained by flush_logs on the Tk thread
+        self.log_pipeline = LogPipeline()
+        self.log_max_lines = 2000
+        self.log_trim_chunk = 200
+
+        # Robots, opponents and the world map belong to the logic core;
+        # the UI only draws them and reacts to its events
+        self.logic = logic
+        self.robots = logic.robots
+        self.opponents = logic.opponents
+        # What the field shows: the live robots and world above, or a replay's (see show_world)
+        self.field_robots = logic.robots
+        self.field_opponents = logic.opponents
         self.is_playing = False
 
+        # Display toggles exist before setup_ui(): its first draw_field() reads them
         self.setup_ui()
-        self.robot_images = {}
+
+        bus = logic.bus
+        bus.subscribe(WORLD_UPDATED, self.on_world_updated)
+        bus.subscribe(ROBOT_STATUS, self.update_robot_status)
+        bus.subscribe(REFBOX_STATUS, self.update_refbox_status)
+        bus.subscribe(REFBOX_MESSAGE, self.log_refbox_message)
+        bus.subscribe(LOG, self.log_message)
+        bus.subscribe(LINK_STATS, self.update_link_stats)
+        bus.subscribe(ROLES, self.update_roles)
+
+        # Fusion and rendering run at their own rates; rendering only when the world changed
+        self.scheduler = FrameScheduler(root, logic.update_world_state, self.redraw_field,
+                                        fusion_hz=fusion_hz, max_fps=max_fps,
+                                        on_frame=self.on_frame,
+                                        on_report=self.update_frame_stats)
 
     def setup_ui(self):
         # Banner
@@ -85,9 +85,7 @@ class BaseStationUI:
 
         # Left (Team Logo)
         try:
-            team_logo_img = ImageTk.PhotoImage(
-                Image.open("robocup_logo.png").resize((220, 70))
-            )
+            team_logo_img = self.assets.photo("robocup_logo.png", (220, 70))
             team_logo_label = tk.Label(banner_frame, image=team_logo_img, bg="#a8328d")
             team_logo_label.image = team_logo_img
         except Exception:
@@ -100,9 +98,7 @@ class BaseStationUI:
         center_logo_frame = tk.Frame(banner_frame, bg="#a8328d")
         center_logo_frame.pack(side=tk.LEFT, expand=True)
         try:
-            msl_logo_img = ImageTk.PhotoImage(
-                Image.open("era_logo.png").resize((100, 100))
-            )
+            msl_logo_img = self.assets.photo("era_logo.png", (100, 100))
             msl_logo_label = tk.Label(center_logo_frame, image=msl_logo_img, bg="#a8328d")
             msl_logo_label.image = msl_logo_img
             msl_logo_label.pack()
@@ -122,9 +118,7 @@ class BaseStationUI:
 
         # Institute logo
         try:
-            institute_logo_img = ImageTk.PhotoImage(
-                Image.open("iitk_logo.png").resize((75, 75))
-            )
+            institute_logo_img = self.assets.photo("iitk_logo.png", (75, 75))
             institute_logo_label = tk.Label(right_frame, image=institute_logo_img, bg="#a8328d")
             institute_logo_label.image = institute_logo_img
             institute_logo_label.pack(side=tk.RIGHT, padx=5)
@@ -163,16 +157,16 @@ class BaseStationUI:
         for i, robot in enumerate(self.robots):
             row = i // 2
             col = i % 2
-            robot_frame = tk.Frame(robot_grid, width=180, height=180, bd=2, relief=tk.RAISED)
+            robot_frame = tk.Frame(robot_grid, width=180, height=215, bd=2, relief=tk.RAISED)
             robot_frame.grid(row=row, column=col, padx=5, pady=5)
             robot_frame.grid_propagate(False)
 
-            tk.Label(robot_frame, text=f"Player {robot.robot_id}", font=("Arial", 12)).pack(pady=5)
+            title_label = tk.Label(robot_frame, text=f"Player {robot.robot_id}", font=("Arial", 12))
+            title_label.pack(pady=5)
 
-            # Load and place bot image
+            # Load and place bot image (decoded once, shared by every tile)
             try:
-                bot_img = Image.open("bot.png").resize((150, 120))
-                bot_photo = ImageTk.PhotoImage(bot_img)
+                bot_photo = self.assets.photo("bot.png", (150, 120))
                 # Create a label with the image. The transparent parts will merge with the background.
                 robot_image_label = tk.Label(robot_frame, image=bot_photo, bg=robot_frame.cget("bg"))
                 robot_image_label.image = bot_photo  # keep a reference
@@ -190,13 +184,18 @@ class BaseStationUI:
             status_label = tk.Label(robot_frame, text=status_text, fg=status_color, font=("Arial", 10, "bold"))
             status_label.pack()
 
-            battery_str = f"Battery: {robot.parameters['battery_level']}%"
+            battery_str = f"Battery: {robot.state.battery}%"
             battery_label = tk.Label(robot_frame, text=battery_str, fg="blue", font=("Arial", 10))
             battery_label.pack()
 
+            link_label = tk.Label(robot_frame, text=robot.link.summary(), fg="gray", font=("Arial", 8))
+            link_label.pack()
+
             # Store references for updates
             robot.status_label = status_label
             robot.battery_label = battery_label
+            robot.link_label = link_label
+            robot.title_label = title_label
 
 
         # Center Panel: Field View
@@ -211,6 +210,8 @@ class BaseStationUI:
         self.field_canvas.bind("<Configure>", lambda e: self.redraw_field())
 
         tk.Label(middle_panel, text="Global World Map").pack()
+        self.frame_stats_label = tk.Label(middle_panel, text="", fg="gray", font=("Arial", 9))
+        self.frame_stats_label.pack()
 
         # Right Panel: Logging
         logging_panel = tk.Frame(content_frame, width=300, bd=2, relief=tk.SUNKEN)
@@ -218,8 +219,17 @@ class BaseStationUI:
         logging_panel.pack_propagate(False)
 
         tk.Label(logging_panel, text="Logs", font=("Arial", 12, "bold")).pack(pady=5)
+        log_filter_frame = tk.Frame(logging_panel)
+        log_filter_frame.pack(fill=tk.X, padx=5)
+        tk.Label(log_filter_frame, text="Level:").pack(side=tk.LEFT)
+        self.log_level_var = tk.StringVar(value="INFO")
+        tk.OptionMenu(log_filter_frame, self.log_level_var, *LEVELS,
+                      command=self.log_pipeline.set_level).pack(side=tk.LEFT, padx=5)
         self.logging_text = tk.Text(logging_panel, wrap=tk.WORD)
         self.logging_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.logging_text.tag_configure("DEBUG", foreground="gray")
+        self.logging_text.tag_configure("WARNING", foreground="orange")
+        self.logging_text.tag_configure("ERROR", foreground="red")
 
         # Logging buttons
         log_buttons_frame = tk.Frame(logging_panel)
@@ -237,16 +247,21 @@ class BaseStationUI:
         tk.Button(additional_btn_frame, text="Play/Pause", width=12, command=lambda: self.play_pause()).pack(side=tk.LEFT, padx=5)
         tk.Button(additional_btn_frame, text="Reset Position", width=12, command=lambda: self.reset_position()).pack(side=tk.LEFT, padx=5)
         tk.Button(additional_btn_frame, text="Camera Check", width=12, command=lambda: self.camera_check()).pack(side=tk.LEFT, padx=5)
+        tk.Button(additional_btn_frame, text="Replay Match", width=12, command=lambda: self.open_replay_window()).pack(side=tk.LEFT, padx=5)
+        tk.Checkbutton(additional_btn_frame, text="Trails", variable=self.show_trails,
+                       command=self.redraw_field).pack(side=tk.LEFT, padx=5)
+        tk.Checkbutton(additional_btn_frame, text="Heatmap", variable=self.show_heatmap,
+                       command=self.redraw_field).pack(side=tk.LEFT, padx=5)
 
     ###########################################################################
     # RefBox UI Integration
     ###########################################################################
     def handle_refbox_connect(self):
         """Called when the user clicks 'Connect to RefBox'."""
-        if self.logic and not self.logic.refbox_connected:
+        if not self.logic.refbox_connected:
             self.logic.connect_to_refbox(ip="127.0.0.1", port=28097)  # Adjust IP/port as needed
         else:
-            self.log_message("RefBox already connected or logic not ready.\n")
+            self.log_message("RefBox already connected.\n", "WARNING")
 
     def update_refbox_status(self, connected):
         """Update the label in the banner to show refbox status."""
@@ -255,31 +270,130 @@ class BaseStationUI:
             self.log_message("Connected to RefBox.\n")
         else:
             self.refbox_status_label.config(text="RefBox: Disconnected", fg="red")
-            self.log_message("Disconnected from RefBox.\n")
+            self.log_message("Disconnected from RefBox.\n", "WARNING")
 
-    def log_refbox_message(self, message):
+    def log_refbox_message(self, command):
         """Log a new message from the RefBox into the UI."""
-        self.log_message(f"RefBox => {message}\n")
+        self.log_message(f"RefBox => {command}\n")
+
+    def update_robot_status(self, robot, connected):
+        if hasattr(robot, "status_label"):
+            if connected:
+                robot.status_label.config(text="Connected", fg="green")
+            else:
+                robot.status_label.config(text="Disconnected", fg="red")
+
+    def update_link_stats(self, robots):
+        """Refresh battery and link quality in the robot tiles and the open detail window."""
+        for robot in robots:
+            if not hasattr(robot, "link_label"):
+                continue
+            link = robot.link
+            if not robot.connected:
+                color = "gray"
+            elif link.rate == 0 or link.loss > 0.1:
+                color = "red"
+            elif link.loss > 0.02 or link.jitter > 0.02:
+                color = "orange"
+            else:
+                color = "dark green"
+            robot.link_label.config(text=link.summary(), fg=color)
+            robot.battery_label.config(text=f"Battery: {robot.state.battery:.0f}%")
+
+        robot = self.current_detailed_robot
+        if robot is not None and self.detail_link_labels:
+            for key, value in robot.link.as_dict().items():
+                if key in self.detail_link_labels:
+                    self.detail_link_labels[key].config(text=self.format_link_value(key, value))
+
+    def update_roles(self, roles):
+        """Show each robot's current role next to its name in the tiles."""
+        for robot in self.robots:
+            if hasattr(robot, "title_label"):
+                role = roles.get(robot)
+                text = f"Player {robot.robot_id}"
+                if role is not None:
+                    text += f" \u00b7 {ROLE_LABELS.get(role, role.title())}"
+                robot.title_label.config(text=text)
+
+    @staticmethod
+    def format_link_value(key, value):
+        if value is None:
+            return "-"
+        if key == "rate":
+            return f"{value:.1f} pkt/s"
+        if key == "loss":
+            return f"{100 * value:.1f}%"
+        if key.endswith("_ms"):
+            return f"{value:.1f} ms"
+        return str(value)
+
+    def on_world_updated(self, world):
+        self.scheduler.mark_dirty()
+
+    def on_frame(self):
+        """Runs on the Tk thread every frame: logic timers, deliver logic events, then flush logs."""
+        self.logic.poll()
+        self.logic.bus.dispatch()
+        self.flush_logs()
 
     ###########################################################################
     # Field / Robot Drawing
     ###########################################################################
     def draw_field(self):
-        """Draw field lines, robots, and the ball."""
+        """Draw field lines, robots, and the ball.
+
+        Field lines are only rebuilt when the canvas size changes; robots and the
+        ball are persistent items that are moved with coords() when they change.
+        """
         w = self.field_canvas.winfo_width() or 600
         h = self.field_canvas.winfo_height() or 400
-        self.field_canvas.delete("all")
-        self.draw_soccer_lines(self.field_canvas, w, h)
-        self.draw_robots_on_field(self.field_canvas, self.robots, w, h)
-        self.draw_robots_on_field(self.field_canvas, self.opponents, w, h)
+        if self.field_size != (w, h):
+            self.field_canvas.delete("all")
+            self.field_items.clear()
+            self.field_drawn.clear()
+            self.draw_soccer_lines(self.field_canvas, w, h)
+            self.field_size = (w, h)
+        self.draw_heatmap(self.field_canvas, w, h)
+        self.draw_trails(self.field_canvas, w, h)
+        self.draw_robots_on_field(self.field_canvas, self.field_robots, w, h)
+        self.draw_robots_on_field(self.field_canvas, self.field_opponents, w, h)
         self.draw_ball_on_field(self.field_canvas, w, h)
 
+    def show_world(self, world, robots, opponents, history, occupancy):
+        """Draw this world on the field from now on; the robot tiles and commands stay live."""
+        self.global_world = world
+        self.field_robots = robots
+        self.field_opponents = opponents
+        self.history = history
+        self.occupancy = occupancy
+        # The persistent canvas items belong to the previous world's entities
+        self.field_size = None
+        self.redraw_field()
+
+    def show_live_world(self):
+        logic = self.logic
+        self.show_world(logic.global_world, logic.robots, logic.opponents, logic.history, logic.occupancy)
+
     def redraw_field(self):
         self.draw_field()
+        if self.time_to_first_frame is None and self.started is not None:
+            self.root.update_idletasks()
+            self.time_to_first_frame = time.perf_counter() - self.started
+            self.log_message(f"Time to first frame: {1000 * self.time_to_first_frame:.0f} ms "
+                             f"(image cache {self.assets.hits} hits, {self.assets.misses} misses)\n")
+
+    def update_frame_stats(self, stats):
+        """Show the frame rate and timings actually achieved by the scheduler."""
+        self.frame_stats_label.config(
+            text=f"Render {stats['fps']:.0f} fps ({stats['frame_ms']:.1f} ms), "
+                 f"fusion {stats['fusion_hz']:.0f} Hz ({stats['fusion_ms']:.2f} ms), "
+                 f"skipped {stats['frames_skipped']}"
+        )
 
     def draw_soccer_lines(self, canvas, w, h):
-        canvas.create_rectangle(10, 10, w - 10, h - 10, outline="white", width=2)
-        canvas.create_line(w // 2, 10, w // 2, h - 10, fill="white", width=2)
+        canvas.create_rectangle(10, 10, w - 10, h - 10, outline="white", width=2, tags="lines")
+        canvas.create_line(w // 2, 10, w // 2, h - 10, fill="white", width=2, tags="lines")
         center_x, center_y = w // 2, h // 2
         circle_radius = min(w, h) * 0.1
         canvas.create_oval(
@@ -289,9 +403,100 @@ class BaseStationUI:
             center_y + circle_radius,
             outline="white",
             width=2,
+            tags="lines",
         )
-        canvas.create_rectangle(5, h // 2 - 50, 10, h // 2 + 50, fill="blue", outline="blue")
-        canvas.create_rectangle(w - 10, h // 2 - 50, w - 5, h // 2 + 50, fill="yellow", outline="yellow")
+        canvas.create_rectangle(5, h // 2 - 50, 10, h // 2 + 50, fill="blue", outline="blue", tags="lines")
+        canvas.create_rectangle(w - 10, h // 2 - 50, w - 5, h // 2 + 50, fill="yellow", outline="yellow", tags="lines")
+
+    def draw_heatmap(self, canvas, w, h):
+        """Occupancy heatmap as a single image below the field lines.
+
+        The image is regenerated only when the occupancy changed and at least
+        heatmap_interval seconds have passed (or the canvas was resized), so
+        most frames cost one tuple comparison.
+        """
+        visible = self.show_heatmap.get()
+        size = (max(w - 20, 1), max(h - 20, 1))
+        version = self.occupancy.version
+        now = time.monotonic()
+        drawn = self.field_drawn.get("heatmap")
+        if drawn is not None and drawn[:2] == (visible, size):
+            if not visible or drawn[2] == version or now - drawn[3] < self.heatmap_interval:
+                return
+        self.field_drawn["heatmap"] = (visible, size, version, now)
+
+        item = self.field_items.get("heatmap")
+        if not visible:
+            if item is not None:
+                canvas.itemconfigure(item, state="hidden")
+            return
+        self.heatmap_photo = self.heatmap_image(*size)
+        if item is None:
+            item = canvas.create_image(10, 10, image=self.heatmap_photo, anchor=tk.NW, tags="heatmap")
+            canvas.tag_lower(item)
+            self.field_items["heatmap"] = item
+        else:
+            canvas.itemconfigure(item, image=self.heatmap_photo, state="normal")
+
+    def heatmap_image(self, width, height):
+        pixels = self.occupancy.render_rgb(width, height)
+        try:
+            # Tk reads binary PPM itself, no PIL needed
+            return tk.PhotoImage(master=self.root, data=b"P6 %d %d 255\n" % (width, height) + pixels,
+                                 format="PPM")
+        except tk.TclError:
+            from PIL import Image, ImageTk
+            return ImageTk.PhotoImage(Image.frombytes("RGB", (width, height), pixels), master=self.root)
+
+    def draw_trails(self, canvas, w, h):
+        """One polyline per entity through its last trail_seconds of history.
+
+        Trails sit just above the field lines and below the robots. A trail
+        fades towards the field colour as its entity stops being updated and
+        disappears trail_seconds after the last sample.
+        """
+        field_w, field_h = self.global_world.field_dimensions
+        scale = ((w - 20) / field_w, (h - 20) / field_h)
+        now = self.history.time
+        visible = self.show_trails.get() and now is not None
+        entities = [("ball", self.history.ball, "white")]
+        entities += [(robot, self.history.robots.get(robot), robot.color)
+                     for robot in self.field_robots + self.field_opponents]
+        for entity, trajectory, color in entities:
+            key = ("trail", entity)
+            state = (trajectory.count if trajectory is not None else 0, now, visible)
+            if self.field_drawn.get(key) == state:
+                continue
+            self.field_drawn[key] = state
+
+            item = self.field_items.get(key)
+            samples = trajectory.since(now - self.trail_seconds) if visible and trajectory is not None else ()
+            if len(samples) < 2:
+                if item is not None:
+                    canvas.itemconfigure(item, state="hidden")
+                continue
+            coords = (samples[:, 1:] * scale + 10).ravel().tolist()
+            fade = 1.0 - (now - samples[-1, 0]) / self.trail_seconds
+            fill = self.trail_color(color, round(4 * fade) / 4)
+            if item is None:
+                item = canvas.create_line(*coords, fill=fill, width=2, tags="trail")
+                canvas.tag_raise(item, "lines")
+                self.field_items[key] = item
+            else:
+                canvas.coords(item, coords)
+                canvas.itemconfigure(item, fill=fill, state="normal")
+
+    def trail_color(self, color, level):
+        """color blended into the field background; level 1 is the freshest trail."""
+        key = (color, level)
+        fill = self.trail_colors.get(key)
+        if fill is None:
+            rgb = [c // 257 for c in self.root.winfo_rgb(color)]
+            background = [c // 257 for c in self.root.winfo_rgb(self.field_canvas.cget("bg"))]
+            mix = 0.6 * max(level, 0.0)
+            fill = "#%02x%02x%02x" % tuple(int(b + (c - b) * mix) for c, b in zip(rgb, background))
+            self.trail_colors[key] = fill
+        return fill
 
     def draw_robots_on_field(self, canvas, robots, w, h):
         field_w, field_h = self.global_world.field_dimensions
@@ -299,27 +504,58 @@ class BaseStationUI:
         scale_y = (h - 20) / field_h
 
         for robot in robots:
-            rx, ry = robot.position
+            state = robot.state
+            position, orientation = state.position, state.orientation
+            if self.field_drawn.get(robot) == (position, orientation):
+                continue
+            self.field_drawn[robot] = (position, orientation)
+
+            items = self.field_items.get(robot)
+            if position is None:
+                # Not currently known (e.g. an untracked opponent slot)
+                if items is not None:
+                    for item in items:
+                        canvas.itemconfigure(item, state="hidden")
+                continue
+
+            rx, ry = position
             cx = 10 + rx * scale_x
             cy = 10 + ry * scale_y
             r = 10
-            canvas.create_oval(cx - r, cy - r, cx + r, cy + r, fill=robot.color, outline="white", width=2)
-            angle_rad = math.radians(robot.orientation)
+            angle_rad = math.radians(orientation)
             line_len = 20
             x_end = cx + line_len * math.cos(angle_rad)
             y_end = cy + line_len * math.sin(angle_rad)
-            canvas.create_line(cx, cy, x_end, y_end, fill="white", width=2)
+
+            if items is None:
+                body = canvas.create_oval(cx - r, cy - r, cx + r, cy + r, fill=robot.color, outline="white", width=2)
+                heading = canvas.create_line(cx, cy, x_end, y_end, fill="white", width=2)
+                self.field_items[robot] = (body, heading)
+            else:
+                body, heading = items
+                canvas.coords(body, cx - r, cy - r, cx + r, cy + r)
+                canvas.coords(heading, cx, cy, x_end, y_end)
+                canvas.itemconfigure(body, state="normal")
+                canvas.itemconfigure(heading, state="normal")
 
     def draw_ball_on_field(self, canvas, w, h):
         field_w, field_h = self.global_world.field_dimensions
         bx, by = self.global_world.ball_position
+        state = (bx, by)
+        if self.field_drawn.get("ball") == state:
+            return
+        self.field_drawn["ball"] = state
         scale_x = (w - 20) / field_w
         scale_y = (h - 20) / field_h
         cx = 10 + bx * scale_x
         cy = 10 + by * scale_y
         ball_radius = 6
-        canvas.create_oval(cx - ball_radius, cy - ball_radius, cx + ball_radius, cy + ball_radius,
-                           fill="white", outline="black", width=2)
+        ball = self.field_items.get("ball")
+        if ball is None:
+            self.field_items["ball"] = canvas.create_oval(cx - ball_radius, cy - ball_radius, cx + ball_radius, cy + ball_radius,
+                                                          fill="white", outline="black", width=2)
+        else:
+            canvas.coords(ball, cx - ball_radius, cy - ball_radius, cx + ball_radius, cy + ball_radius)
 
     ###########################################################################
     # Detailed Robot View
@@ -338,7 +574,7 @@ class BaseStationUI:
                  text=f"Status: {'Connected' if robot.connected else 'Disconnected'}",
                  fg="green" if robot.connected else "red",
                  font=("Arial", 12, "bold")).pack(side=tk.LEFT, padx=20)
-        tk.Label(info_frame, text=f"Battery: {robot.parameters['battery_level']}%", font=("Arial", 12)).pack(side=tk.LEFT, padx=20)
+        tk.Label(info_frame, text=f"Battery: {robot.state.battery}%", font=("Arial", 12)).pack(side=tk.LEFT, padx=20)
 
         tk.Button(info_frame, text="Change Parameters", command=self.open_parameters_window).pack(side=tk.RIGHT, padx=20)
 
@@ -353,6 +589,22 @@ class BaseStationUI:
         param_frame = tk.LabelFrame(left_section, text="Parameters")
         param_frame.pack(fill=tk.BOTH, expand=True, pady=10)
 
+        link_frame = tk.LabelFrame(left_section, text="Link")
+        link_frame.pack(fill=tk.X, pady=5)
+        self.detail_link_labels = {}
+        for i, (key, value) in enumerate(robot.link.as_dict().items()):
+            tk.Label(link_frame, text=key.replace('_ms', '').replace('_', ' ').title()).grid(
+                row=i // 2, column=2 * (i % 2), sticky="w", padx=10)
+            label = tk.Label(link_frame, text=self.format_link_value(key, value))
+            label.grid(row=i // 2, column=2 * (i % 2) + 1, sticky="e", padx=10)
+            self.detail_link_labels[key] = label
+
+        def close_detail():
+            self.detail_link_labels = {}
+            detail_window.destroy()
+
+        detail_window.protocol("WM_DELETE_WINDOW", close_detail)
+
         row = 0
         for param, value in robot.parameters.items():
             tk.Label(param_frame, text=param.replace('_', ' ').title()).grid(row=row, column=0, sticky="w", padx=10, pady=5)
@@ -397,7 +649,7 @@ class BaseStationUI:
         tk.Button(control_frame, text="Test kicking angle", command=lambda: self.test_robot("test_kick_angle")).pack(side=tk.LEFT, padx=10)
         tk.Button(control_frame, text="Charge", command=lambda: self.test_robot("charge")).pack(side=tk.LEFT, padx=10)
         tk.Button(control_frame, text="Kick", command=lambda: self.test_robot("kick")).pack(side=tk.LEFT, padx=10)
-        tk.Button(control_frame, text="Close", command=detail_window.destroy).pack(side=tk.RIGHT, padx=20)
+        tk.Button(control_frame, text="Close", command=close_detail).pack(side=tk.RIGHT, padx=20)
 
         # Movement Controls
         movement_controls_frame = tk.Frame(detail_window)
@@ -467,38 +719,29 @@ class BaseStationUI:
                 except Exception as e:
                     messagebox.showerror("Error", f"Failed to load parameters: {str(e)}")
 
+        def read_entries():
+            return {param: float(entry.get()) for param, entry in entries.items()}
+
+        # One PARAMS bundle per robot with only the changed values; the
+        # confirmation (or failure after retries) shows up in the log
         def send_parameters():
             try:
-                for param, entry in entries.items():
-                    value = float(entry.get())
-                    self.current_detailed_robot.parameters[param] = value
-                # For demonstration: print them
-                print(f"Sending parameters to {self.current_detailed_robot.name}:")
-                for param, val in self.current_detailed_robot.parameters.items():
-                    print(f"  {param}: {val}")
-                    self.current_detailed_robot.send_to_robot(f"SET {param} {val}")
-                messagebox.showinfo("Success", "Parameters sent to robot!")
+                new_params = read_entries()
             except ValueError:
                 messagebox.showerror("Error", "Invalid parameter value. Please enter numeric values.")
+                return
+            if self.logic.push_parameters(self.current_detailed_robot, new_params):
+                self.log_message(f"Sending parameters to {self.current_detailed_robot.name}...\n")
 
         def send_to_all():
             """Send the same parameter values to all robots."""
             try:
-                # Gather the new param values from entries
-                new_params = {}
-                for param, entry in entries.items():
-                    new_params[param] = float(entry.get())
-
-                # Update each robot
-                for robot in self.robots:
-                    robot.parameters.update(new_params)
-                    print(f"Sending parameters to {robot.name}:")
-                    for p, val in robot.parameters.items():
-                        print(f"  {p}: {val}")
-                        robot.send_to_robot(f"SET {p} {val}")
-                messagebox.showinfo("Success", "Parameters sent to ALL robots!")
+                new_params = read_entries()
             except ValueError:
                 messagebox.showerror("Error", "Invalid parameter value. Please enter numeric values.")
+                return
+            sent = sum(1 for robot in self.robots if self.logic.push_parameters(robot, new_params))
+            self.log_message(f"Sending parameters to {sent} robot(s)...\n")
 
         tk.Button(buttons_frame, text="Load", command=load_parameters).pack(side=tk.LEFT, padx=10)
         tk.Button(buttons_frame, text="Save", command=save_parameters).pack(side=tk.LEFT, padx=10)
@@ -516,28 +759,95 @@ class BaseStationUI:
             with open(filename, 'w') as f:
                 json.dump(self.current_detailed_robot.parameters, f, indent=4)
 
+    ###########################################################################
+    # Match Replay
+    ###########################################################################
+    def open_replay_window(self):
+        filename = filedialog.askopenfilename(
+            title="Open Match Recording",
+            initialdir="recordings" if os.path.isdir("recordings") else None,
+            filetypes=[("Match recordings", "*.erarec"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        from base_station_replay import MatchReplay
+        try:
+            replay = MatchReplay(self, filename)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Failed to open recording: {str(e)}")
+            return
+
+        # The replay fuses into its own world; live fusion and the RefBox uplink carry on
+        replay.show()
+        self.log_message(f"Replaying {filename} ({replay.duration:.1f} s)\n")
+
+        replay_window = tk.Toplevel(self.root)
+        replay_window.title(f"Replay - {os.path.basename(filename)}")
+        replay_window.geometry("500x160")
+
+        time_label = tk.Label(replay_window, text="", font=("Arial", 11))
+        time_label.pack(pady=5)
+
+        seek_var = tk.DoubleVar(value=0.0)
+        seek_scale = tk.Scale(replay_window, from_=0, to=max(replay.duration, 0.01), resolution=0.1,
+                              orient=tk.HORIZONTAL, showvalue=False, variable=seek_var)
+        seek_scale.pack(fill=tk.X, padx=10)
+        seek_scale.bind("<ButtonRelease-1>", lambda e: replay.seek(seek_var.get()))
+
+        controls = tk.Frame(replay_window)
+        controls.pack(fill=tk.X, pady=5)
+        tk.Button(controls, text="Play/Pause", width=10, command=replay.toggle).pack(side=tk.LEFT, padx=5)
+        tk.Button(controls, text="Step", width=6, command=replay.step).pack(side=tk.LEFT, padx=5)
+        tk.Label(controls, text="Speed:").pack(side=tk.LEFT, padx=(15, 0))
+        speed_var = tk.StringVar(value="1")
+        tk.OptionMenu(controls, speed_var, *["0.1", "0.25", "0.5", "1", "2", "5", "10", "25", "50"],
+                      command=lambda v: replay.set_speed(float(v))).pack(side=tk.LEFT, padx=5)
+
+        def on_update(r):
+            time_label.config(text=f"{r.position:7.2f} / {r.duration:.2f} s  ({r.speed:g}x)")
+            seek_var.set(r.position)
+
+        def close():
+            replay.close()
+            replay_window.destroy()
+            self.log_message("Replay closed.\n")
+
+        replay.on_update = on_update
+        replay_window.protocol("WM_DELETE_WINDOW", close)
+        tk.Button(controls, text="Close", command=close).pack(side=tk.RIGHT, padx=10)
+        replay.seek(0.0)
+
     ###########################################################################
     # Robot Movement / Logging
     ###########################################################################
     def move_robot(self, direction):
         if self.current_detailed_robot:
-            self.current_detailed_robot.send_to_robot(f"MOVE {direction}")
+            self.logic.send_to_robot(self.current_detailed_robot, f"MOVE {direction}")
             self.log_message(f"Moved {self.current_detailed_robot.name} {direction}\n")
         else:
             print("No robot selected")
 
     def test_robot(self, test_msg):
         if self.current_detailed_robot:
-            self.current_detailed_robot.send_to_robot(f"TEST {test_msg}")
+            self.logic.send_to_robot(self.current_detailed_robot, f"TEST {test_msg}")
             self.log_message(f"Sent test command to {self.current_detailed_robot.name}: {test_msg}\n")
         else:
             print("No robot selected")
 
     def start_logging(self):
-        self.log_message("Logging started...\n")
+        if self.logic.recorder.active:
+            self.log_message("Already recording.\n", "WARNING")
+            return
+        path = self.logic.start_recording()
+        self.log_message(f"Logging started, recording to {path}\n")
 
     def stop_logging(self):
-        self.log_message("Logging stopped.\n")
+        if not self.logic.recorder.active:
+            self.log_message("Not recording.\n", "WARNING")
+            return
+        self.logic.stop_recording()
+        recorder = self.logic.recorder
+        self.log_message(f"Logging stopped: {recorder.records} records in {recorder.path}\n")
 
     def save_log(self):
         filename = filedialog.asksaveasfilename(
@@ -550,29 +860,41 @@ class BaseStationUI:
                 f.write(self.logging_text.get("1.0", tk.END))
             print(f"Log saved to {filename}")
 
-    def log_message(self, msg):
-        """Append a message to the logging text box."""
-        if self.logging_text:
-            self.logging_text.insert(tk.END, msg)
-            self.logging_text.see(tk.END)
+    def log_message(self, msg, level="INFO"):
+        """Queue a message for the logging text box. Safe to call from any thread."""
+        self.log_pipeline.put(msg, level)
+
+    def flush_logs(self):
+        """Move queued log lines into the text box in one update. Runs on the Tk thread every frame."""
+        entries = self.log_pipeline.drain()
+        if not entries or not self.logging_text:
+            return
+        chunks = []
+        for _, level, msg in entries:
+            chunks.append(msg)
+            chunks.append(level)
+        self.logging_text.insert(tk.END, *chunks)
+
+        # Keep the widget bounded, trimming the oldest lines in chunks
+        lines = int(self.logging_text.index("end-1c").split(".")[0])
+        if lines > self.log_max_lines:
+            excess = lines - self.log_max_lines + self.log_trim_chunk
+            self.logging_text.delete("1.0", f"{excess + 1}.0")
+        self.logging_text.see(tk.END)
 
     def play_pause(self):
         self.is_playing = not self.is_playing
         if self.is_playing:
             print("Playing...")
-            for robot in self.robots:
-                robot.send_to_robot("PLAY")
+            self.logic.send_team_command("PLAY")
         else:
             print("Paused.")
-            for robot in self.robots:
-                robot.send_to_robot("PAUSE")
+            self.logic.send_team_command("PAUSE")
     
     def reset_position(self):
-        for robot in self.robots:
-            robot.send_to_robot("RESET POSITION")
+        self.logic.send_team_command("RESET POSITION")
         self.log_message("Resetting positions...\n")
     
     def camera_check(self):
-        for robot in self.robots:
-            robot.send_to_robot("CHECK CAMERA")
+        self.logic.send_team_command("CHECK CAMERA")
         self.log_message("Checking camera...\n")
\ No newline at end of file
@@ -0,0 +1,58 @@
+import hashlib
+import os
+import tkinter as tk
+
+# Pre-scaled copies of the UI images, keyed by source hash and size
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".asset_cache")
+
+
+class AssetCache:
+    """Decodes and scales each image once and shares the resulting PhotoImage.
+
+    Scaled variants are written to cache_dir as PNGs named after the source's
+    content hash and the target size, so later launches load them with Tk's
+    own PNG reader and never import PIL. PIL is only imported to build a
+    missing variant.
+    """
+
+    def __init__(self, master=None, cache_dir=CACHE_DIR):
+        self.master = master
+        self.cache_dir = cache_dir
+        self.photos = {}
+        self.hits = 0
+        self.misses = 0
+
+    def photo(self, path, size):
+        """Shared PhotoImage of path scaled to size (w, h). Raises OSError if it cannot be loaded."""
+        key = (path, size)
+        photo = self.photos.get(key)
+        if photo is not None:
+            return photo
+        scaled = self.scaled_path(path, size)
+        try:
+            photo = tk.PhotoImage(master=self.master, file=scaled)
+        except tk.TclError:
+            # Tk without PNG support (before 8.6)
+            from PIL import Image, ImageTk
+            photo = ImageTk.PhotoImage(Image.open(scaled), master=self.master)
+        self.photos[key] = photo
+        return photo
+
+    def scaled_path(self, path, size):
+        """Path of the on-disk variant of path at size, creating it if needed."""
+        with open(path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()[:16]
+        name = os.path.splitext(os.path.basename(path))[0]
+        scaled = os.path.join(self.cache_dir, f"{name}-{digest}-{size[0]}x{size[1]}.png")
+        if os.path.exists(scaled):
+            self.hits += 1
+            return scaled
+        self.misses += 1
+        from PIL import Image
+        os.makedirs(self.cache_dir, exist_ok=True)
+        image = Image.open(path).resize(size)
+        # Write then rename so a concurrent launch never reads a partial file
+        tmp = f"{scaled}.{os.getpid()}.tmp"
+        image.save(tmp, "PNG")
+        os.replace(tmp, scaled)
+        return scaled
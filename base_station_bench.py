@@ -0,0 +1,684 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import base_station_telemetry as telemetry
+from base_station_Robot import Robot
+from base_station_world import GlobalWorldMap
+from base_station_fusion import ObstacleFusion
+from base_station_tracking import OpponentTracker
+from base_station_ingest import RobotIngest
+from base_station_uplink import WorldStateSerializer, WorldStateUplink
+from base_station_heatmap import OccupancyGrid
+from base_station_roles import RoleAllocator
+
+
+def timeit(fn, repeat):
+    """Run fn repeat times and return (mean, max) in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return sum(samples) / len(samples), max(samples)
+
+
+def percentiles(samples):
+    """Summary of a list of millisecond samples."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    return {"count": len(ordered), "mean": sum(ordered) / len(ordered), "p50": pick(0.5),
+            "p95": pick(0.95), "p99": pick(0.99), "max": ordered[-1]}
+
+
+def moving_opponents(count, t):
+    """count opponents driving in circles around fixed points on a 12m x 9m field."""
+    rng = random.Random(count)
+    centers = [(rng.uniform(1, 11), rng.uniform(1, 8)) for _ in range(count)]
+    return [(cx + 0.5 * (t % 6.28), cy + 0.3 * (t % 3.14)) for cx, cy in centers]
+
+
+###############################################################################
+# Robot ingest throughput
+###############################################################################
+def _blast(addresses, packets, duration, sent, rate=None):
+    """Sender process: push packets round-robin to every address (packets[i] to
+    addresses[i]) for duration seconds, as fast as possible or at rate packets/second
+    per address."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    count = 0
+    period = 1.0 / rate if rate else 0.0
+    next_round = time.monotonic()
+    end = next_round + duration
+    while time.monotonic() < end:
+        for packet, address in zip(packets, addresses):
+            try:
+                sock.sendto(packet, address)
+                count += 1
+            except OSError:
+                pass
+        if period:
+            next_round += period
+            delay = next_round - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    sent.value = count
+
+
+def _receive_per_thread(robot, running, counts, index):
+    """The model RobotIngest replaced: one thread per robot blocking in recv."""
+    while running.is_set():
+        if robot.receive_from_robot() and running.is_set():
+            counts[index] += 1
+
+
+def _ingest_run(model, robots, packets, duration, rate=None):
+    """Send packets[i] to robot i for duration seconds (see _blast) and measure the receiving side.
+
+    model is "selector" (RobotIngest) or "threads" (one blocking thread per robot).
+    """
+    team = []
+    for i in range(robots):
+        robot = Robot(i + 1)
+        robot.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        robot.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        robot.socket.bind(("127.0.0.1", 0))
+        robot.connected = True
+        team.append(robot)
+    addresses = [robot.socket.getsockname() for robot in team]
+
+    sent = multiprocessing.Value("q", 0)
+    sender = multiprocessing.Process(target=_blast, args=(addresses, packets, duration, sent, rate))
+    if model == "selector":
+        ingest = RobotIngest()
+        for robot in team:
+            ingest.register(robot)
+        ingest.start()
+    else:
+        running = threading.Event()
+        running.set()
+        counts = [0] * robots
+        threads = [threading.Thread(target=_receive_per_thread, args=(robot, running, counts, i), daemon=True)
+                   for i, robot in enumerate(team)]
+        for thread in threads:
+            thread.start()
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    sender.start()
+    sender.join()
+    time.sleep(0.2)  # let the receivers drain what is still queued
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    if model == "selector":
+        received = ingest.packets_received
+        ingest.close()
+    else:
+        received = sum(counts)
+        running.clear()
+        # Blocked threads only notice the stop with one more datagram each (a PONG without a valid token is ignored)
+        waker = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        for address in addresses:
+            waker.sendto(b"PONG -", address)
+        waker.close()
+        for thread in threads:
+            thread.join(1.0)
+    for robot in team:
+        robot.socket.close()
+    return {
+        "sent": sent.value, "received": received,
+        "packets_per_s": received / elapsed,
+        "cpu_us_per_packet": 1e6 * cpu / received if received else None,
+        "loss": 1 - received / sent.value if sent.value else None,
+    }
+
+
+def bench_ingest(robots=5, obstacles=20, duration=3.0, paced_rate=1000):
+    """Packets/second the selector ingest sustains, fed by a separate sender process.
+
+    The thread-per-robot receive model it replaced runs as a baseline, both
+    flat out and at a fixed paced_rate packets/second per robot; the paced
+    run compares CPU per packet at the same offered load.
+    """
+    # Robot i + 1 only accepts telemetry carrying its own id
+    packets = [telemetry.encode(i + 1, 1, 0.0, (1, 2), 0, (6, 4.5), 0.9,
+                                [(x, y, 0.8) for x, y in moving_opponents(obstacles, 0)])
+               for i in range(robots)]
+    packet = packets[0]
+    result = {"robots": robots, "obstacles": obstacles, "packet_bytes": len(packet)}
+    result.update(_ingest_run("selector", robots, packets, duration))
+    result["thread_per_robot"] = _ingest_run("threads", robots, packets, duration)
+    paced = {"rate_per_robot": paced_rate,
+             "selector": _ingest_run("selector", robots, packets, duration, paced_rate),
+             "thread_per_robot": _ingest_run("threads", robots, packets, duration, paced_rate)}
+    selector_cpu = paced["selector"]["cpu_us_per_packet"]
+    threads_cpu = paced["thread_per_robot"]["cpu_us_per_packet"]
+    if selector_cpu and threads_cpu:
+        paced["cpu_per_packet_vs_threads"] = selector_cpu / threads_cpu
+    result["paced"] = paced
+
+    for load, runs in (("flat out", (result, result["thread_per_robot"])),
+                       (f"{paced_rate}/s/robot", (paced["selector"], paced["thread_per_robot"]))):
+        for name, run in zip(("selector", "thread/robot"), runs):
+            print(f"ingest {load:>13s} {name:12s} {robots} robots, {len(packet)} B packets: "
+                  f"{run['packets_per_s']:.0f} packets/s, {run['cpu_us_per_packet'] or 0:.1f} us CPU/packet, "
+                  f"loss {100 * (run['loss'] or 0):.1f}%")
+    return result
+
+
+###############################################################################
+# Fusion cost
+###############################################################################
+def bench_fusion(robot_counts=(1, 5, 10, 20), obstacle_counts=(0, 10, 20, 50), repeat=200):
+    """GlobalWorldMap.update_from_robots cost versus robot and obstacle count."""
+    rng = random.Random(0)
+    results = []
+    for n_robots in robot_counts:
+        for n_obstacles in obstacle_counts:
+            world = GlobalWorldMap()
+            team = [Robot(i + 1) for i in range(n_robots)]
+            samples = []
+            for k in range(repeat + 20):
+                now = k / 50.0
+                truth = moving_opponents(n_obstacles, now)
+                for i, robot in enumerate(team):
+                    robot.update_state(
+                        sequence=k, last_update=now, position=(1 + i % 5, 1 + i // 5),
+                        ball_visible=True, ball_confidence=0.8,
+                        ball_position=(6 + rng.gauss(0, 0.05), 4.5 + rng.gauss(0, 0.05)),
+                        obstacles=[(x + rng.gauss(0, 0.05), y + rng.gauss(0, 0.05), 0.8) for x, y in truth])
+                start = time.perf_counter()
+                world.update_from_robots(team, now)
+                if k >= 20:
+                    samples.append((time.perf_counter() - start) * 1000.0)
+            stats = percentiles(samples)
+            stats.update({"robots": n_robots, "obstacles": n_obstacles})
+            results.append(stats)
+            print(f"fusion {n_robots:2d} robots x {n_obstacles:2d} obstacles: "
+                  f"mean {stats['mean']:.3f} ms, p99 {stats['p99']:.3f} ms")
+    return results
+
+
+###############################################################################
+# Opponent tracking
+###############################################################################
+def bench_tracker(robots=5, obstacles=20, fusion_hz=50, repeat=500):
+    """Obstacle fusion + opponent tracking per fusion tick.
+
+    Every robot reports the same `obstacles` objects with a little noise,
+    so fusion sees robots * obstacles detections per tick.
+    """
+    rng = random.Random(0)
+    fusion = ObstacleFusion()
+    tracker = OpponentTracker(max_tracks=obstacles)
+    tick = [0]
+
+    def step():
+        tick[0] += 1
+        now = tick[0] / fusion_hz
+        truth = moving_opponents(obstacles, now)
+        observations = [
+            (robot, tick[0], [(x + rng.gauss(0, 0.05), y + rng.gauss(0, 0.05), 0.8) for x, y in truth])
+            for robot in range(robots)
+        ]
+        fused = fusion.update(observations, (), now)
+        tracker.update(fused, now)
+
+    # Warm up so the tracks exist before measuring
+    for _ in range(20):
+        step()
+    mean, worst = timeit(step, repeat)
+
+    # Tracker alone on undeduplicated input (the worst case for the cost matrix)
+    tracker_only = OpponentTracker(max_tracks=robots * obstacles)
+    detections = [(x, y, 0.8) for x, y in moving_opponents(robots * obstacles, 0.0)]
+    tracker_only.update(detections, 0.0)
+    t = [0.0]
+
+    def track_step():
+        t[0] += 1.0 / fusion_hz
+        tracker_only.update(detections, t[0])
+
+    raw_mean, raw_worst = timeit(track_step, repeat)
+    budget = 1000.0 / fusion_hz
+    print(f"fusion+tracking {robots} robots x {obstacles} obstacles: "
+          f"mean {mean:.3f} ms, max {worst:.3f} ms ({100 * mean / budget:.1f}% of {budget:.0f} ms budget)")
+    print(f"tracking {robots * obstacles} raw detections: "
+          f"mean {raw_mean:.3f} ms, max {raw_worst:.3f} ms ({100 * raw_mean / budget:.1f}% of budget)")
+    return {"mean_ms": mean, "max_ms": worst, "raw_mean_ms": raw_mean, "raw_max_ms": raw_worst,
+            "budget_ms": budget}
+
+
+def bench_roles(robot_counts=(5, 8), fusion_hz=50, repeat=2000):
+    """RoleAllocator.update per fusion tick with moving robots and ball, and how often roles change."""
+    results = []
+    for count in robot_counts:
+        team = [Robot(i + 1) for i in range(count)]
+        for robot in team:
+            robot.connected = True
+        allocator = RoleAllocator()
+        tick = [0]
+        changes = [0]
+
+        def step():
+            tick[0] += 1
+            t = tick[0] / fusion_hz
+            for robot, (x, y) in zip(team, moving_opponents(count, t)):
+                robot.position = (x, y)
+            ball = (6 + 4 * math.sin(0.5 * t), 4.5 + 3 * math.cos(0.35 * t))
+            changes[0] += len(allocator.update(team, ball, t))
+
+        mean, worst = timeit(step, repeat)
+        seconds = repeat / fusion_hz
+        budget = 1000.0 / fusion_hz
+        print(f"roles {count} robots: mean {1000 * mean:.0f} us, max {1000 * worst:.0f} us "
+              f"({100 * mean / budget:.1f}% of {budget:.0f} ms budget), "
+              f"{changes[0]} role changes in {seconds:.0f} s")
+        results.append({"robots": count, "mean_ms": mean, "max_ms": worst, "changes": changes[0],
+                        "seconds": seconds})
+    return results
+
+
+###############################################################################
+# Field rendering
+###############################################################################
+def _make_ui(logic=None, fusion_hz=50, max_fps=30):
+    """A real BaseStationUI on a Tk root, or (None, None) when there is no display."""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        print(f"no display, skipping UI rendering: {e}")
+        return None, None
+    from base_station import BaseStationLogic
+    from base_station_UI import BaseStationUI
+    root.geometry("1200x800")
+    ui = BaseStationUI(root, logic or BaseStationLogic(), fusion_hz=fusion_hz, max_fps=max_fps)
+    root.update()
+    return root, ui
+
+
+def bench_draw(entity_counts=(10, 50, 200), frames=100):
+    """draw_field frame time (including Tk's idle redraw) versus number of entities."""
+    root, ui = _make_ui()
+    if root is None:
+        return {"skipped": "no display"}
+    results = []
+    for count in entity_counts:
+        ui.field_opponents = [Robot(i + 1, "Opponent", color="red") for i in range(count)]
+        ui.field_size = None
+        samples = []
+        for frame in range(frames):
+            t = frame / 30.0
+            for (x, y), opponent in zip(moving_opponents(count, t), ui.field_opponents):
+                opponent.position = (x % 12, y % 9)
+                opponent.orientation = (frame * 7) % 360
+            ui.global_world.ball_position = [6 + (frame % 40) / 10.0, 4.5]
+            start = time.perf_counter()
+            ui.draw_field()
+            root.update_idletasks()
+            samples.append((time.perf_counter() - start) * 1000.0)
+        stats = percentiles(samples[5:])
+        stats["entities"] = count
+        results.append(stats)
+        print(f"draw_field {count:3d} entities: mean {stats['mean']:.2f} ms, p99 {stats['p99']:.2f} ms")
+    root.destroy()
+    return results
+
+
+def bench_heatmap(robots=5, ticks=3000, fusion_hz=50, size=(580, 380), renders=20):
+    """Occupancy accumulation per fusion tick, and one heatmap refresh versus a rectangle per cell."""
+    grid = OccupancyGrid()
+    team = [Robot(i + 1) for i in range(robots)]
+    for robot in team:
+        robot.connected = True
+    tick = [0]
+
+    def record():
+        tick[0] += 1
+        t = tick[0] / fusion_hz
+        for robot, (x, y) in zip(team, moving_opponents(robots, t)):
+            robot.position = (x, y)
+        grid.record(t, team, (6 + 4 * math.sin(t), 4.5 + 3 * math.cos(0.7 * t)))
+
+    record_mean, record_worst = timeit(record, ticks)
+    render_mean, render_worst = timeit(lambda: grid.render_rgb(*size), renders)
+    result = {"record_mean_ms": record_mean, "record_max_ms": record_worst,
+              "render_mean_ms": render_mean, "render_max_ms": render_worst}
+    print(f"heatmap record {robots} robots + ball: mean {1000 * record_mean:.1f} us, "
+          f"max {1000 * record_worst:.1f} us per tick")
+    print(f"heatmap render {size[0]}x{size[1]}: mean {render_mean:.2f} ms (at most once per second)")
+
+    root, ui = _make_ui()
+    if root is None:
+        return result
+    ui.occupancy = grid
+    ui.show_heatmap.set(True)
+    canvas = ui.field_canvas
+
+    def refresh():
+        ui.field_drawn.pop("heatmap", None)
+        ui.draw_heatmap(canvas, size[0] + 20, size[1] + 20)
+        root.update_idletasks()
+
+    image_mean, _ = timeit(refresh, renders)
+    # The alternative: one rectangle item per occupied cell
+    cells = [(i % grid.nx, i // grid.nx) for i in range(grid.nx * grid.ny) if grid.seconds[:, i].any()]
+    sx, sy = size[0] / grid.nx, size[1] / grid.ny
+
+    def rectangles():
+        canvas.delete("cells")
+        for ix, iy in cells:
+            canvas.create_rectangle(10 + ix * sx, 10 + iy * sy, 10 + (ix + 1) * sx, 10 + (iy + 1) * sy,
+                                    fill="orange", outline="", tags="cells")
+        root.update_idletasks()
+
+    rect_mean, _ = timeit(rectangles, max(renders // 4, 1))
+    canvas.delete("cells")
+    root.destroy()
+    print(f"heatmap image refresh mean {image_mean:.2f} ms vs {len(cells)} rectangles {rect_mean:.2f} ms")
+    result.update({"image_refresh_ms": image_mean, "rectangles_ms": rect_mean, "cells": len(cells)})
+    return result
+
+
+###############################################################################
+# Startup
+###############################################################################
+_STARTUP_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+import base_station_UI
+result = {"import_ms": 1000 * (time.perf_counter() - started), "pil_imported": "PIL" in sys.modules}
+try:
+    import tkinter as tk
+    root = tk.Tk()
+except Exception:
+    root = None
+if root is not None:
+    from base_station import BaseStationLogic
+    ui = base_station_UI.BaseStationUI(root, BaseStationLogic(), started=started)
+    root.update()
+    ui.redraw_field()
+    result["first_frame_ms"] = 1000 * ui.time_to_first_frame
+    result["image_cache_misses"] = ui.assets.misses
+    root.destroy()
+print(json.dumps(result))
+"""
+
+
+def bench_startup(runs=3):
+    """Import time and time to first frame of a fresh interpreter (first run may fill the image cache)."""
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", _STARTUP_SNIPPET], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        if out.returncode != 0:
+            return {"error": out.stderr.strip().splitlines()[-1:]}
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    for result in results:
+        first = result.get("first_frame_ms")
+        print(f"startup: import {result['import_ms']:.0f} ms, first frame "
+              f"{'-' if first is None else f'{first:.0f}'} ms, PIL imported: {result['pil_imported']}")
+    return results
+
+
+###############################################################################
+# End to end latency
+###############################################################################
+def _run_sim(count, rate, port, duration):
+    from base_station_sim import FleetSimulator
+    sim = FleetSimulator(count, rate, port, obstacles=20)
+    try:
+        sim.run(duration, status_interval=duration + 1)
+    finally:
+        sim.close()
+
+
+def bench_latency(robots=5, rate=60, duration=5.0, fusion_hz=50, max_fps=30, port=21001):
+    """Time from a telemetry packet's arrival until its data is fused, and drawn when Tk is available.
+
+    Each packet is counted once, the first time a fused (or drawn) frame
+    includes it; Robot.last_update holds its arrival time.
+    """
+    from base_station import BaseStationLogic
+    from base_station_events import EventBus
+
+    sim = multiprocessing.Process(target=_run_sim, args=(robots, rate, port, duration + 2))
+    sim.start()
+    time.sleep(0.3)
+
+    logic = BaseStationLogic(EventBus(), team_size=max(robots, 5))
+    for i, robot in enumerate(logic.robots[:robots]):
+        robot.robot_ip = "127.0.0.1"
+        robot.robot_port = port + i
+    logic.connect_to_robots()
+
+    fused_samples = []
+    drawn_samples = []
+    fused_seen = {}
+    drawn_seen = {}
+    fuse = logic.update_world_state
+
+    def sample(seen, samples):
+        now = time.monotonic()
+        for robot in logic.robots[:robots]:
+            state = robot.state
+            if state.last_update is not None and seen.get(robot) != state.sequence:
+                seen[robot] = state.sequence
+                samples.append((now - state.last_update) * 1000.0)
+
+    def measured_fuse():
+        changed = fuse()
+        if changed:
+            sample(fused_seen, fused_samples)
+        return changed
+
+    logic.update_world_state = measured_fuse
+    root, ui = _make_ui(logic, fusion_hz, max_fps)
+    try:
+        if ui is not None:
+            draw = ui.scheduler.render
+
+            def measured_render():
+                draw()
+                root.update_idletasks()
+                sample(drawn_seen, drawn_samples)
+
+            ui.scheduler.render = measured_render
+            ui.scheduler.start()
+            root.after(int(duration * 1000), root.quit)
+            root.mainloop()
+            ui.scheduler.stop()
+            root.destroy()
+        else:
+            threading.Timer(duration, logic.stop).start()
+            logic.run_headless(fusion_hz=fusion_hz, status_interval=duration + 1)
+    finally:
+        logic.disconnect_from_robots()
+        sim.join()
+
+    result = {"robots": robots, "rate_hz": rate, "fusion_hz": fusion_hz, "max_fps": max_fps,
+              "arrival_to_fused_ms": percentiles(fused_samples),
+              "arrival_to_drawn_ms": percentiles(drawn_samples) if ui is not None else None}
+    fused = result["arrival_to_fused_ms"]
+    print(f"latency arrival->fused: p50 {fused.get('p50', 0):.2f} ms, p99 {fused.get('p99', 0):.2f} ms "
+          f"({fused['count']} packets)")
+    if ui is not None:
+        drawn = result["arrival_to_drawn_ms"]
+        print(f"latency arrival->drawn: p50 {drawn.get('p50', 0):.2f} ms, p99 {drawn.get('p99', 0):.2f} ms")
+    return result
+
+
+###############################################################################
+# Latency compensation
+###############################################################################
+def _fused_ball_error(mode, robots, ball_speed, ticks, fusion_hz, seed):
+    """Mean fused ball error (m) on a synthetic match; see bench_clock for the modes."""
+    rng = random.Random(seed)
+    team = [Robot(i + 1) for i in range(robots)]
+    offsets = [rng.uniform(-5.0, 5.0) for _ in team]
+    latencies = [rng.uniform(0.01, 0.08) for _ in team]
+    if mode == "synced":
+        for robot, offset in zip(team, offsets):
+            robot.clock.on_pong(0.0, offset + 0.0005, 0.001)
+    world = GlobalWorldMap()
+    # Ball swinging along the field's long axis at up to ball_speed m/s
+    omega = ball_speed / 4.0
+
+    def truth(t):
+        return 6.0 + 4.0 * math.sin(omega * t), 4.5
+
+    errors = []
+    for k in range(ticks):
+        now = k / fusion_hz
+        for robot, offset, latency in zip(team, offsets, latencies):
+            # Captured latency plus up to one camera frame before now
+            captured = now - latency - rng.uniform(0.0, 1.0 / 60)
+            bx, by = truth(captured)
+            arrival = now if mode == "unaligned" else captured + 0.9 * latency
+            robot.state = telemetry.INITIAL_STATE._replace(
+                sequence=k + 1, timestamp=captured + offset, last_update=arrival, position=(bx - 1.0, by),
+                ball_visible=True, ball_position=(bx + rng.gauss(0.0, 0.02), by), ball_confidence=0.9)
+        world.update_from_robots(team, now)
+        if k >= ticks // 5:
+            errors.append(abs(world.ball_position[0] - truth(now)[0]))
+    return sum(errors) / len(errors)
+
+
+def bench_clock(robots=5, ball_speed=3.0, ticks=500, fusion_hz=50, seed=0):
+    """Fused ball error with and without latency compensation, on identical synthetic telemetry.
+
+    Robots see a ball moving at up to ball_speed m/s with 10-80 ms of
+    per-robot latency and clocks offset by up to 5 s. "unaligned" treats
+    every observation as taken at the fusion tick (no compensation),
+    "arrival" extrapolates from the arrival time (clocks not synced yet),
+    "synced" from the capture time mapped through each robot's ClockSync.
+    """
+    result = {"robots": robots, "ball_speed": ball_speed}
+    for mode in ("unaligned", "arrival", "synced"):
+        result[f"{mode}_error_m"] = _fused_ball_error(mode, robots, ball_speed, ticks, fusion_hz, seed)
+    print(f"fused ball error, {robots} robots, {ball_speed:.0f} m/s ball: "
+          f"unaligned {result['unaligned_error_m']:.3f} m, arrival-stamped {result['arrival_error_m']:.3f} m, "
+          f"clock-synced {result['synced_error_m']:.3f} m")
+    return result
+
+
+###############################################################################
+# RefBox uplink
+###############################################################################
+def bench_uplink(robots=5, opponents=5, rate=10.0, duration=2.0, repeat=2000):
+    """World state serialization cost, and whether the uplink holds its rate when the RefBox stops reading."""
+    from base_station import BaseStationLogic
+    logic = BaseStationLogic(team_size=max(robots, opponents, 5), uplink_hz=0)
+    for robot in logic.robots[:robots]:
+        robot.connected = True
+    serializer = WorldStateSerializer("Era")
+    tracker = logic.global_world.opponent_tracker
+    tick = [0]
+
+    def moved():
+        tick[0] += 1
+        positions = moving_opponents(robots + opponents, tick[0] / rate)
+        for robot, (x, y) in zip(logic.robots, positions[:robots]):
+            robot.update_state(position=(x, y), orientation=tick[0] % 360, velocity=(0.5, -0.5))
+        # What the tracker publishes for confirmed opponents after a fusion tick
+        tracker.snapshot = tuple((i + 1, x, y, 0.5, -0.5, 0.9) for i, (x, y) in enumerate(positions[robots:]))
+        serializer.serialize(logic.global_world, logic.robots, "", 5)
+
+    def unchanged():
+        serializer.serialize(logic.global_world, logic.robots, "", 5)
+
+    moved_mean, moved_worst = timeit(moved, repeat)
+    same_mean, same_worst = timeit(unchanged, repeat)
+    size = len(serializer.buffer)
+
+    # A peer that never reads: the send buffer fills and frames must be dropped, not queued
+    ours, theirs = socket.socketpair()
+    ours.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    uplink = WorldStateUplink(logic, rate=rate)
+    start = time.process_time()
+    uplink.start(ours)
+    time.sleep(duration)
+    stop_started = time.perf_counter()
+    uplink.stop()
+    stop_ms = 1000 * (time.perf_counter() - stop_started)
+    cpu = 100 * (time.process_time() - start) / duration
+    ours.close()
+    theirs.close()
+    ticks = uplink.frames_sent + uplink.frames_dropped
+
+    print(f"serialize {robots} robots + {opponents} opponents ({size} bytes): "
+          f"all moved mean {moved_mean:.3f} ms, unchanged mean {same_mean:.3f} ms")
+    print(f"stalled RefBox for {duration:.0f} s at {rate:.0f} Hz: {ticks} ticks, {uplink.frames_sent} sent, "
+          f"{uplink.frames_dropped} dropped, stop {stop_ms:.1f} ms, {cpu:.1f}% CPU")
+    return {"moved_mean_ms": moved_mean, "moved_max_ms": moved_worst, "unchanged_mean_ms": same_mean,
+            "unchanged_max_ms": same_worst, "bytes": size, "stalled_ticks": ticks,
+            "stalled_sent": uplink.frames_sent, "stalled_dropped": uplink.frames_dropped,
+            "stop_ms": stop_ms, "cpu_percent": cpu}
+
+
+###############################################################################
+# Runner
+###############################################################################
+BENCHMARKS = {
+    "ingest": bench_ingest,
+    "fusion": bench_fusion,
+    "tracker": bench_tracker,
+    "draw": bench_draw,
+    "startup": bench_startup,
+    "latency": bench_latency,
+    "clock": bench_clock,
+    "uplink": bench_uplink,
+    "heatmap": bench_heatmap,
+    "roles": bench_roles,
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Base station performance benchmarks")
+    parser.add_argument("benchmarks", nargs="*", metavar="NAME",
+                        help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--output", default="bench_results.json", help="machine-readable results file")
+    args = parser.parse_args()
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = {}
+    for name in args.benchmarks or BENCHMARKS:
+        results[name] = BENCHMARKS[name]()
+    report = {
+        "revision": git_revision(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
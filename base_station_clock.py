@@ -0,0 +1,86 @@
+from collections import deque
+
+# Largest believable drift between two crystal clocks (1000 ppm)
+MAX_DRIFT = 1e-3
+
+
+class ClockSync:
+    """Offset and drift of one robot's clock relative to our time.monotonic().
+
+    The robot answers PING <token> with PONG <token> <robot time>. Assuming
+    the two legs take equally long, each exchange measures
+
+        offset = robot time - (sent + received) / 2
+
+    with an error of at most half the round trip. Of the last `window`
+    exchanges, the `best` fraction with the shortest round trips is fitted
+    with a line over local time; its slope is the drift. Estimates are
+    published as one immutable tuple, so fusion calls to_local() without a
+    lock while the ingest thread adds samples.
+    """
+
+    def __init__(self, window=32, best=0.5, min_span=5.0):
+        self.window = window
+        self.best = best
+        # Drift is only fitted once the samples cover this many seconds
+        self.min_span = min_span
+        self.reset()
+
+    def reset(self):
+        self.samples = deque(maxlen=self.window)
+        # (reference local time, offset at the reference in seconds, drift in s/s)
+        self.estimate = None
+        self.error = None  # seconds, half the shortest round trip in the window
+
+    @property
+    def synced(self):
+        return self.estimate is not None
+
+    @property
+    def offset(self):
+        estimate = self.estimate
+        return None if estimate is None else estimate[1]
+
+    @property
+    def drift(self):
+        estimate = self.estimate
+        return None if estimate is None else estimate[2]
+
+    def on_pong(self, sent, robot_time, received):
+        """Add one PING/PONG exchange: our send and receive times and the robot's reply time."""
+        rtt = received - sent
+        if rtt < 0:
+            return
+        midpoint = sent + rtt / 2.0
+        self.samples.append((midpoint, robot_time - midpoint, rtt))
+        self._fit()
+
+    def _fit(self):
+        samples = sorted(self.samples, key=lambda sample: sample[2])
+        samples = samples[:max(1, int(len(samples) * self.best))]
+        n = len(samples)
+        mean_t = sum(sample[0] for sample in samples) / n
+        mean_offset = sum(sample[1] for sample in samples) / n
+        drift = 0.0
+        times = [sample[0] for sample in samples]
+        if n >= 3 and max(times) - min(times) >= self.min_span:
+            stt = sum((sample[0] - mean_t) ** 2 for sample in samples)
+            sto = sum((sample[0] - mean_t) * (sample[1] - mean_offset) for sample in samples)
+            drift = min(max(sto / stt, -MAX_DRIFT), MAX_DRIFT)
+        self.error = samples[0][2] / 2.0
+        self.estimate = (mean_t, mean_offset, drift)
+
+    def to_local(self, robot_time):
+        """Our monotonic time at the robot timestamp robot_time, or None before the first PONG."""
+        estimate = self.estimate
+        if estimate is None or robot_time is None:
+            return None
+        reference, offset, drift = estimate
+        # robot_time = t + offset + drift * (t - reference), solved for t
+        return (robot_time - offset + drift * reference) / (1.0 + drift)
+
+    def summary(self):
+        if self.estimate is None:
+            return "clock not synced"
+        _, offset, drift = self.estimate
+        return f"clock {offset:+.4f} s  drift {1e6 * drift:+.0f} ppm  ±{1000 * self.error:.1f} ms"
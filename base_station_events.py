@@ -0,0 +1,59 @@
+import queue
+import threading
+
+# Topics published by BaseStationLogic
+WORLD_UPDATED = "world_updated"        # world=GlobalWorldMap
+ROBOT_STATUS = "robot_status"          # robot=Robot, connected=bool
+REFBOX_STATUS = "refbox_status"        # connected=bool
+REFBOX_MESSAGE = "refbox_message"      # command=RefBoxCommand
+LOG = "log"                            # msg=str, level=str
+LINK_STATS = "link_stats"              # robots=list of Robot, see Robot.link
+ROLES = "roles"                        # roles={Robot: role} after any role changed
+
+
+class EventBus:
+    """Thread-safe publish/subscribe between the logic core and its front ends.
+
+    publish() can be called from any thread and only enqueues the event.
+    Subscribers run when the consuming thread calls dispatch(), e.g. the Tk
+    thread once per frame or the headless main loop, so callbacks never run
+    on the ingest or RefBox threads.
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic, callback):
+        with self._lock:
+            # Copy on write so dispatch() can iterate without holding the lock
+            callbacks = list(self.subscribers.get(topic, ()))
+            callbacks.append(callback)
+            self.subscribers[topic] = callbacks
+
+    def unsubscribe(self, topic, callback):
+        with self._lock:
+            callbacks = [c for c in self.subscribers.get(topic, ()) if c != callback]
+            self.subscribers[topic] = callbacks
+
+    def publish(self, topic, **payload):
+        if self.subscribers.get(topic):
+            self.queue.put((topic, payload))
+
+    def dispatch(self, max_events=10000):
+        """Deliver queued events on the calling thread. Returns the number delivered."""
+        delivered = 0
+        get = self.queue.get_nowait
+        while delivered < max_events:
+            try:
+                topic, payload = get()
+            except queue.Empty:
+                break
+            for callback in self.subscribers.get(topic, ()):
+                try:
+                    callback(**payload)
+                except Exception as e:
+                    print(f"Error in {topic} subscriber {callback}: {e}")
+            delivered += 1
+        return delivered
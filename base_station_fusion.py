@@ -0,0 +1,319 @@
+import math
+import time
+
+import numpy as np
+
+
+class BallFilter:
+    """Constant-velocity Kalman filter for the global ball estimate.
+
+    State is [x, y, vx, vy] in field meters. Each fusion tick the robot
+    observations are combined into one measurement, weighted by robot
+    confidence and distance to the ball, and then used in a single update.
+
+    A measurement outside the Mahalanobis gate is dropped as an outlier.
+    When measurements keep disagreeing with the prediction (beyond
+    maneuver_gate for reinit_after ticks in a row), or several robots agree
+    on one outside the gate, the ball really changed course, typically a
+    kick from rest: the filter restarts from the measurement with a wide
+    velocity uncertainty and picks up the new speed within a few ticks.
+    """
+
+    def __init__(self, position=(6, 4.5), accel_noise=4.0, base_sigma=0.05,
+                 distance_sigma=0.03, stale_after=0.3, lost_after=1.0, gate=13.8,
+                 maneuver_gate=9.21, reinit_after=3, agree_radius=0.3, restart_velocity_variance=25.0):
+        # Process noise: white acceleration with this variance (m/s^2)^2
+        self.accel_noise = accel_noise
+        # Measurement std dev for a fully confident observation at 0 m, growing with distance
+        self.base_sigma = base_sigma
+        self.distance_sigma = distance_sigma
+        # Observations older than stale_after seconds are ignored
+        self.stale_after = stale_after
+        # Without observations for lost_after seconds the ball stops being extrapolated
+        self.lost_after = lost_after
+        # Mahalanobis gate (chi-square, 2 dof, 99.9%) for rejecting outliers
+        self.gate = gate
+        # Restart after reinit_after ticks in a row beyond maneuver_gate (chi-square, 99%),
+        # or at once when a gated measurement comes from two or more robots whose
+        # observations all lie within agree_radius meters of their combination
+        self.maneuver_gate = maneuver_gate
+        self.reinit_after = reinit_after
+        self.agree_radius = agree_radius
+        # Velocity variance after a restart ((m/s)^2): the new speed is unknown
+        self.restart_velocity_variance = restart_velocity_variance
+        self.disagreed = 0  # consecutive ticks beyond maneuver_gate
+
+        self.x = np.array([position[0], position[1], 0.0, 0.0])
+        self.P = np.diag([25.0, 25.0, 4.0, 4.0])
+        self.t = None
+        self.last_observed = None
+        self.initialized = False
+        # Per-robot sequence of the last telemetry packet already fused, so the
+        # same observation is not counted twice when fusion outruns telemetry
+        self._consumed = {}
+
+        self._F = np.eye(4)
+        self._Q = np.zeros((4, 4))
+        self._H = np.array([[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0]])
+
+    @property
+    def position(self):
+        return (float(self.x[0]), float(self.x[1]))
+
+    @property
+    def velocity(self):
+        return (float(self.x[2]), float(self.x[3]))
+
+    def predict_position(self, dt):
+        """Where the ball will be dt seconds after the last fusion tick."""
+        return (float(self.x[0] + self.x[2] * dt), float(self.x[1] + self.x[3] * dt))
+
+    def predict(self, now):
+        if self.t is None:
+            self.t = now
+            return
+        dt = now - self.t
+        self.t = now
+        if dt <= 0:
+            return
+        if self.last_observed is not None and now - self.last_observed > self.lost_after:
+            # Ball lost: stop extrapolating and let the uncertainty grow
+            self.x[2:] = 0.0
+        F = self._F
+        F[0, 2] = F[1, 3] = dt
+        q = self.accel_noise
+        dt2 = dt * dt
+        Q = self._Q
+        Q[0, 0] = Q[1, 1] = q * dt2 * dt2 / 4
+        Q[0, 2] = Q[2, 0] = Q[1, 3] = Q[3, 1] = q * dt2 * dt / 2
+        Q[2, 2] = Q[3, 3] = q * dt2
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + Q
+
+    def collect(self, observations, now):
+        """Select fresh ball observations as (positions Nx2, variances N), all aligned to now.
+
+        observations are (source, sequence, stamp, ball_position, robot_position,
+        confidence) tuples, one per robot that currently sees the ball, where
+        stamp is when the robot captured the frame on our clock. While the ball
+        is tracked each observation is moved forward to now along the predicted
+        velocity, and its variance grows with the velocity uncertainty.
+        """
+        points = []
+        variances = []
+        tracking = (self.initialized and self.last_observed is not None
+                    and now - self.last_observed <= self.lost_after)
+        vx, vy = self.x[2], self.x[3]
+        velocity_variance = (self.P[2, 2] + self.P[3, 3]) / 2.0
+        for source, sequence, stamp, ball_position, robot_position, confidence in observations:
+            if stamp is None or now - stamp > self.stale_after:
+                continue
+            if self._consumed.get(source) == sequence:
+                continue
+            self._consumed[source] = sequence
+            bx, by = ball_position
+            rx, ry = robot_position
+            distance = math.hypot(bx - rx, by - ry)
+            sigma = (self.base_sigma + self.distance_sigma * distance) / max(confidence, 1e-3)
+            variance = sigma * sigma
+            age = max(now - stamp, 0.0)
+            if tracking and age > 0:
+                bx += vx * age
+                by += vy * age
+                variance += velocity_variance * age * age
+            points.append((bx, by))
+            variances.append(variance)
+        return np.array(points, dtype=float).reshape(-1, 2), np.array(variances, dtype=float)
+
+    def update(self, observations, now=None):
+        if now is None:
+            now = time.monotonic()
+        self.predict(now)
+        points, variances = self.collect(observations, now)
+        if len(points) == 0:
+            return False
+
+        # Inverse-variance weighted combination of all observations
+        weights = 1.0 / variances
+        z = weights @ points / weights.sum()
+        r = 1.0 / weights.sum()
+
+        if not self.initialized:
+            self._restart(z, r, now, 4.0)
+            return True
+
+        H = self._H
+        S = H @ self.P @ H.T + np.eye(2) * r
+        innovation = z - H @ self.x
+        S_inv = np.linalg.inv(S)
+        distance = innovation @ S_inv @ innovation
+        if (distance > self.maneuver_gate and self.last_observed is not None
+                and now - self.last_observed <= self.lost_after):
+            self.disagreed += 1
+            outlier = distance > self.gate
+            if outlier:
+                spread = np.hypot(points[:, 0] - z[0], points[:, 1] - z[1]).max()
+                agreed = len(points) >= 2 and spread <= self.agree_radius
+            if self.disagreed >= self.reinit_after or (outlier and agreed):
+                self._restart(z, r, now, self.restart_velocity_variance)
+                return True
+            if outlier:
+                return False
+        else:
+            self.disagreed = 0
+        K = self.P @ H.T @ S_inv
+        self.x = self.x + K @ innovation
+        self.P = (np.eye(4) - K @ H) @ self.P
+        self.last_observed = now
+        return True
+
+    def _restart(self, z, r, now, velocity_variance):
+        """Start over at measurement z (variance r) with an unknown velocity."""
+        self.x[:2] = z
+        self.x[2:] = 0.0
+        self.P = np.diag([r, r, velocity_variance, velocity_variance])
+        self.initialized = True
+        self.disagreed = 0
+        self.last_observed = now
+
+
+class ObstacleFusion:
+    """Merges obstacle detections from all robots into one deduplicated set.
+
+    Fused obstacles are kept as arrays across ticks. A detection joins the
+    nearest fused obstacle within merge_radius, otherwise it starts a new
+    one. A robot sees an obstacle at most once, so only its closest
+    detection joins a given obstacle and the others start their own (two
+    opponents side by side are not merged for good). Obstacles that are not
+    seen again fade out and are dropped after max_age seconds. Detections
+    further than field_margin outside the field are clutter (people, goals,
+    boards) and are ignored.
+    """
+
+    def __init__(self, merge_radius=0.5, max_age=0.5, teammate_radius=0.35,
+                 field_dimensions=(12, 9), field_margin=0.3):
+        self.merge_radius = merge_radius
+        self.max_age = max_age
+        # Detections this close to one of our own robots are the robot itself
+        self.teammate_radius = teammate_radius
+        self.field_dimensions = field_dimensions
+        self.field_margin = field_margin
+        self.obstacles = []
+        # Fused state: positions (n, 2), confidences and last time seen
+        self._position = np.empty((0, 2))
+        self._confidence = np.empty(0)
+        self._last_seen = np.empty(0)
+        self._consumed = {}
+
+    def _detections(self, observations, teammates):
+        """The new, plausible detections of this tick as an (n, 3) array of x, y,
+        confidence and the index of the robot that made each of them."""
+        batches = []
+        for source, sequence, detections in observations:
+            if self._consumed.get(source) == sequence:
+                continue
+            self._consumed[source] = sequence
+            if not len(detections):
+                continue
+            try:
+                batch = np.asarray(detections, dtype=float)
+            except ValueError:
+                # Mixed (x, y) and (x, y, confidence) tuples
+                batch = np.array([(d[0], d[1], d[2] if len(d) > 2 else 1.0) for d in detections])
+            if batch.shape[1] == 2:
+                batch = np.column_stack((batch, np.ones(len(batch))))
+            batches.append(batch[:, :3])
+        if not batches:
+            return np.empty((0, 3)), np.empty(0, dtype=int)
+        detections = np.concatenate(batches)
+        sources = np.repeat(np.arange(len(batches)), [len(batch) for batch in batches])
+
+        margin = self.field_margin
+        x, y = detections[:, 0], detections[:, 1]
+        keep = ((x >= -margin) & (x <= self.field_dimensions[0] + margin)
+                & (y >= -margin) & (y <= self.field_dimensions[1] + margin))
+        teammates = np.asarray(teammates, dtype=float).reshape(-1, 2)
+        if len(teammates):
+            d2 = (x[:, None] - teammates[:, 0]) ** 2 + (y[:, None] - teammates[:, 1]) ** 2
+            keep &= d2.min(axis=1) >= self.teammate_radius * self.teammate_radius
+        return detections[keep], sources[keep]
+
+    def _assign(self, detections, sources, position):
+        """Indices of the detections that join an obstacle and of the obstacle they join,
+        at most one detection per robot and obstacle."""
+        d2 = ((detections[:, None, 0] - position[:, 0]) ** 2
+              + (detections[:, None, 1] - position[:, 1]) ** 2)
+        nearest = d2.argmin(axis=1)
+        best = d2[np.arange(len(detections)), nearest]
+        order = np.argsort(best)
+        order = order[best[order] <= self.merge_radius * self.merge_radius]
+        # First occurrence in distance order is the closest detection of a robot for each obstacle
+        _, first = np.unique(sources[order] * len(position) + nearest[order], return_index=True)
+        joined = order[first]
+        return joined, nearest[joined]
+
+    def update(self, observations, teammates=(), now=None):
+        """Fuse one tick of detections.
+
+        observations are (source, sequence, obstacles) tuples, one per robot;
+        obstacles is that robot's list of (x, y[, confidence]) detections.
+        teammates are positions of our own robots. Returns the fused
+        obstacles as a list of (x, y, confidence) tuples.
+        """
+        if now is None:
+            now = time.monotonic()
+        detections, sources = self._detections(observations, teammates)
+        x, y, confidence = detections.T
+        # A zero confidence detection still places an obstacle nobody else sees
+        weight = np.maximum(confidence, 1e-9)
+        weighted = np.column_stack((x * weight, y * weight, weight))
+        miss = 1.0 - confidence
+
+        # The detections of this tick replace the estimate of every obstacle they hit
+        position = self._position.copy()
+        confidence = self._confidence.copy()
+        last_seen = self._last_seen.copy()
+        rest = np.ones(len(detections), dtype=bool)
+        if len(position) and len(detections):
+            joined, target = self._assign(detections, sources, position)
+            rest[joined] = False
+            hit = np.unique(target)
+            sums = np.zeros((len(position), 3))
+            np.add.at(sums, target, weighted[joined])
+            product = np.ones(len(position))
+            np.multiply.at(product, target, miss[joined])
+            position[hit] = sums[hit, :2] / sums[hit, 2:]
+            confidence[hit] = 1.0 - product[hit]
+            last_seen[hit] = now
+
+        # The rest start new obstacles, merged robot by robot as one robot's detections are distinct
+        created = np.empty((0, 2))
+        sums = np.empty((0, 3))
+        product = np.empty(0)
+        rest = np.flatnonzero(rest)
+        for source in np.unique(sources[rest]):
+            batch = rest[sources[rest] == source]
+            new = np.ones(len(batch), dtype=bool)
+            if len(created):
+                joined, target = self._assign(detections[batch], sources[batch], created)
+                new[joined] = False
+                sums[target] += weighted[batch[joined]]
+                product[target] *= miss[batch[joined]]
+                created[target] = sums[target, :2] / sums[target, 2:]
+            created = np.concatenate((created, detections[batch[new], :2]))
+            sums = np.concatenate((sums, weighted[batch[new]]))
+            product = np.concatenate((product, miss[batch[new]]))
+        if len(created):
+            position = np.concatenate((position, created))
+            confidence = np.concatenate((confidence, 1.0 - product))
+            last_seen = np.concatenate((last_seen, np.full(len(created), now)))
+
+        age = now - last_seen
+        alive = age <= self.max_age
+        self._position = position[alive]
+        self._confidence = confidence[alive]
+        self._last_seen = last_seen[alive]
+        fade = 1.0 - age[alive] / self.max_age
+        self.obstacles = list(zip(self._position[:, 0].tolist(), self._position[:, 1].tolist(),
+                                  (self._confidence * fade).tolist()))
+        return self.obstacles
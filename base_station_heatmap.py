@@ -0,0 +1,80 @@
+import numpy as np
+
+# Field colour under the heatmap and the colours of fully occupied cells
+FIELD_RGB = (0, 128, 0)
+ROBOTS_RGB = (40, 90, 255)
+BALL_RGB = (255, 150, 0)
+
+ROBOTS = 0
+BALL = 1
+
+
+class OccupancyGrid:
+    """Time spent by our robots and by the ball in each cell of the field.
+
+    Two channels (ROBOTS, BALL) of cell_size cells over the field. Every
+    fusion tick record() bins all positions at once and adds the seconds
+    since the previous tick, so a cell holds how long it was occupied.
+    render_rgb() turns the grid into pixels for a Tk PhotoImage; it is
+    meant to be called at a low rate, not every frame.
+    """
+
+    def __init__(self, field_dimensions=(12, 9), cell_size=0.1, max_gap=0.5):
+        self.field_dimensions = field_dimensions
+        self.cell_size = cell_size
+        self.nx = int(np.ceil(field_dimensions[0] / cell_size))
+        self.ny = int(np.ceil(field_dimensions[1] / cell_size))
+        # A gap longer than this between ticks (a pause) counts as max_gap
+        self.max_gap = max_gap
+        self.seconds = np.zeros((2, self.ny * self.nx))
+        self.version = 0  # bumped on every change, so renderers know when to refresh
+        self._last = None
+
+    def clear(self):
+        self.seconds.fill(0.0)
+        self._last = None
+        self.version += 1
+
+    def add(self, channel, points, dt):
+        """Add dt seconds to the cells under points (an (n, 2) array of field positions)."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        ix = np.floor(points[:, 0] / self.cell_size).astype(int)
+        iy = np.floor(points[:, 1] / self.cell_size).astype(int)
+        inside = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+        cells = iy[inside] * self.nx + ix[inside]
+        # Unbuffered, so two robots in the same cell both count
+        np.add.at(self.seconds[channel], cells, dt)
+        self.version += 1
+
+    def record(self, now, robots, ball=None):
+        """Account for one fusion tick: connected robots with a known position, and the
+        ball position if the ball is currently tracked."""
+        last, self._last = self._last, now
+        if last is None or now <= last:
+            return
+        dt = min(now - last, self.max_gap)
+        positions = [robot.state.position for robot in robots
+                     if robot.connected and robot.state.position is not None]
+        if positions:
+            self.add(ROBOTS, positions, dt)
+        if ball is not None:
+            self.add(BALL, ball, dt)
+
+    def render_rgb(self, width, height):
+        """The grid as width x height RGB bytes, blended over the field colour.
+
+        Intensity is log-scaled per channel against its busiest cell, so short
+        visits stay visible next to places a robot stood for minutes.
+        """
+        grid = np.log1p(self.seconds)
+        peak = grid.max(axis=1, keepdims=True)
+        grid = np.divide(grid, peak, out=np.zeros_like(grid), where=peak > 0)
+        field = np.array(FIELD_RGB, dtype=float)
+        rgb = (field
+               + grid[ROBOTS, :, None] * (np.array(ROBOTS_RGB) - field)
+               + grid[BALL, :, None] * (np.array(BALL_RGB) - field))
+        rgb = np.clip(rgb, 0, 255).astype(np.uint8).reshape(self.ny, self.nx, 3)
+        # Nearest-neighbour scale to the canvas size
+        rows = np.arange(height) * self.ny // max(height, 1)
+        cols = np.arange(width) * self.nx // max(width, 1)
+        return rgb[rows][:, cols].tobytes()
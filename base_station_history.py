@@ -0,0 +1,105 @@
+import numpy as np
+
+
+class TrajectoryBuffer:
+    """Fixed-size ring buffer of (t, x, y) samples of one entity.
+
+    Every sample is written twice, at i and i + capacity, so the newest n
+    samples always form one contiguous slice: append() is O(1) and window()
+    and since() return views into the buffer without copying. A view is only
+    valid until later appends wrap around over it.
+
+    Samples must arrive in time order: a slightly older one (a reordered
+    packet) is dropped, one more than restart_gap seconds older (a restarted
+    clock) starts the trajectory over.
+    """
+
+    def __init__(self, capacity=256, restart_gap=1.0):
+        self.capacity = capacity
+        self.restart_gap = restart_gap
+        self.data = np.zeros((2 * capacity, 3))
+        self.count = 0  # samples appended since the last clear()
+        self.last = None  # newest (t, x, y), kept as floats for the per-packet fast path
+        self._next = 0
+
+    def clear(self):
+        self.count = 0
+        self.last = None
+        self._next = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, t, x, y):
+        if self.last is not None and t < self.last[0]:
+            if self.last[0] - t < self.restart_gap:
+                return
+            self.clear()
+        i = self._next
+        data = self.data
+        data[i, 0] = data[i + self.capacity, 0] = t
+        data[i, 1] = data[i + self.capacity, 1] = x
+        data[i, 2] = data[i + self.capacity, 2] = y
+        self._next = i + 1 if i + 1 < self.capacity else 0
+        self.count += 1
+        self.last = (t, x, y)
+
+    def window(self, n=None):
+        """View of the newest n samples (all by default), oldest first, as an (n, 3) array of t, x, y."""
+        size = len(self)
+        if n is None or n > size:
+            n = size
+        end = self._next + self.capacity
+        return self.data[end - n:end]
+
+    def since(self, t):
+        """View of the samples taken at or after time t."""
+        samples = self.window()
+        return samples[np.searchsorted(samples[:, 0], t):]
+
+    def velocity(self, lag=8):
+        """Mean (vx, vy) over the last lag sample intervals; (0, 0) with fewer than two samples.
+
+        Equivalent to averaging the lag newest finite differences, at the cost
+        of reading a single row.
+        """
+        lag = min(lag, len(self) - 1)
+        if lag < 1:
+            return (0.0, 0.0)
+        t1, x1, y1 = self.last
+        t0, x0, y0 = self.data[self._next + self.capacity - 1 - lag].tolist()
+        if t1 <= t0:
+            return (0.0, 0.0)
+        return ((x1 - x0) / (t1 - t0), (y1 - y0) / (t1 - t0))
+
+
+class TrajectoryHistory:
+    """Recent trajectories of the ball and of every robot, recorded once per fusion tick."""
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.ball = TrajectoryBuffer(capacity)
+        self.robots = {}
+        self.time = None  # time of the latest record()
+
+    def clear(self):
+        self.ball.clear()
+        for trajectory in self.robots.values():
+            trajectory.clear()
+        self.time = None
+
+    def trajectory(self, robot):
+        trajectory = self.robots.get(robot)
+        if trajectory is None:
+            trajectory = self.robots[robot] = TrajectoryBuffer(self.capacity)
+        return trajectory
+
+    def record(self, now, world, robots):
+        """Append the fused ball and the current position of every known robot."""
+        bx, by = world.ball_position
+        self.ball.append(now, bx, by)
+        for robot in robots:
+            position = robot.state.position
+            if position is not None:
+                self.trajectory(robot).append(now, position[0], position[1])
+        self.time = now
@@ -0,0 +1,92 @@
+import selectors
+import socket
+import threading
+
+
+class RobotIngest:
+    """Single selector loop that services every robot socket.
+
+    Replaces the old one-thread-per-robot model: all UDP sockets are
+    registered with one selector and each readable socket is dispatched to
+    its Robot, so the whole team costs one thread and stop() is immediate.
+    """
+
+    def __init__(self, poll_timeout=0.5):
+        self.poll_timeout = poll_timeout
+        self.selector = selectors.DefaultSelector()
+        self.thread = None
+        self.running = False
+        self.packets_received = 0
+        # Self-pipe so stop() and register() wake the loop without waiting for the poll timeout
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
+        self.selector.register(self._wake_recv, selectors.EVENT_READ, None)
+        self._lock = threading.Lock()
+
+    def register(self, robot):
+        """Start dispatching datagrams from robot.socket to robot."""
+        robot.socket.setblocking(False)
+        with self._lock:
+            self.selector.register(robot.socket, selectors.EVENT_READ, robot)
+        self._wake()
+
+    def unregister(self, robot):
+        if robot.socket is None:
+            return
+        with self._lock:
+            try:
+                self.selector.unregister(robot.socket)
+            except (KeyError, ValueError):
+                pass
+        self._wake()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="RobotIngest", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the loop and wait for it to exit."""
+        if not self.running:
+            return
+        self.running = False
+        self._wake()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    def close(self):
+        self.stop()
+        self.selector.close()
+        self._wake_recv.close()
+        self._wake_send.close()
+
+    def _wake(self):
+        try:
+            self._wake_send.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _run(self):
+        select = self.selector.select
+        while self.running:
+            for key, _ in select(self.poll_timeout):
+                robot = key.data
+                if robot is None:
+                    self._drain_wakeups()
+                    continue
+                # One datagram per readiness event: the selector is level-triggered and
+                # reports the socket again if more is queued, whereas draining until
+                # EAGAIN costs a failed recv (and exception) on every wakeup
+                if robot.receive_from_robot():
+                    self.packets_received += 1
+
+    def _drain_wakeups(self):
+        try:
+            while self._wake_recv.recv(64):
+                pass
+        except (BlockingIOError, OSError):
+            pass
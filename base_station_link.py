@@ -0,0 +1,127 @@
+SEQ_MOD = 1 << 32
+# A sequence jump larger than this (either way) means the robot restarted
+RESTART_GAP = 1000
+
+
+class LinkStats:
+    """Link quality of one robot: packet rate, loss, jitter and command round-trip time.
+
+    Loss and reordering come from gaps in the telemetry sequence numbers,
+    jitter is the RFC 3550 interarrival jitter of the robot timestamps, and
+    the round-trip time is measured with PING/PONG. on_packet() runs on the
+    ingest thread and update() on the polling thread, both under robot.lock.
+    Rate and loss cover the last completed window.
+    """
+
+    def __init__(self, window=1.0, max_pending=8):
+        self.window = window
+        self.max_pending = max_pending
+        self.reset()
+
+    def reset(self):
+        self.received = 0
+        self.lost = 0
+        self.reordered = 0
+        self.duplicates = 0
+        self.highest = None
+        self.jitter = 0.0  # seconds
+        self.rate = 0.0    # packets/s
+        self.loss = 0.0    # fraction of packets lost in the last window
+        self.rtt = None    # seconds, last measurement
+        self.srtt = None   # seconds, smoothed
+        self.pings = 0
+        self.pongs = 0
+        self._last_arrival = None
+        self._last_stamp = None
+        self._window_start = None
+        self._window_received = 0
+        self._window_lost = 0
+        self._pending = {}
+        self._next_token = 0
+
+    def on_packet(self, sequence, stamp, arrival):
+        """Account for one telemetry packet with robot sequence/timestamp, received at arrival."""
+        self.update(arrival)
+        self.received += 1
+        self._window_received += 1
+        if self.highest is None:
+            self.highest = sequence
+        else:
+            delta = (sequence - self.highest) % SEQ_MOD
+            if delta == 0:
+                self.duplicates += 1
+            elif delta <= RESTART_GAP:
+                # Anything skipped is lost until it shows up late
+                self.lost += delta - 1
+                self._window_lost += delta - 1
+                self.highest = sequence
+            elif SEQ_MOD - delta <= RESTART_GAP:
+                self.reordered += 1
+                if self.lost:
+                    self.lost -= 1
+                if self._window_lost:
+                    self._window_lost -= 1
+            else:
+                self.highest = sequence
+        if self._last_arrival is not None:
+            d = (arrival - self._last_arrival) - (stamp - self._last_stamp)
+            self.jitter += (abs(d) - self.jitter) / 16.0
+        self._last_arrival = arrival
+        self._last_stamp = stamp
+
+    def update(self, now):
+        """Close the current window if it has elapsed, so a silent link decays to zero rate."""
+        if self._window_start is None:
+            self._window_start = now
+            return
+        elapsed = now - self._window_start
+        if elapsed < self.window:
+            return
+        self.rate = self._window_received / elapsed
+        expected = self._window_received + self._window_lost
+        if expected:
+            self.loss = self._window_lost / expected
+        elif self.highest is not None:
+            # Nothing at all arrived from a robot that was streaming
+            self.loss = 1.0
+        self._window_start = now
+        self._window_received = 0
+        self._window_lost = 0
+
+    def start_ping(self, now):
+        """Register an outgoing PING and return its token."""
+        self._next_token += 1
+        self._pending[self._next_token] = now
+        if len(self._pending) > self.max_pending:
+            del self._pending[min(self._pending)]
+        self.pings += 1
+        return self._next_token
+
+    def on_pong(self, token, now):
+        sent = self._pending.pop(token, None)
+        if sent is None:
+            return None
+        self.pongs += 1
+        self.rtt = now - sent
+        self.srtt = self.rtt if self.srtt is None else self.srtt + (self.rtt - self.srtt) / 8.0
+        return self.rtt
+
+    def summary(self, sep="\n"):
+        """Short human readable form, two lines for the robot tiles."""
+        rtt = "-" if self.srtt is None else f"{1000 * self.srtt:.1f}"
+        return (f"{self.rate:.0f} pkt/s  loss {100 * self.loss:.0f}%{sep}"
+                f"jitter {1000 * self.jitter:.1f} ms  rtt {rtt} ms")
+
+    def as_dict(self):
+        return {
+            "rate": self.rate,
+            "loss": self.loss,
+            "jitter_ms": 1000 * self.jitter,
+            "rtt_ms": None if self.srtt is None else 1000 * self.srtt,
+            "received": self.received,
+            "lost": self.lost,
+            "reordered": self.reordered,
+            "duplicates": self.duplicates,
+            "pings": self.pings,
+            "pongs": self.pongs,
+        }
@@ -0,0 +1,36 @@
+import queue
+import time
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+
+class LogPipeline:
+    """Collects log lines from any thread for the Tk thread to drain in batches.
+
+    Producers only put into a SimpleQueue (no Tk calls, no locks held by us),
+    and the Tk thread calls drain() once per frame, so a burst of messages
+    becomes a single widget update.
+    """
+
+    def __init__(self, level="INFO"):
+        self.queue = queue.SimpleQueue()
+        self.level = LEVELS[level]
+
+    def put(self, msg, level="INFO"):
+        self.queue.put((time.time(), level, msg))
+
+    def set_level(self, level):
+        self.level = LEVELS[level]
+
+    def drain(self, max_items=5000):
+        """Return queued (timestamp, level, msg) entries at or above the current level."""
+        entries = []
+        get = self.queue.get_nowait
+        for _ in range(max_items):
+            try:
+                entry = get()
+            except queue.Empty:
+                break
+            if LEVELS.get(entry[1], 20) >= self.level:
+                entries.append(entry)
+        return entries
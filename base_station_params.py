@@ -0,0 +1,82 @@
+class ParameterSync:
+    """Keeps one robot's parameters in sync using single-datagram bundles.
+
+    A bundle carries only the values that differ from what the robot last
+    acknowledged, tagged with an increasing version:
+
+        PARAMS <version> max_speed=2.5 kick_power=0.9
+
+    The robot applies bundles newer than the last one it applied and answers
+    ACK PARAMS <version>. HELLO resets its version counter, so reset() is
+    called on every (re)connect. An unacknowledged bundle is retransmitted by
+    poll(), which the owner calls from its timer; nothing waits for the reply.
+    The owner holds robot.lock around every call.
+    """
+
+    def __init__(self, retry_interval=0.1, max_retries=5):
+        self.retry_interval = retry_interval
+        self.max_retries = max_retries
+        self.reset()
+
+    def reset(self):
+        self.acked = {}
+        self.version = 0
+        self.acked_version = 0
+        self.pending = None  # (version, {name: value}) awaiting its ACK
+        self.first_sent = 0.0
+        self.next_retry = 0.0
+        self.retries = 0
+        # ("acked" | "failed", version, changed count, seconds) for the owner to report
+        self.result = None
+
+    @staticmethod
+    def format(version, values):
+        return f"PARAMS {version} " + " ".join(f"{name}={value}" for name, value in values.items())
+
+    def push(self, parameters, now):
+        """Start a bundle with the values that differ from the acknowledged ones.
+
+        Returns the datagram text, or None when the robot is already up to date.
+        A newer bundle supersedes one still in flight, so it also carries the
+        in-flight values that have not been acknowledged yet.
+        """
+        in_flight = self.pending[1] if self.pending else {}
+        diff = {name: value for name, value in parameters.items()
+                if self.acked.get(name) != value or in_flight.get(name, value) != value}
+        if not diff:
+            return None
+        self.version += 1
+        self.pending = (self.version, diff)
+        self.first_sent = now
+        self.next_retry = now + self.retry_interval
+        self.retries = 0
+        return self.format(self.version, diff)
+
+    def on_ack(self, version, now):
+        if self.pending is None or version != self.pending[0]:
+            # Duplicate ACK, or one for a bundle that was superseded
+            return False
+        values = self.pending[1]
+        self.acked.update(values)
+        self.acked_version = version
+        self.pending = None
+        self.result = ("acked", version, len(values), now - self.first_sent)
+        return True
+
+    def poll(self, now):
+        """Return the datagram to retransmit if the pending bundle's timer expired."""
+        if self.pending is None or now < self.next_retry:
+            return None
+        version, values = self.pending
+        if self.retries >= self.max_retries:
+            self.pending = None
+            self.result = ("failed", version, len(values), now - self.first_sent)
+            return None
+        self.retries += 1
+        # Exponential backoff so a dead link is not flooded
+        self.next_retry = now + self.retry_interval * (2 ** self.retries)
+        return self.format(version, values)
+
+    def take_result(self):
+        result, self.result = self.result, None
+        return result
@@ -0,0 +1,285 @@
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+# Match log file layout (little endian):
+#
+#   file header:  magic "ERAREC\0" (7s), version u8, start wall-clock time f64
+#   records:      type u8, source u16, time f64 (seconds since start), length u32, payload
+#   index:        count * (time f64, offset u64), one entry per index_interval
+#   trailer:      index offset u64, index count u32, magic "ERAIDX\0\0" (8s)
+#
+# The trailer is written on close; a file from a crashed session has no
+# trailer and MatchLog rebuilds the index by scanning the records once.
+FILE_MAGIC = b"ERAREC\0"
+INDEX_MAGIC = b"ERAIDX\0\0"
+RECORDING_VERSION = 1
+
+FILE_HEADER = struct.Struct("<7sBd")
+RECORD = struct.Struct("<BHdI")
+INDEX_ENTRY = struct.Struct("<dQ")
+TRAILER = struct.Struct("<QI8s")
+
+# Record types
+TELEMETRY = 1  # raw telemetry packet, source = robot id
+REFBOX = 2     # RefBox message text, source = 0
+COMMAND = 3    # command text sent to a robot, source = robot id
+WORLD = 4      # fused world state, see encode_world
+LINK = 5       # per-robot link statistics, see encode_links
+
+RECORD_NAMES = {TELEMETRY: "telemetry", REFBOX: "refbox", COMMAND: "command", WORLD: "world", LINK: "link"}
+
+# Fused world payload: ball x, y, vx, vy, then robot/opponent/obstacle counts,
+# followed by the entities
+WORLD_HEADER = struct.Struct("<ffffBBH")
+WORLD_ROBOT = struct.Struct("<Bfff")  # id, x, y, orientation
+WORLD_OBSTACLE = struct.Struct("<fff")  # x, y, confidence
+
+# Link statistics payload: robot count, then per robot id, packet rate, loss
+# fraction, jitter (s), smoothed RTT (s, NaN if unknown), received, lost, reordered
+LINK_HEADER = struct.Struct("<B")
+LINK_ROBOT = struct.Struct("<BffffIII")
+
+
+def encode_world(world, robots, opponents):
+    """Pack the fused GlobalWorldMap and robot poses into a WORLD payload."""
+    # Take each robot's snapshot once so position and orientation match
+    robots = [(r.robot_id, s) for r, s in ((r, r.state) for r in robots) if s.position is not None]
+    opponents = [(r.robot_id, s) for r, s in ((r, r.state) for r in opponents) if s.position is not None]
+    obstacles = world.obstacles
+    bx, by = world.ball_position
+    vx, vy = world.ball_velocity
+    payload = bytearray(WORLD_HEADER.size + (len(robots) + len(opponents)) * WORLD_ROBOT.size
+                        + len(obstacles) * WORLD_OBSTACLE.size)
+    WORLD_HEADER.pack_into(payload, 0, bx, by, vx, vy, len(robots), len(opponents), len(obstacles))
+    offset = WORLD_HEADER.size
+    for robot_id, state in robots + opponents:
+        WORLD_ROBOT.pack_into(payload, offset, robot_id, state.position[0], state.position[1],
+                              state.orientation)
+        offset += WORLD_ROBOT.size
+    for obstacle in obstacles:
+        WORLD_OBSTACLE.pack_into(payload, offset, obstacle[0], obstacle[1],
+                                 obstacle[2] if len(obstacle) > 2 else 1.0)
+        offset += WORLD_OBSTACLE.size
+    return bytes(payload)
+
+
+def decode_world(payload):
+    """Inverse of encode_world: returns a dict of ball, robots, opponents and obstacles."""
+    bx, by, vx, vy, n_robots, n_opponents, n_obstacles = WORLD_HEADER.unpack_from(payload, 0)
+    offset = WORLD_HEADER.size
+    poses = []
+    for _ in range(n_robots + n_opponents):
+        robot_id, x, y, orientation = WORLD_ROBOT.unpack_from(payload, offset)
+        poses.append((robot_id, (x, y), orientation))
+        offset += WORLD_ROBOT.size
+    obstacles = [WORLD_OBSTACLE.unpack_from(payload, offset + i * WORLD_OBSTACLE.size)
+                 for i in range(n_obstacles)]
+    return {
+        "ball_position": (bx, by),
+        "ball_velocity": (vx, vy),
+        "robots": poses[:n_robots],
+        "opponents": poses[n_robots:],
+        "obstacles": obstacles,
+    }
+
+
+def encode_links(robots):
+    """Pack every robot's LinkStats into a LINK payload."""
+    payload = bytearray(LINK_HEADER.size + len(robots) * LINK_ROBOT.size)
+    LINK_HEADER.pack_into(payload, 0, len(robots))
+    offset = LINK_HEADER.size
+    for robot in robots:
+        link = robot.link
+        LINK_ROBOT.pack_into(payload, offset, robot.robot_id, link.rate, link.loss, link.jitter,
+                             float("nan") if link.srtt is None else link.srtt,
+                             link.received, link.lost, link.reordered)
+        offset += LINK_ROBOT.size
+    return bytes(payload)
+
+
+def decode_links(payload):
+    """Inverse of encode_links: {robot id: dict of link statistics}."""
+    (count,) = LINK_HEADER.unpack_from(payload, 0)
+    links = {}
+    for i in range(count):
+        robot_id, rate, loss, jitter, srtt, received, lost, reordered = \
+            LINK_ROBOT.unpack_from(payload, LINK_HEADER.size + i * LINK_ROBOT.size)
+        links[robot_id] = {"rate": rate, "loss": loss, "jitter": jitter,
+                           "srtt": None if srtt != srtt else srtt,
+                           "received": received, "lost": lost, "reordered": reordered}
+    return links
+
+
+class MatchRecorder:
+    """Appends match data to a binary log from a background writer thread.
+
+    record() only timestamps the payload and puts it on a queue, so callers on
+    the ingest and UI paths never wait for the disk. Every recording gets its
+    own queue, published with its start time as one tuple: a record() racing
+    stop() lands in the finished session's queue and is dropped, never in the
+    next recording with the old clock.
+    """
+
+    def __init__(self, index_interval=1.0, buffer_size=1 << 20):
+        self.index_interval = index_interval
+        self.buffer_size = buffer_size
+        self.path = None
+        self.active = False
+        self.records = 0
+        self.bytes_written = 0
+        self._thread = None
+        self._session = None  # (queue, start time) while recording
+
+    def start(self, path):
+        if self.active:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.records = 0
+        self.bytes_written = 0
+        records = queue.SimpleQueue()
+        f = open(path, "wb", buffering=self.buffer_size)
+        f.write(FILE_HEADER.pack(FILE_MAGIC, RECORDING_VERSION, time.time()))
+        self._thread = threading.Thread(target=self._writer, args=(f, records), name="MatchRecorder", daemon=True)
+        self._session = (records, time.monotonic())
+        self.active = True
+        self._thread.start()
+        print(f"Recording match to {path}")
+
+    def stop(self):
+        if not self.active:
+            return
+        records, _ = self._session
+        self._session = None
+        self.active = False
+        records.put(None)
+        self._thread.join()
+        self._thread = None
+        print(f"Recording stopped: {self.records} records, {self.bytes_written} bytes in {self.path}")
+
+    def record(self, record_type, source, payload):
+        """Queue one record; payload must be bytes. Safe to call from any thread."""
+        session = self._session
+        if session is not None:
+            records, start = session
+            records.put((record_type, source, time.monotonic() - start, payload))
+
+    def _writer(self, f, records):
+        offset = FILE_HEADER.size
+        index = []
+        next_index = 0.0
+        try:
+            while True:
+                item = records.get()
+                if item is None:
+                    break
+                record_type, source, t, payload = item
+                if t >= next_index:
+                    index.append((t, offset))
+                    next_index = t + self.index_interval
+                f.write(RECORD.pack(record_type, source, t, len(payload)))
+                f.write(payload)
+                offset += RECORD.size + len(payload)
+                self.records += 1
+                self.bytes_written = offset
+            index_offset = offset
+            for t, record_offset in index:
+                f.write(INDEX_ENTRY.pack(t, record_offset))
+            f.write(TRAILER.pack(index_offset, len(index), INDEX_MAGIC))
+            self.bytes_written = index_offset + len(index) * INDEX_ENTRY.size + TRAILER.size
+        finally:
+            f.close()
+
+
+class MatchLog:
+    """Read-only, memory-mapped view of a recorded match.
+
+    Opening only reads the header and the timestamp index; records are
+    decoded lazily as they are iterated, so memory use does not depend on
+    the length of the match.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.start_time = FILE_HEADER.unpack_from(self.mm, 0)
+        if magic != FILE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a match recording")
+        if version != RECORDING_VERSION:
+            self.close()
+            raise ValueError(f"unsupported recording version {version}")
+        self.end = len(self.mm)
+        self.index = self._read_index()
+        self.duration = self._last_time()
+
+    def close(self):
+        self.mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_index(self):
+        mm = self.mm
+        if len(mm) >= FILE_HEADER.size + TRAILER.size:
+            index_offset, count, magic = TRAILER.unpack_from(mm, len(mm) - TRAILER.size)
+            if magic == INDEX_MAGIC and index_offset + count * INDEX_ENTRY.size + TRAILER.size == len(mm):
+                self.end = index_offset
+                return [INDEX_ENTRY.unpack_from(mm, index_offset + i * INDEX_ENTRY.size) for i in range(count)]
+        # No trailer (recording was not closed cleanly): rebuild by scanning
+        index = []
+        next_index = 0.0
+        offset = FILE_HEADER.size
+        while offset + RECORD.size <= len(mm):
+            _, _, t, length = RECORD.unpack_from(mm, offset)
+            if offset + RECORD.size + length > len(mm):
+                break
+            if t >= next_index:
+                index.append((t, offset))
+                next_index = t + 1.0
+            offset += RECORD.size + length
+        self.end = offset
+        return index
+
+    def _last_time(self):
+        if not self.index:
+            return 0.0
+        last = 0.0
+        for _, _, t, _, _ in self.records(self.index[-1][1]):
+            last = t
+        return last
+
+    def offset_for(self, t):
+        """Offset of the first indexed record at or before time t."""
+        lo, hi = 0, len(self.index)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.index[mid][0] <= t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return self.index[lo - 1][1] if lo else FILE_HEADER.size
+
+    def read(self, offset):
+        """Decode the record at offset: (type, source, time, payload, next offset)."""
+        record_type, source, t, length = RECORD.unpack_from(self.mm, offset)
+        start = offset + RECORD.size
+        return record_type, source, t, self.mm[start:start + length], start + length
+
+    def records(self, offset=FILE_HEADER.size):
+        """Iterate (type, source, time, payload, next offset) from offset to the end."""
+        while offset + RECORD.size <= self.end:
+            record = self.read(offset)
+            yield record
+            offset = record[4]
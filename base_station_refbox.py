@@ -0,0 +1,97 @@
+import json
+import time
+
+
+class RefBoxCommand:
+    """One command received from the MSL RefBox.
+
+    The 2015+ RefBox sends JSON objects such as
+    {"command": "KICKOFF", "targetTeam": "224.16.32.201"}, each terminated by
+    a NUL byte. Anything that is not JSON is kept as a bare command string.
+    """
+
+    __slots__ = ("command", "target_team", "payload", "raw", "received")
+
+    def __init__(self, command, target_team=None, payload=None, raw="", received=None):
+        self.command = command
+        self.target_team = target_team
+        self.payload = payload if payload is not None else {}
+        self.raw = raw
+        self.received = received if received is not None else time.time()
+
+    @classmethod
+    def from_text(cls, text, received=None):
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            return cls(text, raw=text, received=received)
+        if not isinstance(payload, dict):
+            return cls(text, raw=text, received=received)
+        command = str(payload.get("command", "")).upper()
+        return cls(command, payload.get("targetTeam"), payload, text, received)
+
+    def __str__(self):
+        return self.raw
+
+    def __repr__(self):
+        return f"RefBoxCommand({self.command!r}, target_team={self.target_team!r})"
+
+
+class RefBoxStreamParser:
+    """Reassembles NUL-delimited RefBox messages from a TCP byte stream.
+
+    feed() accepts chunks exactly as returned by recv(), which may hold part
+    of a message or several messages, and returns the complete commands.
+    Consumed bytes are dropped from the front of the buffer in one step per
+    chunk, and scanning resumes where the previous chunk ended, so long or
+    fragmented messages are not rescanned or copied repeatedly. A message
+    growing past max_message_size is dropped together with the rest of it,
+    up to and including its delimiter.
+    """
+
+    def __init__(self, delimiter=b"\0", max_message_size=65536):
+        self.delimiter = delimiter
+        self.max_message_size = max_message_size
+        self.buffer = bytearray()
+        self.dropped = 0
+        self._scan_from = 0
+        self._resync = False  # skipping the tail of a dropped oversize message
+
+    def feed(self, data):
+        buffer = self.buffer
+        buffer += data
+        if self._resync:
+            end = buffer.find(self.delimiter)
+            if end < 0:
+                # Still inside the dropped message; keep only what may start a delimiter
+                del buffer[:max(len(buffer) - len(self.delimiter) + 1, 0)]
+                return []
+            del buffer[:end + len(self.delimiter)]
+            self._resync = False
+            self._scan_from = 0
+        commands = []
+        start = 0
+        while True:
+            end = buffer.find(self.delimiter, max(start, self._scan_from))
+            if end < 0:
+                break
+            text = buffer[start:end].decode("utf-8", errors="replace").strip()
+            if text:
+                commands.append(RefBoxCommand.from_text(text))
+            start = end + len(self.delimiter)
+            self._scan_from = start
+        if start:
+            del buffer[:start]
+        self._scan_from = max(len(buffer) - len(self.delimiter) + 1, 0)
+        if len(buffer) > self.max_message_size:
+            # No delimiter in sight: the peer is not speaking our framing, resync
+            self.dropped += 1
+            buffer.clear()
+            self._scan_from = 0
+            self._resync = True
+        return commands
+
+    def reset(self):
+        self.buffer.clear()
+        self._scan_from = 0
+        self._resync = False
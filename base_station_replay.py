@@ -0,0 +1,174 @@
+import time
+
+import base_station_telemetry as telemetry
+from base_station_Robot import Robot
+from base_station_world import GlobalWorldMap
+from base_station_history import TrajectoryHistory
+from base_station_heatmap import OccupancyGrid
+from base_station_recorder import MatchLog, TELEMETRY, REFBOX, COMMAND, WORLD, RECORD_NAMES
+
+MIN_SPEED = 0.1
+MAX_SPEED = 50.0
+
+
+class MatchReplay:
+    """Plays a recorded match back through the live fusion and drawing path.
+
+    Recorded telemetry is decoded into the replay's own Robot objects, then
+    GlobalWorldMap.update_from_robots and BaseStationUI.draw_field run exactly
+    as they do live, with the recording's clock standing in for the wall
+    clock. The replay has its own world map, trajectories and occupancy grid,
+    so the live world keeps fusing (and streaming to the RefBox) underneath;
+    the UI shows the replay's world until close(). Playback is driven by Tk
+    after() and supports speed changes, seeking, pause and stepping one fusion
+    frame at a time.
+    """
+
+    def __init__(self, ui, path, tick_ms=20, frame_step=0.02, max_fusions_per_tick=10):
+        self.ui = ui
+        self.root = ui.root
+        self.log = MatchLog(path)
+        self.world = GlobalWorldMap()
+        self.robots = [Robot(robot.robot_id, "Player", color=robot.color) for robot in ui.robots]
+        self.opponents = [Robot(opponent.robot_id, "Opponent", color=opponent.color) for opponent in ui.opponents]
+        self.history = TrajectoryHistory()
+        self.occupancy = OccupancyGrid(self.world.field_dimensions)
+        self.tick_ms = tick_ms
+        # Recording time advanced by step() when the recording has no world frames
+        self.frame_step = frame_step
+        # Recorded fusion frames are re-fused as they are passed; at high speeds
+        # at most this many per tick, so playback cost stays bounded
+        self.max_fusions_per_tick = max_fusions_per_tick
+        self.robots_by_id = {robot.robot_id: robot for robot in self.robots}
+
+        self.speed = 1.0
+        self.playing = False
+        self.position = 0.0
+        self.on_update = None
+        self._offset = self.log.offset_for(0.0)
+        self._job = None
+        self._last_wall = None
+
+    @property
+    def duration(self):
+        return self.log.duration
+
+    def show(self):
+        """Make the UI draw the replay's world instead of the live one."""
+        self.ui.show_world(self.world, self.robots, self.opponents, self.history, self.occupancy)
+
+    def close(self):
+        self.pause()
+        self.log.close()
+        self.ui.show_live_world()
+
+    def set_speed(self, speed):
+        self.speed = min(max(float(speed), MIN_SPEED), MAX_SPEED)
+
+    def play(self):
+        if self.playing:
+            return
+        self.playing = True
+        self._last_wall = time.perf_counter()
+        self._tick()
+
+    def pause(self):
+        self.playing = False
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def toggle(self):
+        if self.playing:
+            self.pause()
+        else:
+            self.play()
+
+    def seek(self, t):
+        """Jump to recording time t, rebuilding state from the nearest index entry."""
+        t = min(max(t, 0.0), self.duration)
+        self.world.reset()
+        for robot in self.robots + self.opponents:
+            # Nothing is drawn until the recording places it again
+            robot.state = telemetry.INITIAL_STATE._replace(position=None)
+            robot.connected = False
+        self.history.clear()
+        self.occupancy.clear()
+        self._offset = self.log.offset_for(t)
+        self.position = t
+        # Replay the records between the index entry and t without drawing
+        self._advance(t, log=False)
+        self._fuse_and_draw()
+
+    def step(self):
+        """Advance to the next recorded fusion frame and pause there."""
+        self.pause()
+        target = None
+        for record_type, _, t, _, _ in self.log.records(self._offset):
+            if record_type == WORLD and t > self.position:
+                target = t
+                break
+        if target is None:
+            target = self.position + self.frame_step
+        self.position = min(target, self.duration)
+        self._advance(self.position)
+        self._fuse_and_draw()
+
+    def _tick(self):
+        if not self.playing:
+            return
+        now = time.perf_counter()
+        self.position += (now - self._last_wall) * self.speed
+        self._last_wall = now
+        if self.position >= self.duration:
+            self.position = self.duration
+            self.playing = False
+        self._advance(self.position)
+        self._fuse_and_draw()
+        if self.playing:
+            self._job = self.root.after(self.tick_ms, self._tick)
+        else:
+            self._job = None
+
+    def _advance(self, until, log=True):
+        """Apply every record up to recording time until."""
+        offset = self._offset
+        last_fused = self.world.ball_filter.t
+        min_gap = None
+        for record_type, source, t, payload, next_offset in self.log.records(offset):
+            if t > until:
+                break
+            offset = next_offset
+            if min_gap is None:
+                if last_fused is None:
+                    last_fused = t
+                min_gap = (until - last_fused) / self.max_fusions_per_tick
+            if record_type == WORLD:
+                # A live fusion frame happened here; fuse at the same moment
+                if t - last_fused >= min_gap:
+                    self.world.update_from_robots(self.robots, now=t)
+                    last_fused = t
+            elif record_type == TELEMETRY:
+                robot = self.robots_by_id.get(source)
+                if robot is None or not telemetry.is_telemetry(payload, len(payload)):
+                    continue
+                try:
+                    robot.state = telemetry.decode_state(payload, len(payload), robot.state, t, robot.robot_id)
+                except telemetry.TelemetryError:
+                    continue
+                robot.connected = True
+            elif log and record_type in (REFBOX, COMMAND):
+                text = payload.decode("utf-8", errors="replace")
+                self.ui.log_message(f"[replay {t:7.2f}s] {RECORD_NAMES[record_type]} {source}: {text}\n")
+        self._offset = offset
+
+    def _fuse_and_draw(self):
+        world = self.world
+        world.update_from_robots(self.robots, now=self.position)
+        world.opponent_tracker.apply_to(self.opponents)
+        self.history.record(self.position, world, self.robots + self.opponents)
+        self.occupancy.record(self.position, self.robots, world.ball_position if world.ball_tracked() else None)
+        self.ui.redraw_field()
+        self.ui.flush_logs()
+        if self.on_update:
+            self.on_update(self)
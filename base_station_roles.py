@@ -0,0 +1,123 @@
+import itertools
+import time
+
+import numpy as np
+
+from base_station_tracking import linear_sum_assignment
+
+GOALKEEPER = "GOALKEEPER"
+ATTACKER = "ATTACKER"
+DEFENDER_LEFT = "DEFENDER_LEFT"    # on the low-y side of the ball-goal line
+DEFENDER_RIGHT = "DEFENDER_RIGHT"  # on the high-y side
+SUPPORTER = "SUPPORTER"
+RESERVE = "RESERVE"                # more robots than roles
+
+# Field roles in priority order: with fewer robots the last ones stay empty
+FIELD_ROLES = (ATTACKER, DEFENDER_LEFT, SUPPORTER, DEFENDER_RIGHT)
+# Up to this many robots every assignment is scored at once instead of running the solver
+MAX_PERMUTATION_ROBOTS = 6
+
+
+class RoleAllocator:
+    """Gives each of our robots a role every fusion tick.
+
+    Role targets follow the fused ball and our goal (the left one, x = 0):
+    the attacker goes to the ball, the defenders to either side of the line
+    from the ball to our goal, the supporter behind the ball. The cost of a
+    robot taking a role is its distance to the role's target, and the
+    assignment minimises the total. For a handful of robots every
+    permutation is scored in one NumPy expression; beyond that
+    linear_sum_assignment solves it.
+
+    Hysteresis: the robot already holding a role gets switch_margin meters
+    off its cost, and once roles have changed, robots that already have one
+    keep it for at least min_hold seconds. Robots joining or leaving are
+    handled immediately. update() returns only the roles that changed.
+    """
+
+    def __init__(self, field_dimensions=(12, 9), goalkeeper_id=1, switch_margin=0.5, min_hold=1.0):
+        self.field_dimensions = field_dimensions
+        # This robot is always the goalkeeper while connected; None lets the allocator choose
+        self.goalkeeper_id = goalkeeper_id
+        self.switch_margin = switch_margin
+        self.min_hold = min_hold
+        self.roles = {}  # robot -> current role
+        self.last_change = None
+        self._permutations = {}
+
+    def reset(self):
+        self.roles.clear()
+        self.last_change = None
+
+    def targets(self, ball):
+        """Target of every role as {role: (x, y)} for the ball at ball."""
+        field_w, field_h = self.field_dimensions
+        bx, by = ball
+        goal_y = field_h / 2.0
+        targets = np.array([
+            (bx, by),                                                  # ATTACKER
+            (0.4 * bx, goal_y + 0.4 * (by - goal_y) - 1.0),            # DEFENDER_LEFT
+            (bx - 2.0, by + (1.5 if by < goal_y else -1.5)),           # SUPPORTER
+            (0.4 * bx, goal_y + 0.4 * (by - goal_y) + 1.0),            # DEFENDER_RIGHT
+            (0.5, min(max(by, goal_y - 1.0), goal_y + 1.0)),           # GOALKEEPER
+        ])
+        targets = np.clip(targets, 0.5, (field_w - 0.5, field_h - 0.5))
+        return dict(zip(FIELD_ROLES + (GOALKEEPER,), targets))
+
+    def update(self, robots, ball, now=None):
+        """Assign roles to the connected robots with a known position. Returns {robot: new role}."""
+        if now is None:
+            now = time.monotonic()
+        active = [robot for robot in robots if robot.connected and robot.state.position is not None]
+        assignment = {}
+        field = []
+        for robot in active:
+            if robot.robot_id == self.goalkeeper_id:
+                assignment[robot] = GOALKEEPER
+            else:
+                field.append(robot)
+        # Without the designated goalkeeper another robot takes the goal first
+        roles = FIELD_ROLES if assignment else (GOALKEEPER,) + FIELD_ROLES
+        roles = roles[:len(field)]
+        if roles:
+            targets = self.targets(ball)
+            positions = np.array([robot.state.position for robot in field], dtype=float)
+            goals = np.array([targets[role] for role in roles])
+            diff = positions[:, None, :] - goals[None, :, :]
+            cost = np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+            for i, robot in enumerate(field):
+                role = self.roles.get(robot)
+                if role in roles:
+                    cost[i, roles.index(role)] -= self.switch_margin
+            rows = self._solve(cost)
+            for role, row in zip(roles, rows):
+                assignment[field[row]] = role
+        for robot in field:
+            assignment.setdefault(robot, RESERVE)
+
+        joined_or_left = assignment.keys() != self.roles.keys()
+        changes = {robot: role for robot, role in assignment.items() if self.roles.get(robot) != role}
+        if not changes and not joined_or_left:
+            return {}
+        if (not joined_or_left and self.last_change is not None
+                and now - self.last_change < self.min_hold):
+            # A reshuffle among the same robots too soon after the last one
+            return {}
+        self.roles = assignment
+        if changes:
+            self.last_change = now
+        return changes
+
+    def _solve(self, cost):
+        """Row (robot) index for each column (role) of the minimum-cost assignment."""
+        n, k = cost.shape
+        if n <= MAX_PERMUTATION_ROBOTS:
+            permutations = self._permutations.get((n, k))
+            if permutations is None:
+                permutations = np.array(list(itertools.permutations(range(n), k)), dtype=int)
+                self._permutations[(n, k)] = permutations
+            totals = cost[permutations, np.arange(k)].sum(axis=1)
+            return permutations[int(np.argmin(totals))].tolist()
+        rows, cols = linear_sum_assignment(cost)
+        order = np.argsort(cols)
+        return rows[order].tolist()
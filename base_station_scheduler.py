@@ -0,0 +1,128 @@
+import time
+
+
+class FrameScheduler:
+    """Runs sensor fusion and rendering on the Tk loop at independent rates.
+
+    fuse() is called at fusion_hz and should return True when the world changed.
+    render() is called at most max_fps times per second, and only while the
+    world is dirty; on_frame(), if given, runs on every render tick regardless.
+    A tick that overruns its period skips the frames it missed instead of
+    queueing them, so a slow redraw never delays fusion.
+    """
+
+    def __init__(self, root, fuse, render, fusion_hz=50, max_fps=30,
+                 on_frame=None, on_report=None, report_interval=1.0):
+        self.root = root
+        self.fuse = fuse
+        self.render = render
+        self.on_frame = on_frame
+        self.fusion_period = 1.0 / fusion_hz
+        self.render_period = 1.0 / max_fps
+        self.on_report = on_report
+        self.report_interval = report_interval
+
+        self.running = False
+        self.dirty = True
+        self._fusion_job = None
+        self._render_job = None
+        self._next_fusion = 0.0
+        self._next_render = 0.0
+
+        # Statistics since the last report
+        self.fusion_ticks = 0
+        self.fusion_time = 0.0
+        self.frames = 0
+        self.frame_time = 0.0
+        self.frames_skipped = 0
+        self.fusion_skipped = 0
+        self._report_start = 0.0
+        self.last_report = {}
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        now = time.perf_counter()
+        self._next_fusion = now
+        self._next_render = now
+        self._report_start = now
+        self._fusion_tick()
+        self._render_tick()
+
+    def stop(self):
+        self.running = False
+        for job in (self._fusion_job, self._render_job):
+            if job is not None:
+                self.root.after_cancel(job)
+        self._fusion_job = None
+        self._render_job = None
+
+    def _delay_ms(self, deadline):
+        return max(1, int((deadline - time.perf_counter()) * 1000))
+
+    def _advance(self, deadline, period, now):
+        """Next deadline after now; returns (deadline, number of periods skipped)."""
+        deadline += period
+        if deadline >= now:
+            return deadline, 0
+        missed = int((now - deadline) / period) + 1
+        return deadline + missed * period, missed
+
+    def _fusion_tick(self):
+        if not self.running:
+            return
+        start = time.perf_counter()
+        if self.fuse():
+            self.dirty = True
+        end = time.perf_counter()
+        self.fusion_ticks += 1
+        self.fusion_time += end - start
+
+        self._next_fusion, missed = self._advance(self._next_fusion, self.fusion_period, end)
+        self.fusion_skipped += missed
+        self._fusion_job = self.root.after(self._delay_ms(self._next_fusion), self._fusion_tick)
+
+    def _render_tick(self):
+        if not self.running:
+            return
+        start = time.perf_counter()
+        if self.on_frame:
+            self.on_frame()
+        if self.dirty:
+            self.dirty = False
+            self.render()
+            end = time.perf_counter()
+            self.frames += 1
+            self.frame_time += end - start
+        else:
+            end = time.perf_counter()
+
+        self._next_render, missed = self._advance(self._next_render, self.render_period, end)
+        self.frames_skipped += missed
+        if end - self._report_start >= self.report_interval:
+            self._report(end)
+        self._render_job = self.root.after(self._delay_ms(self._next_render), self._render_tick)
+
+    def _report(self, now):
+        elapsed = now - self._report_start
+        self.last_report = {
+            "fps": self.frames / elapsed,
+            "frame_ms": 1000.0 * self.frame_time / self.frames if self.frames else 0.0,
+            "fusion_hz": self.fusion_ticks / elapsed,
+            "fusion_ms": 1000.0 * self.fusion_time / self.fusion_ticks if self.fusion_ticks else 0.0,
+            "frames_skipped": self.frames_skipped,
+            "fusion_skipped": self.fusion_skipped,
+        }
+        self.fusion_ticks = 0
+        self.fusion_time = 0.0
+        self.frames = 0
+        self.frame_time = 0.0
+        self.frames_skipped = 0
+        self.fusion_skipped = 0
+        self._report_start = now
+        if self.on_report:
+            self.on_report(self.last_report)
@@ -0,0 +1,134 @@
+import struct
+from multiprocessing import shared_memory
+
+# Fixed layout of the shared world block (little endian):
+#
+#   sequence u64                      seqlock counter, odd while a write is in progress
+#   header:   fused time f64, ball x, y, vx, vy f32,
+#             robot count u8, opponent count u8, obstacle count u16,
+#             recording u8, ball tracked u8, recorded records u32, packets received u32
+#   robots:   MAX_ROBOTS * ROBOT       teammates, then opponents
+#   obstacles: MAX_OBSTACLES * OBSTACLE
+#
+# Robot flags: bit 0 connected, bit 1 position known.
+SEQUENCE = struct.Struct("<Q")
+HEADER = struct.Struct("<dffffBBHBBII")
+ROBOT = struct.Struct("<BBffffffI")  # id, flags, x, y, orientation, vx, vy, battery, telemetry sequence
+OBSTACLE = struct.Struct("<fff")     # x, y, confidence
+
+MAX_ROBOTS = 32
+MAX_OBSTACLES = 256
+
+FLAG_CONNECTED = 0x01
+FLAG_KNOWN = 0x02
+
+HEADER_OFFSET = SEQUENCE.size
+ROBOTS_OFFSET = HEADER_OFFSET + HEADER.size
+OBSTACLES_OFFSET = ROBOTS_OFFSET + MAX_ROBOTS * ROBOT.size
+SIZE = OBSTACLES_OFFSET + MAX_OBSTACLES * OBSTACLE.size
+
+
+def open_block(name=None):
+    """Attach to the named block, or create a new one when name is None. Returns (shm, owner)."""
+    if name is None:
+        return shared_memory.SharedMemory(create=True, size=SIZE), True
+    return shared_memory.SharedMemory(name=name), False
+
+
+class SharedWorldWriter:
+    """Writes the fused world into a shared memory block, one seqlock-protected frame at a time.
+
+    Only one process writes. The counter is made odd before and even after
+    each frame, so a reader that sees the same even value before and after
+    its read knows the frame was not torn.
+    """
+
+    def __init__(self, name=None):
+        self.shm, self.owner = open_block(name)
+        self.name = self.shm.name
+        self.sequence = SEQUENCE.unpack_from(self.shm.buf, 0)[0] & ~1
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def write(self, world, robots, opponents, t=0.0, recording=False, records=0, packets=0):
+        buf = self.shm.buf
+        self.sequence += 1
+        SEQUENCE.pack_into(buf, 0, self.sequence)
+
+        robots = robots[:MAX_ROBOTS]
+        opponents = opponents[:MAX_ROBOTS - len(robots)]
+        obstacles = world.obstacles[:MAX_OBSTACLES]
+        bx, by = world.ball_position
+        vx, vy = world.ball_velocity
+        HEADER.pack_into(buf, HEADER_OFFSET, t, bx, by, vx, vy, len(robots), len(opponents),
+                         len(obstacles), recording, world.ball_tracked(), records & 0xFFFFFFFF,
+                         packets & 0xFFFFFFFF)
+        offset = ROBOTS_OFFSET
+        for robot in robots + opponents:
+            state = robot.state
+            flags = FLAG_CONNECTED if robot.connected else 0
+            x = y = 0.0
+            if state.position is not None:
+                flags |= FLAG_KNOWN
+                x, y = state.position
+            ROBOT.pack_into(buf, offset, robot.robot_id, flags, x, y, state.orientation,
+                            state.velocity[0], state.velocity[1], state.battery,
+                            (state.sequence or 0) & 0xFFFFFFFF)
+            offset += ROBOT.size
+        offset = OBSTACLES_OFFSET
+        for obstacle in obstacles:
+            OBSTACLE.pack_into(buf, offset, obstacle[0], obstacle[1], obstacle[2] if len(obstacle) > 2 else 1.0)
+            offset += OBSTACLE.size
+
+        self.sequence += 1
+        SEQUENCE.pack_into(buf, 0, self.sequence)
+
+
+class SharedWorldReader:
+    """Reads frames written by SharedWorldWriter straight out of the shared block.
+
+    Fields are unpacked directly from the shared buffer, with no intermediate
+    copy of the block. read() returns None when there is no new, consistent
+    frame; a torn read is simply retried on the next call.
+    """
+
+    def __init__(self, name=None):
+        self.shm, self.owner = open_block(name)
+        self.name = self.shm.name
+        self.last_sequence = 0
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def read(self):
+        buf = self.shm.buf
+        (before,) = SEQUENCE.unpack_from(buf, 0)
+        if before & 1 or before == self.last_sequence:
+            return None
+        (t, bx, by, vx, vy, n_robots, n_opponents, n_obstacles,
+         recording, ball_tracked, records, packets) = HEADER.unpack_from(buf, HEADER_OFFSET)
+        entities = [ROBOT.unpack_from(buf, ROBOTS_OFFSET + i * ROBOT.size)
+                    for i in range(min(n_robots + n_opponents, MAX_ROBOTS))]
+        obstacles = [OBSTACLE.unpack_from(buf, OBSTACLES_OFFSET + i * OBSTACLE.size)
+                     for i in range(min(n_obstacles, MAX_OBSTACLES))]
+        (after,) = SEQUENCE.unpack_from(buf, 0)
+        if after != before:
+            return None
+        self.last_sequence = before
+        return {
+            "time": t,
+            "ball_position": (bx, by),
+            "ball_velocity": (vx, vy),
+            "ball_tracked": bool(ball_tracked),
+            "robots": entities[:n_robots],
+            "opponents": entities[n_robots:],
+            "obstacles": obstacles,
+            "recording": bool(recording),
+            "records": records,
+            "packets": packets,
+        }
@@ -0,0 +1,284 @@
+import argparse
+import heapq
+import math
+import random
+import selectors
+import socket
+import time
+
+import base_station_telemetry as telemetry
+from base_station_team import join_group
+
+
+class SimWorld:
+    """Deterministic motion for the simulated ball and opponents on a 12m x 9m field."""
+
+    def __init__(self, opponents=5, seed=0):
+        rng = random.Random(seed)
+        self.opponent_paths = [(rng.uniform(6.5, 11), rng.uniform(1, 8), rng.uniform(0.3, 1.0),
+                                rng.uniform(0.2, 0.6), rng.uniform(0, 6.28)) for _ in range(opponents)]
+        # Static clutter that robots also detect (e.g. people near the field lines)
+        self.clutter = [(rng.uniform(0, 12), rng.choice((-0.5, 9.5))) for _ in range(telemetry.MAX_OBSTACLES)]
+
+    def ball(self, t):
+        return (6 + 4 * math.sin(0.3 * t), 4.5 + 3 * math.sin(0.5 * t))
+
+    def opponents(self, t):
+        return [(cx + r * math.cos(w * t + phase), cy + r * math.sin(w * t + phase))
+                for cx, cy, r, w, phase in self.opponent_paths]
+
+
+class VirtualRobot:
+    """One simulated robot: a local UDP endpoint that streams telemetry and answers commands."""
+
+    def __init__(self, robot_id, port, host="127.0.0.1", clock_offset=0.0, clock_drift=0.0, team_group=None):
+        self.robot_id = robot_id
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.setblocking(False)
+        self.address = self.socket.getsockname()
+        # Team-wide commands arrive on a multicast group shared by every robot
+        self.team_socket = None
+        if team_group is not None:
+            self.team_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.team_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.team_socket.bind(("", team_group[1]))
+            join_group(self.team_socket, team_group[0], host)
+            self.team_socket.setblocking(False)
+        self.team_seen = set()
+        # Telemetry goes to whoever last sent us a command (the base station)
+        self.base_address = None
+        # The robot's own clock runs with a fixed offset from ours and drifts (s/s)
+        self.clock_offset = clock_offset
+        self.clock_drift = clock_drift
+        self.sequence = 0
+        self.parameters = {}
+        self.params_version = 0
+        self.playing = False
+        self.role = None
+        self.commands = 0
+        self.battery = 100.0
+        self._home = (1.5 + 1.0 * (robot_id % 4), 1.0 + 1.7 * ((robot_id - 1) % 5))
+
+    def clock(self, now):
+        """The robot's clock at our monotonic time now."""
+        return now * (1.0 + self.clock_drift) + self.clock_offset
+
+    def pose(self, t):
+        hx, hy = self._home
+        phase = self.robot_id * 1.3
+        x = hx + 0.8 * math.cos(0.4 * t + phase)
+        y = hy + 0.5 * math.sin(0.4 * t + phase)
+        heading = math.degrees(math.atan2(0.5 * math.cos(0.4 * t + phase), -0.8 * math.sin(0.4 * t + phase)))
+        return (x, y), heading
+
+    def handle_command(self, text):
+        """Apply a command sent by the base station and return the reply text, if any."""
+        self.commands += 1
+        parts = text.split()
+        if not parts:
+            return None
+        verb = parts[0].upper()
+        if verb == "HELLO":
+            self.params_version = 0
+            return f"HELLO {self.robot_id}"
+        if verb == "PING" and len(parts) == 2:
+            return f"PONG {parts[1]} {self.clock(time.monotonic()):.6f}"
+        if verb == "SET" and len(parts) >= 3:
+            self.parameters[parts[1]] = parts[2]
+            return f"ACK SET {parts[1]}"
+        if verb == "PARAMS" and len(parts) >= 2 and parts[1].isdigit():
+            version = int(parts[1])
+            # Retransmissions and superseded bundles are acknowledged but not re-applied
+            if version > self.params_version:
+                self.params_version = version
+                for item in parts[2:]:
+                    name, _, value = item.partition("=")
+                    self.parameters[name] = value
+            return f"ACK PARAMS {version}"
+        if verb == "TEAM" and len(parts) >= 3 and parts[1].isdigit():
+            # Multicast copies and unicast retries of the same command are applied once
+            seq = int(parts[1])
+            if seq not in self.team_seen:
+                self.team_seen.add(seq)
+                self.handle_command(" ".join(parts[2:]))
+            return f"ACK TEAM {seq}"
+        if verb == "ROLE" and len(parts) == 2:
+            self.role = parts[1]
+            return f"ACK ROLE {self.role}"
+        if verb in ("PLAY", "PAUSE", "START", "STOP"):
+            self.playing = verb in ("PLAY", "START")
+            return f"ACK {verb}"
+        if verb in ("MOVE", "TEST", "RESET", "CHECK"):
+            return f"ACK {text}"
+        return None
+
+    def telemetry(self, t, now, world, rng, obstacles, oversize=False):
+        self.sequence += 1
+        self.battery = max(self.battery - 0.0005, 0.0)
+        position, heading = self.pose(t)
+        ball = world.ball(t)
+        distance = math.hypot(ball[0] - position[0], ball[1] - position[1])
+        if distance < 6.0:
+            ball_position = (ball[0] + rng.gauss(0, 0.02 + 0.01 * distance),
+                             ball[1] + rng.gauss(0, 0.02 + 0.01 * distance))
+            confidence = max(0.2, 1.0 - distance / 6.0)
+        else:
+            ball_position, confidence = None, 0.0
+        detections = [(x + rng.gauss(0, 0.05), y + rng.gauss(0, 0.05), 0.8) for x, y in world.opponents(t)]
+        for x, y in world.clutter[:max(obstacles - len(detections), 0)]:
+            detections.append((x + rng.gauss(0, 0.05), y + rng.gauss(0, 0.05), 0.3))
+        if oversize:
+            # Obstacle-heavy frame, far larger than the old 1024-byte receive limit
+            detections = detections * max(1, 2000 // max(len(detections), 1))
+        return telemetry.encode(self.robot_id, self.sequence, self.clock(now), position, heading,
+                                ball_position, confidence, detections[:telemetry.MAX_OBSTACLES], self.battery)
+
+
+class FleetSimulator:
+    """Runs N virtual robots from one selector loop with configurable link impairments."""
+
+    def __init__(self, count=5, rate=60.0, base_port=10001, host="127.0.0.1", obstacles=10,
+                 loss=0.0, jitter=0.0, reorder=0.0, oversize=0.0, seed=0, team_group=None):
+        self.rng = random.Random(seed)
+        self.world = SimWorld(seed=seed)
+        self.robots = [VirtualRobot(i + 1, base_port + i, host, clock_offset=self.rng.uniform(-5, 5),
+                                    clock_drift=self.rng.uniform(-1e-4, 1e-4),
+                                    team_group=team_group)
+                       for i in range(count)]
+        self.period = 1.0 / rate
+        self.obstacles = obstacles
+        # Link impairments: drop probability, max extra delay (s), probability a packet is
+        # held back behind later ones, probability of an oversized frame
+        self.loss = loss
+        self.jitter = jitter
+        self.reorder = reorder
+        self.oversize = oversize
+
+        self.selector = selectors.DefaultSelector()
+        for robot in self.robots:
+            self.selector.register(robot.socket, selectors.EVENT_READ, (robot, robot.socket))
+            if robot.team_socket is not None:
+                self.selector.register(robot.team_socket, selectors.EVENT_READ, (robot, robot.team_socket))
+        self.running = False
+        self.sent = 0
+        self.dropped = 0
+        self.replies = 0
+        self._queue = []
+        self._counter = 0
+
+    def close(self):
+        self.selector.close()
+        for robot in self.robots:
+            robot.socket.close()
+            if robot.team_socket is not None:
+                robot.team_socket.close()
+
+    def _enqueue(self, due, robot, packet):
+        self._counter += 1
+        heapq.heappush(self._queue, (due, self._counter, robot, packet))
+
+    def _receive(self, robot, sock):
+        while True:
+            try:
+                data, addr = sock.recvfrom(telemetry.MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            if sock is robot.socket:
+                robot.base_address = addr
+            # Replies always go back over the robot's own link to the base station
+            reply = robot.handle_command(data.decode(errors="replace").strip())
+            if reply and robot.base_address is not None:
+                robot.socket.sendto(reply.encode(), robot.base_address)
+                self.replies += 1
+
+    def run(self, duration=None, status_interval=5.0):
+        start = time.monotonic()
+        next_send = [start + self.rng.uniform(0, self.period) for _ in self.robots]
+        next_status = start + status_interval
+        self.running = True
+        while self.running:
+            now = time.monotonic()
+            if duration is not None and now - start >= duration:
+                break
+            for i, robot in enumerate(self.robots):
+                if now < next_send[i]:
+                    continue
+                next_send[i] += self.period
+                if next_send[i] < now:
+                    next_send[i] = now + self.period
+                if robot.base_address is None:
+                    continue
+                oversize = self.rng.random() < self.oversize
+                packet = robot.telemetry(now - start, now, self.world, self.rng, self.obstacles, oversize)
+                if self.rng.random() < self.loss:
+                    self.dropped += 1
+                    continue
+                delay = self.rng.uniform(0, self.jitter) if self.jitter else 0.0
+                if self.rng.random() < self.reorder:
+                    delay += self.period * self.rng.uniform(1.5, 3.0)
+                self._enqueue(now + delay, robot, packet)
+
+            while self._queue and self._queue[0][0] <= now:
+                _, _, robot, packet = heapq.heappop(self._queue)
+                try:
+                    robot.socket.sendto(packet, robot.base_address)
+                    self.sent += 1
+                except OSError:
+                    self.dropped += 1
+
+            if now >= next_status:
+                print(f"[sim] {len(self.robots)} robots: sent {self.sent}, dropped {self.dropped}, "
+                      f"replies {self.replies}")
+                next_status = now + status_interval
+
+            wake = min(next_send)
+            if self._queue:
+                wake = min(wake, self._queue[0][0])
+            timeout = max(wake - time.monotonic(), 0)
+            for key, _ in self.selector.select(timeout):
+                self._receive(*key.data)
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated robot fleet for load-testing the base station")
+    parser.add_argument("--robots", type=int, default=5)
+    parser.add_argument("--rate", type=float, default=60, help="telemetry packets per second per robot")
+    parser.add_argument("--port", type=int, default=10001, help="UDP port of robot 1; robot N uses port+N-1")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--obstacles", type=int, default=10, help="obstacles reported per packet")
+    parser.add_argument("--loss", type=float, default=0.0, help="packet loss probability")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum extra delay in seconds")
+    parser.add_argument("--reorder", type=float, default=0.0, help="probability a packet is delivered late")
+    parser.add_argument("--oversize", type=float, default=0.0, help="probability of an oversized frame")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--team-group", metavar="IP:PORT",
+                        help="multicast group the robots join for team-wide commands")
+    args = parser.parse_args()
+
+    team_group = None
+    if args.team_group:
+        group, _, port = args.team_group.rpartition(":")
+        team_group = (group, int(port))
+    sim = FleetSimulator(args.robots, args.rate, args.port, args.host, args.obstacles,
+                         args.loss, args.jitter, args.reorder, args.oversize, args.seed, team_group)
+    print(f"Simulating {args.robots} robots on {args.host}:{args.port}-{args.port + args.robots - 1} "
+          f"at {args.rate:g} Hz. Start the base station with: --sim-fleet {args.robots}")
+    try:
+        sim.run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.close()
+        print(f"[sim] done: sent {sim.sent}, dropped {sim.dropped}, replies {sim.replies}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import socket
+import struct
+import threading
+import time
+
+from base_station_recorder import COMMAND
+
+
+class TeamChannel:
+    """Sends one sequenced command to the whole team at once.
+
+    The command goes out as a single datagram to a multicast group (or a
+    broadcast address) that every robot listens on:
+
+        TEAM <seq> <command>
+
+    Each robot applies a sequence number once and answers ACK TEAM <seq> on
+    its normal link to the base station; Robot.receive_from_robot passes the
+    ACK to on_ack(). poll() retries by unicast only to the robots that have
+    not acknowledged yet. Without a group address the same datagram is
+    unicast to every robot back to back.
+    """
+
+    def __init__(self, robots, group=None, interface=None, retry_interval=0.05, max_retries=5):
+        self.robots = robots
+        self.group = group
+        self.retry_interval = retry_interval
+        self.max_retries = max_retries
+        self.sequence = 0
+        # seq -> [command, datagram, sent time, {robot: retries so far}, next retry]
+        self.pending = {}
+        # (command, seq, acked robots, missed robots, seconds) for the owner to report
+        self.results = []
+        self.recorder = None
+        self._lock = threading.Lock()
+        self.socket = None
+        if group is not None:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            self.socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+            if interface:
+                self.socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+
+    def close(self):
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+    def send(self, command, now=None):
+        """Send command to every connected robot. Returns its sequence number."""
+        if now is None:
+            now = time.monotonic()
+        targets = [robot for robot in self.robots if robot.connected and robot.socket is not None]
+        with self._lock:
+            self.sequence += 1
+            seq = self.sequence
+            data = f"TEAM {seq} {command}".encode()
+            if targets:
+                self.pending[seq] = [command, data, now, {robot: 0 for robot in targets},
+                                     now + self.retry_interval]
+        if self.socket is not None:
+            try:
+                self.socket.sendto(data, self.group)
+            except OSError as e:
+                print(f"Team multicast to {self.group[0]}:{self.group[1]} failed: {e}")
+        else:
+            for robot in targets:
+                self._unicast(robot, data)
+        if self.recorder is not None:
+            self.recorder.record(COMMAND, 0, data)
+        return seq
+
+    def _unicast(self, robot, data):
+        try:
+            robot.socket.sendto(data, (robot.robot_ip, robot.robot_port))
+        except (OSError, AttributeError) as e:
+            print(f"Team command to {robot.name} failed: {e}")
+
+    def on_ack(self, robot, seq, now):
+        """Record that robot acknowledged seq. Called from the ingest thread."""
+        with self._lock:
+            entry = self.pending.get(seq)
+            if entry is None or robot not in entry[3]:
+                return
+            del entry[3][robot]
+            if not entry[3]:
+                del self.pending[seq]
+                self.results.append((entry[0], seq, self._acked(entry), [], now - entry[2]))
+
+    def _acked(self, entry):
+        waiting = entry[3]
+        return [robot for robot in self.robots if robot.connected and robot not in waiting]
+
+    def poll(self, now):
+        """Unicast retries to robots that have not acknowledged yet."""
+        retries = []
+        with self._lock:
+            for seq, entry in list(self.pending.items()):
+                command, data, sent, waiting, next_retry = entry
+                if now < next_retry:
+                    continue
+                exhausted = [robot for robot, tries in waiting.items() if tries >= self.max_retries]
+                if len(exhausted) == len(waiting):
+                    del self.pending[seq]
+                    self.results.append((command, seq, self._acked(entry), exhausted, now - sent))
+                    continue
+                for robot, tries in waiting.items():
+                    if tries < self.max_retries:
+                        waiting[robot] = tries + 1
+                        retries.append((robot, data))
+                entry[4] = now + self.retry_interval
+        for robot, data in retries:
+            self._unicast(robot, data)
+
+    def take_results(self):
+        with self._lock:
+            results, self.results = self.results, []
+        return results
+
+
+def join_group(sock, group, interface="0.0.0.0"):
+    """Subscribe sock to a multicast group (used by robots and the simulator)."""
+    membership = struct.pack("4s4s", socket.inet_aton(group), socket.inet_aton(interface))
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
@@ -0,0 +1,106 @@
+import struct
+from collections import namedtuple
+
+# Wire format for robot -> base station telemetry (little endian).
+#
+#   header:   magic u16, version u8, flags u8, robot_id u8, sequence u32,
+#             timestamp f64 (robot clock, seconds),
+#             x f32, y f32, orientation f32 (degrees),
+#             ball_x f32, ball_y f32, ball_confidence f32,
+#             battery u8 (%), obstacle_count u16
+#   obstacle: x f32, y f32, confidence f32   (repeated obstacle_count times)
+#
+# Positions are field coordinates in meters, same as Robot.position.
+TELEMETRY_MAGIC = 0x4552  # "ER"
+TELEMETRY_VERSION = 1
+
+FLAG_BALL_VISIBLE = 0x01
+
+HEADER = struct.Struct("<HBBBIdffffffBH")
+OBSTACLE = struct.Struct("<fff")
+
+# Largest UDP payload; receive buffers are this size so big frames are never truncated
+MAX_DATAGRAM = 65507
+MAX_OBSTACLES = (MAX_DATAGRAM - HEADER.size) // OBSTACLE.size
+
+
+# Immutable snapshot of everything known about one robot. The receiver builds
+# a new one per packet and publishes it with a single attribute assignment
+# (Robot.state), so readers never see a half-updated robot.
+RobotState = namedtuple("RobotState", [
+    "sequence", "timestamp", "last_update",  # robot sequence and clock, local arrival time
+    "position", "orientation", "velocity",
+    "ball_visible", "ball_position", "ball_confidence",
+    "obstacles", "battery",
+])
+
+INITIAL_STATE = RobotState(None, None, None, (0, 0), 0, (0.0, 0.0), False, (6, 4.5), 0.0, (), 100)
+
+
+class TelemetryError(ValueError):
+    pass
+
+
+def is_telemetry(view, nbytes):
+    """Cheap check whether the first nbytes of view look like a telemetry packet."""
+    return nbytes >= 2 and view[0] | (view[1] << 8) == TELEMETRY_MAGIC
+
+
+def decode_state(view, nbytes, previous, arrival, robot_id=None):
+    """Decode a telemetry packet from view[:nbytes] into a new RobotState.
+
+    The header is unpacked straight from view without copying the datagram,
+    but every packet allocates its RobotState and obstacle tuple.
+    previous supplies what the packet does not carry (the last seen ball
+    position, velocity). With robot_id given, a packet sent by any other
+    robot is rejected. Raises TelemetryError on a malformed, unsupported or
+    misaddressed packet.
+    """
+    if nbytes < HEADER.size:
+        raise TelemetryError(f"short packet ({nbytes} bytes)")
+    (magic, version, flags, sender, sequence, timestamp,
+     x, y, orientation, ball_x, ball_y, ball_confidence,
+     battery, obstacle_count) = HEADER.unpack_from(view, 0)
+    if magic != TELEMETRY_MAGIC:
+        raise TelemetryError("bad magic")
+    if version != TELEMETRY_VERSION:
+        raise TelemetryError(f"unsupported version {version}")
+    if robot_id is not None and sender != robot_id:
+        raise TelemetryError(f"packet from robot {sender}, expected {robot_id}")
+    end = HEADER.size + obstacle_count * OBSTACLE.size
+    if end > nbytes:
+        raise TelemetryError(f"truncated packet ({nbytes} of {end} bytes)")
+
+    ball_visible = bool(flags & FLAG_BALL_VISIBLE)
+    return RobotState(
+        sequence, timestamp, arrival,
+        (x, y), orientation, previous.velocity,
+        ball_visible, (ball_x, ball_y) if ball_visible else previous.ball_position, ball_confidence,
+        tuple(OBSTACLE.iter_unpack(view[HEADER.size:end])), battery,
+    )
+
+
+def encode(robot_id, sequence, timestamp, position, orientation,
+           ball_position=None, ball_confidence=0.0, obstacles=(), battery=100):
+    """Build a telemetry packet. ball_position=None marks the ball as not seen."""
+    obstacles = list(obstacles)
+    if len(obstacles) > MAX_OBSTACLES:
+        raise TelemetryError(f"too many obstacles ({len(obstacles)})")
+    flags = 0
+    if ball_position is not None:
+        flags |= FLAG_BALL_VISIBLE
+    else:
+        ball_position = (0.0, 0.0)
+    packet = bytearray(HEADER.size + len(obstacles) * OBSTACLE.size)
+    HEADER.pack_into(packet, 0, TELEMETRY_MAGIC, TELEMETRY_VERSION, flags, robot_id,
+                     sequence & 0xFFFFFFFF, timestamp,
+                     position[0], position[1], orientation,
+                     ball_position[0], ball_position[1], ball_confidence,
+                     max(0, min(255, int(battery))), len(obstacles))
+    offset = HEADER.size
+    for obstacle in obstacles:
+        ox, oy = obstacle[0], obstacle[1]
+        confidence = obstacle[2] if len(obstacle) > 2 else 1.0
+        OBSTACLE.pack_into(packet, offset, ox, oy, confidence)
+        offset += OBSTACLE.size
+    return bytes(packet)
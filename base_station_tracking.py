@@ -0,0 +1,220 @@
+import math
+import time
+
+import numpy as np
+
+
+def linear_sum_assignment(cost):
+    """Minimum-cost assignment for a rectangular cost matrix.
+
+    Hungarian algorithm with potentials (shortest augmenting path), with the
+    inner column scan vectorized in NumPy. Returns (rows, cols) index arrays
+    sorted by row, like scipy.optimize.linear_sum_assignment. Costs must be
+    finite; use a large value for forbidden pairs.
+    """
+    cost = np.asarray(cost, dtype=float)
+    if cost.size == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    # p[j]: 1-based row matched to column j (0 = free); column 0 is the virtual start
+    p = np.zeros(m + 1, dtype=int)
+    way = np.zeros(m + 1, dtype=int)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            used_cols = np.nonzero(used)[0]
+            u[p[used_cols]] += delta
+            v[used_cols] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        # Augment along the alternating path
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    cols = np.nonzero(p[1:])[0]
+    rows = p[1:][cols] - 1
+    if transposed:
+        rows, cols = cols, rows
+    order = np.argsort(rows)
+    return rows[order], cols[order]
+
+
+class Track:
+    __slots__ = ("track_id", "x", "y", "vx", "vy", "confidence", "hits", "last_seen", "slot")
+
+    def __init__(self, track_id, x, y, confidence, now):
+        self.track_id = track_id
+        self.x = x
+        self.y = y
+        self.vx = 0.0
+        self.vy = 0.0
+        self.confidence = confidence
+        self.hits = 1
+        self.last_seen = now
+        self.slot = None
+
+
+class OpponentTracker:
+    """Associates fused obstacle detections to persistent opponent tracks.
+
+    Each tick the predicted track positions and the detections form a
+    distance cost matrix that is solved with linear_sum_assignment. Matched
+    tracks are corrected with an alpha-beta filter (giving a velocity estimate),
+    unmatched detections start new tracks, and tracks that go unseen for
+    max_age seconds are retired. A track is confirmed after confirm_hits hits.
+
+    After every update the confirmed tracks holding an opponent slot (at most
+    max_tracks) are also published as one immutable tuple of (track_id, x, y,
+    vx, vy, confidence) in snapshot, so other threads (the RefBox uplink)
+    read a consistent set without a lock.
+    """
+
+    def __init__(self, gate=1.0, alpha=0.6, beta=0.2, max_age=1.0, confirm_hits=3, max_tracks=5):
+        # Detections further than gate meters from a track's prediction are not associated
+        self.gate = gate
+        self.alpha = alpha
+        self.beta = beta
+        self.max_age = max_age
+        self.confirm_hits = confirm_hits
+        # Number of opponent slots on the field
+        self.max_tracks = max_tracks
+        self.tracks = []
+        self.snapshot = ()
+        self.t = None
+        self._next_id = 1
+
+    @property
+    def confirmed(self):
+        return [t for t in self.tracks if t.hits >= self.confirm_hits]
+
+    def update(self, detections, now=None):
+        """Advance the tracks with this tick's (x, y, confidence) detections."""
+        if now is None:
+            now = time.monotonic()
+        dt = 0.0 if self.t is None else max(now - self.t, 0.0)
+        self.t = now
+
+        tracks = self.tracks
+        det = np.asarray([(d[0], d[1]) for d in detections], dtype=float).reshape(-1, 2)
+        matched_tracks = set()
+        matched_dets = set()
+
+        if tracks and len(det):
+            state = np.array([(t.x, t.y, t.vx, t.vy) for t in tracks])
+            predicted = state[:, :2] + state[:, 2:] * dt
+            diff = predicted[:, None, :] - det[None, :, :]
+            cost = np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+            for r, c in self._associate(cost):
+                track = tracks[r]
+                px, py = float(predicted[r, 0]), float(predicted[r, 1])
+                zx, zy = float(det[c, 0]), float(det[c, 1])
+                rx, ry = zx - px, zy - py
+                track.x = px + self.alpha * rx
+                track.y = py + self.alpha * ry
+                if dt > 0:
+                    track.vx += self.beta * rx / dt
+                    track.vy += self.beta * ry / dt
+                detection = detections[c]
+                track.confidence = detection[2] if len(detection) > 2 else 1.0
+                track.hits += 1
+                track.last_seen = now
+                matched_tracks.add(r)
+                matched_dets.add(c)
+
+        survivors = []
+        for i, track in enumerate(tracks):
+            if i not in matched_tracks:
+                if now - track.last_seen > self.max_age:
+                    continue
+                # Coast on the last velocity estimate
+                track.x += track.vx * dt
+                track.y += track.vy * dt
+            survivors.append(track)
+        for c, detection in enumerate(detections):
+            if c in matched_dets:
+                continue
+            confidence = detection[2] if len(detection) > 2 else 1.0
+            survivors.append(Track(self._next_id, detection[0], detection[1], confidence, now))
+            self._next_id += 1
+        self.tracks = survivors
+        self._assign_slots()
+        self.snapshot = tuple((t.track_id, t.x, t.y, t.vx, t.vy, t.confidence)
+                              for t in survivors if t.slot is not None)
+        return self.tracks
+
+    def _associate(self, cost):
+        """Optimal track/detection pairs within the gate.
+
+        Pairs where the track and the detection have no other candidate are
+        taken directly; only the ambiguous rest goes through the assignment
+        solver, which keeps the common well-separated case cheap.
+        """
+        valid = cost <= self.gate
+        row_counts = valid.sum(axis=1)
+        col_counts = valid.sum(axis=0)
+        unique = valid & (row_counts[:, None] == 1) & (col_counts[None, :] == 1)
+        pairs = list(zip(*np.nonzero(unique)))
+
+        rows = np.nonzero((row_counts > 0) & ~unique.any(axis=1))[0]
+        cols = np.nonzero((col_counts > 0) & ~unique.any(axis=0))[0]
+        if len(rows) and len(cols):
+            sub = cost[np.ix_(rows, cols)]
+            # Forbidden pairs get a cost no valid assignment can reach
+            sub[sub > self.gate] = self.gate * (len(rows) + len(cols) + 1)
+            for r, c in zip(*linear_sum_assignment(sub)):
+                if sub[r, c] <= self.gate:
+                    pairs.append((rows[r], cols[c]))
+        return pairs
+
+    def _assign_slots(self):
+        """Give confirmed tracks a stable opponent slot, best tracks first."""
+        confirmed = sorted(self.confirmed, key=lambda t: (-t.hits, t.track_id))
+        taken = {t.slot for t in confirmed if t.slot is not None}
+        for track in self.tracks:
+            if track.slot is not None and track not in confirmed[:self.max_tracks]:
+                taken.discard(track.slot)
+                track.slot = None
+        free = [s for s in range(self.max_tracks) if s not in taken]
+        for track in confirmed[:self.max_tracks]:
+            if track.slot is None and free:
+                track.slot = free.pop(0)
+
+    def apply_to(self, opponents):
+        """Write the tracked opponents into the opponent Robot objects.
+
+        Opponents without a track get position None so they are not drawn.
+        """
+        by_slot = {t.slot: t for t in self.tracks if t.slot is not None}
+        for slot, opponent in enumerate(opponents):
+            track = by_slot.get(slot)
+            if track is None:
+                opponent.update_state(position=None, velocity=(0.0, 0.0))
+                continue
+            orientation = opponent.orientation
+            if math.hypot(track.vx, track.vy) > 0.2:
+                orientation = math.degrees(math.atan2(track.vy, track.vx))
+            opponent.update_state(position=(track.x, track.y), velocity=(track.vx, track.vy),
+                                  orientation=orientation)
@@ -0,0 +1,180 @@
+import math
+import socket
+import threading
+import time
+
+# Send without blocking even though the RefBox listener keeps the socket blocking
+SEND_FLAGS = getattr(socket, "MSG_DONTWAIT", 0)
+
+# MSL obstacle radius reported for tracked opponents (m)
+OPPONENT_RADIUS = 0.25
+
+
+class WorldStateSerializer:
+    """Writes the MSL RefBox "worldstate" JSON for our world model into one reused buffer.
+
+        {"type":"worldstate","teamName":"Era","intention":"","ageMs":12,
+         "robots":[{"id":1,"pose":[x,y,theta],"velocity":[vx,vy,0],"batteryLevel":95,...}],
+         "balls":[{"position":[x,y,0],"velocity":[vx,vy,0],"confidence":0.9}],
+         "obstacles":[{"position":[x,y],"velocity":[vx,vy],"radius":0.25,"confidence":1}]}
+
+    Coordinates are converted to the field-centred MSL frame in meters and
+    radians. Obstacles are the opponent tracker's snapshot: confirmed tracks
+    holding an opponent slot. The constant key fragments are encoded once;
+    each entity's fragment is cached against its state snapshot, so only
+    robots and opponents that changed since the last tick are formatted
+    again.
+    """
+
+    def __init__(self, team_name, field_dimensions=(12, 9)):
+        self.cx = field_dimensions[0] / 2.0
+        self.cy = field_dimensions[1] / 2.0
+        self.prefix = ('{"type":"worldstate","teamName":' + _json_string(team_name) + ',"intention":').encode()
+        self.buffer = bytearray()
+        self._robot_cache = {}
+        self._obstacle_cache = {}
+
+    def serialize(self, world, robots, intention="", age_ms=0):
+        """Encode one NUL-terminated message and return it as bytes."""
+        buf = self.buffer
+        del buf[:]
+        buf += self.prefix
+        buf += _json_string(intention).encode()
+        buf += b',"ageMs":%d,"robots":[' % age_ms
+        first = True
+        for robot in robots:
+            fragment = self._robot_fragment(robot)
+            if fragment is None:
+                continue
+            if not first:
+                buf += b","
+            buf += fragment
+            first = False
+        buf += b'],"balls":['
+        ball = world.ball_filter
+        if ball.initialized and ball.last_observed is not None and ball.t is not None:
+            confidence = 1.0 - (ball.t - ball.last_observed) / ball.lost_after
+            if confidence > 0:
+                bx, by = world.ball_position
+                vx, vy = world.ball_velocity
+                buf += b'{"position":[%.3f,%.3f,0],"velocity":[%.3f,%.3f,0],"confidence":%.2f}' % (
+                    bx - self.cx, by - self.cy, vx, vy, confidence)
+        buf += b'],"obstacles":['
+        first = True
+        for track in world.opponent_tracker.snapshot:
+            if not first:
+                buf += b","
+            buf += self._obstacle_fragment(track)
+            first = False
+        buf += b"]}\0"
+        return bytes(buf)
+
+    def _robot_fragment(self, robot):
+        state = robot.state
+        if not robot.connected or state.position is None:
+            return None
+        cached = self._robot_cache.get(robot.robot_id)
+        if cached is not None and cached[0] is state:
+            return cached[1]
+        x, y = state.position
+        vx, vy = state.velocity
+        fragment = b'{"id":%d,"pose":[%.3f,%.3f,%.3f],"velocity":[%.3f,%.3f,0],"batteryLevel":%d,"ballEngaged":0}' % (
+            robot.robot_id, x - self.cx, y - self.cy, math.radians(state.orientation), vx, vy, state.battery)
+        self._robot_cache[robot.robot_id] = (state, fragment)
+        return fragment
+
+    def _obstacle_fragment(self, track):
+        """Fragment of one confirmed track, a (track_id, x, y, vx, vy, confidence) tuple."""
+        cached = self._obstacle_cache.get(track[0])
+        if cached is not None and cached[0] == track:
+            return cached[1]
+        _, x, y, vx, vy, confidence = track
+        fragment = b'{"position":[%.3f,%.3f],"velocity":[%.3f,%.3f],"radius":%.2f,"confidence":%.2f}' % (
+            x - self.cx, y - self.cy, vx, vy, OPPONENT_RADIUS, confidence)
+        if len(self._obstacle_cache) > 64:
+            # Track ids only grow; forget retired tracks now and then
+            self._obstacle_cache.clear()
+        self._obstacle_cache[track[0]] = (track, fragment)
+        return fragment
+
+
+def _json_string(text):
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class WorldStateUplink:
+    """Streams the world state to the RefBox at a fixed rate from its own thread.
+
+    Sends share the RefBox TCP socket with the listener thread but never
+    block: a frame the kernel cannot take right away is finished on the next
+    tick, and new frames are skipped (counted in frames_dropped) until it is,
+    so a slow RefBox costs us frames, not time.
+    """
+
+    def __init__(self, logic, team_name="Era", rate=10.0):
+        self.logic = logic
+        self.rate = rate
+        self.serializer = WorldStateSerializer(team_name, logic.global_world.field_dimensions)
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self._socket = None
+        self._pending = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self, sock):
+        self.stop()
+        self._socket = sock
+        self._pending = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="WorldStateUplink", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._socket = None
+
+    def _run(self):
+        period = 1.0 / self.rate
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            if self._pending is None:
+                self._pending = self._frame()
+            else:
+                self.frames_dropped += 1
+            if not self._flush():
+                break
+            next_tick += period
+            now = time.monotonic()
+            if next_tick < now:
+                next_tick = now + period
+            self._stop.wait(next_tick - now)
+
+    def _frame(self):
+        logic = self.logic
+        age_ms = 0
+        if logic.last_fused_update is not None:
+            age_ms = max(int(1000 * (time.monotonic() - logic.last_fused_update)), 0)
+        intention = "playing" if logic.game_running else ""
+        return self.serializer.serialize(logic.global_world, logic.robots, intention, age_ms)
+
+    def _flush(self):
+        """Send as much of the pending frame as the socket takes now. False if the socket is gone."""
+        try:
+            sent = self._socket.send(self._pending, SEND_FLAGS)
+        except (BlockingIOError, InterruptedError):
+            return True
+        except OSError as e:
+            if not self._stop.is_set():
+                print(f"World state uplink stopped: {e}")
+            return False
+        if sent == len(self._pending):
+            self._pending = None
+            self.frames_sent += 1
+        else:
+            self._pending = memoryview(self._pending)[sent:]
+        return True
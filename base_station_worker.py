@@ -0,0 +1,218 @@
+import multiprocessing
+import os
+import queue
+import time
+
+from base_station import create_team, create_logic, start_logic
+from base_station_world import GlobalWorldMap
+from base_station_history import TrajectoryHistory
+from base_station_heatmap import OccupancyGrid
+from base_station_events import EventBus, WORLD_UPDATED, ROBOT_STATUS, REFBOX_STATUS, REFBOX_MESSAGE, LOG, LINK_STATS, ROLES
+from base_station_refbox import RefBoxCommand
+from base_station_recorder import encode_links, decode_links
+from base_station_shared import SharedWorldReader, SharedWorldWriter, FLAG_CONNECTED, FLAG_KNOWN
+
+# BaseStationLogic methods the UI process may call in the worker
+WORKER_COMMANDS = ("send_team_command", "push_parameters", "send_to_robot", "connect_to_refbox",
+                   "stop_refbox", "start_recording", "stop_recording", "stop")
+# Commands whose first argument is a robot id, resolved to the worker's Robot
+ROBOT_COMMANDS = ("push_parameters", "send_to_robot")
+
+
+def worker_main(shm_name, config, commands, events):
+    """Worker process: ingest, fusion and RefBox, writing every fused frame into shared memory."""
+    logic = create_logic(config)
+    writer = SharedWorldWriter(shm_name)
+    robots_by_id = {robot.robot_id: robot for robot in logic.robots}
+
+    def write_frame(world=None):
+        recorder = logic.recorder
+        writer.write(logic.global_world, logic.robots, logic.opponents, time.monotonic(),
+                     recorder.active, recorder.records, logic.ingest.packets_received)
+
+    # The world goes through shared memory; everything else is a small event
+    bus = logic.bus
+    bus.subscribe(WORLD_UPDATED, write_frame)
+    bus.subscribe(ROBOT_STATUS, lambda robot, connected: events.put(
+        (ROBOT_STATUS, {"robot": robot.robot_id, "connected": connected})))
+    bus.subscribe(REFBOX_STATUS, lambda connected: events.put((REFBOX_STATUS, {"connected": connected})))
+    bus.subscribe(REFBOX_MESSAGE, lambda command: events.put((REFBOX_MESSAGE, {"raw": command.raw})))
+    bus.subscribe(LOG, lambda msg, level: events.put((LOG, {"msg": msg, "level": level})))
+    bus.subscribe(ROLES, lambda roles: events.put(
+        (ROLES, {"roles": {robot.robot_id: role for robot, role in roles.items()}})))
+
+    def forward_links(robots):
+        events.put((LINK_STATS, {"links": encode_links(robots)}))
+        # Also refreshes the recording status when no telemetry arrives
+        write_frame()
+
+    bus.subscribe(LINK_STATS, forward_links)
+
+    def run_commands():
+        while True:
+            try:
+                name, args = commands.get_nowait()
+            except queue.Empty:
+                return
+            if name not in WORKER_COMMANDS:
+                print(f"Worker: unknown command {name}")
+                continue
+            if name in ROBOT_COMMANDS:
+                robot = robots_by_id.get(args[0])
+                if robot is None:
+                    continue
+                args = (robot,) + tuple(args[1:])
+            getattr(logic, name)(*args)
+
+    start_logic(logic, config)
+    try:
+        logic.run_headless(fusion_hz=config["fusion_hz"], on_tick=run_commands)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logic.stop_recording()
+        logic.stop_refbox()
+        logic.disconnect_from_robots()
+        writer.close()
+
+
+class RemoteRecorder:
+    """What the UI needs of MatchRecorder, mirrored from the worker's shared frames."""
+
+    def __init__(self):
+        self.active = False
+        self.path = None
+        self.records = 0
+
+
+class RemoteLogic:
+    """Stands in for BaseStationLogic in the UI process while a worker process does the work.
+
+    Ingest, fusion, RefBox and recording run in the worker. Robots, opponents
+    and the world map here are local mirrors refreshed from the shared block by
+    update_world_state(); commands are queued to the worker and its events are
+    re-published on the local bus by poll(). The UI cannot tell the difference.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.bus = EventBus()
+        self.robots, self.opponents = create_team(config["team_size"])
+        self.robots_by_id = {robot.robot_id: robot for robot in self.robots}
+        self.global_world = GlobalWorldMap()
+        self.history = TrajectoryHistory()
+        self.occupancy = OccupancyGrid(self.global_world.field_dimensions)
+        self.recorder = RemoteRecorder()
+        self.refbox_connected = False
+        self.packets_received = 0
+        self.reader = SharedWorldReader()
+        self.commands = multiprocessing.Queue()
+        self.events = multiprocessing.Queue()
+        self.process = multiprocessing.Process(
+            target=worker_main, args=(self.reader.name, config, self.commands, self.events),
+            name="BaseStationWorker", daemon=True)
+        self._worker_lost = False
+
+    def start(self):
+        self.process.start()
+        print(f"Started fusion worker (pid {self.process.pid})")
+
+    def close(self, timeout=2.0):
+        if self.process.is_alive():
+            self._call("stop")
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.reader.close()
+
+    def _call(self, name, *args):
+        self.commands.put((name, args))
+
+    def update_world_state(self):
+        """Mirror the latest frame from the worker. Returns True if the world changed."""
+        frame = self.reader.read()
+        if frame is None:
+            return False
+        for entities, robots in ((frame["robots"], self.robots), (frame["opponents"], self.opponents)):
+            for entity, robot in zip(entities, robots):
+                _, flags, x, y, orientation, vx, vy, battery, sequence = entity
+                robot.update_state(position=(x, y) if flags & FLAG_KNOWN else None,
+                                   orientation=orientation, velocity=(vx, vy),
+                                   battery=battery, sequence=sequence)
+                robot.connected = bool(flags & FLAG_CONNECTED)
+        world = self.global_world
+        world.ball_position = list(frame["ball_position"])
+        world.ball_velocity = list(frame["ball_velocity"])
+        world.obstacles = frame["obstacles"]
+        self.recorder.active = frame["recording"]
+        self.recorder.records = frame["records"]
+        self.packets_received = frame["packets"]
+        now = time.monotonic()
+        self.history.record(now, world, self.robots + self.opponents)
+        self.occupancy.record(now, self.robots, world.ball_position if frame["ball_tracked"] else None)
+        self.bus.publish(WORLD_UPDATED, world=world)
+        return True
+
+    def poll(self, now=None):
+        """Re-publish the worker's events on the local bus."""
+        while True:
+            try:
+                topic, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if topic == ROBOT_STATUS:
+                robot = self.robots_by_id.get(payload["robot"])
+                if robot is not None:
+                    robot.connected = payload["connected"]
+                    self.bus.publish(ROBOT_STATUS, robot=robot, connected=payload["connected"])
+            elif topic == REFBOX_STATUS:
+                self.refbox_connected = payload["connected"]
+                self.bus.publish(REFBOX_STATUS, connected=payload["connected"])
+            elif topic == REFBOX_MESSAGE:
+                self.bus.publish(REFBOX_MESSAGE, command=RefBoxCommand.from_text(payload["raw"]))
+            elif topic == LINK_STATS:
+                for robot_id, stats in decode_links(payload["links"]).items():
+                    robot = self.robots_by_id.get(robot_id)
+                    if robot is not None:
+                        for name, value in stats.items():
+                            setattr(robot.link, name, value)
+                self.bus.publish(LINK_STATS, robots=self.robots)
+            elif topic == ROLES:
+                roles = {self.robots_by_id[robot_id]: role for robot_id, role in payload["roles"].items()
+                         if robot_id in self.robots_by_id}
+                self.bus.publish(ROLES, roles=roles)
+            elif topic == LOG:
+                self.bus.publish(LOG, **payload)
+        if not self._worker_lost and not self.process.is_alive():
+            self._worker_lost = True
+            self.bus.publish(LOG, msg=f"Fusion worker exited (code {self.process.exitcode})\n", level="ERROR")
+
+    def send_to_robot(self, robot, msg):
+        self._call("send_to_robot", robot.robot_id, msg)
+
+    def send_team_command(self, command):
+        self._call("send_team_command", command)
+
+    def push_parameters(self, robot, values=None):
+        if values is not None:
+            robot.parameters.update(values)
+        self._call("push_parameters", robot.robot_id, values)
+        return True
+
+    def connect_to_refbox(self, ip="127.0.0.1", port=28097):
+        self._call("connect_to_refbox", ip, port)
+
+    def stop_refbox(self):
+        self._call("stop_refbox")
+
+    def start_recording(self, path=None):
+        if path is None:
+            path = os.path.join("recordings", time.strftime("match_%Y%m%d_%H%M%S.erarec"))
+        self._call("start_recording", path)
+        self.recorder.active = True
+        self.recorder.path = path
+        return path
+
+    def stop_recording(self):
+        self._call("stop_recording")
+        self.recorder.active = False
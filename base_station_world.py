@@ -0,0 +1,70 @@
+from base_station_fusion import BallFilter, ObstacleFusion
+from base_station_tracking import OpponentTracker
+
+# A synced capture time further than this before the arrival is a stale clock estimate (s)
+MAX_LATENCY = 0.25
+
+
+class GlobalWorldMap:
+    def __init__(self):
+        # 12m x 9m field
+        self.field_dimensions = (12, 9)
+        self.reset()
+
+    def reset(self):
+        """Forget all fused state (used when a replay seeks)."""
+        # A global ball position, filtered from all robots' observations
+        self.ball_filter = BallFilter(position=(6, 4.5))
+        self.ball_position = [6, 4.5]  # Center of the field
+        self.ball_velocity = [0.0, 0.0]
+        # Deduplicated obstacles seen by any robot, as (x, y, confidence)
+        self.obstacle_fusion = ObstacleFusion(field_dimensions=self.field_dimensions)
+        self.obstacles = []
+        # Persistent opponent tracks built from the fused obstacles
+        self.opponent_tracker = OpponentTracker()
+
+    def update_from_robots(self, robots, now=None):
+        # Sensor fusion logic goes here
+        ball_observations = []
+        obstacle_observations = []
+        teammates = []
+        for robot in robots:
+            # One consistent snapshot per robot; the receiver never mutates it
+            state = robot.state
+            obstacle_observations.append((robot, state.sequence, state.obstacles))
+            if robot.connected and state.last_update is not None and state.position is not None:
+                # Only robots actually on the field; others still sit at their placeholder positions
+                teammates.append(state.position)
+            if state.ball_visible:
+                ball_observations.append((robot, state.sequence, capture_time(robot, state), state.ball_position,
+                                          state.position, state.ball_confidence))
+        self.ball_filter.update(ball_observations, now)
+        self.obstacles = self.obstacle_fusion.update(obstacle_observations, teammates, now)
+        self.opponent_tracker.update(self.obstacles, now)
+        self.ball_position = list(self.ball_filter.position)
+        self.ball_velocity = list(self.ball_filter.velocity)
+
+    def has_live_state(self):
+        """True while fused obstacles, opponent tracks or a tracked ball remain, i.e. while
+        fusion ticks are still needed to age them out even without new telemetry."""
+        return bool(self.obstacles or self.opponent_tracker.tracks or self.ball_tracked())
+
+    def ball_tracked(self):
+        """True while the ball estimate is backed by recent observations."""
+        ball = self.ball_filter
+        return (ball.initialized and ball.last_observed is not None and ball.t is not None
+                and ball.t - ball.last_observed <= ball.lost_after)
+
+    def predict_ball(self, dt):
+        """Predicted ball position dt seconds ahead of the last fusion."""
+        return self.ball_filter.predict_position(dt)
+
+
+def capture_time(robot, state):
+    """When the robot took state, on our clock: its timestamp mapped through the robot's
+    ClockSync, or the arrival time until the clock is synced."""
+    arrival = state.last_update
+    stamp = robot.clock.to_local(state.timestamp)
+    if stamp is None or arrival is None or stamp < arrival - MAX_LATENCY:
+        return arrival
+    return min(stamp, arrival)
@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from base_station_fusion import BallFilter, ObstacleFusion
+from base_station_tracking import OpponentTracker
+
+FUSION_HZ = 50
+
+
+def observations(ball, tick, robots=((2.0, 4.0), (9.0, 2.0), (6.0, 8.0)), rng=None, now=0.0):
+    """One tick of (source, sequence, stamp, ball, robot, confidence) tuples, one per robot."""
+    rng = rng or random.Random(0)
+    return [(i, tick, now, (ball[0] + rng.gauss(0.0, 0.02), ball[1] + rng.gauss(0.0, 0.02)), robot, 0.9)
+            for i, robot in enumerate(robots)]
+
+
+def run_kick(speed, robots=((2.0, 4.0), (9.0, 2.0), (6.0, 8.0)), rest_ticks=FUSION_HZ, kick_ticks=15):
+    """Ball at rest for a second, then kicked along x; returns the error after every tick of the kick."""
+    ball_filter = BallFilter()
+    rng = random.Random(1)
+    tick = 0
+    for _ in range(rest_ticks):
+        tick += 1
+        now = tick / FUSION_HZ
+        ball_filter.update(observations((3.0, 4.5), tick, robots, rng, now), now)
+    kicked = now
+    errors = []
+    for _ in range(kick_ticks):
+        tick += 1
+        now = tick / FUSION_HZ
+        ball = (3.0 + speed * (now - kicked), 4.5)
+        ball_filter.update(observations(ball, tick, robots, rng, now), now)
+        x, y = ball_filter.position
+        errors.append(((x - ball[0]) ** 2 + (y - ball[1]) ** 2) ** 0.5)
+    return errors
+
+
+@pytest.mark.parametrize("speed", [3.0, 5.0, 8.0])
+def test_ball_kicked_from_rest_is_followed(speed):
+    errors = run_kick(speed)
+    # The kick is never lost, and within a few ticks the estimate is back on the ball
+    assert max(errors) < 0.35
+    assert max(errors[10:]) < 0.1
+
+
+def test_kick_seen_by_one_robot_is_followed():
+    errors = run_kick(5.0, robots=((2.0, 4.0),))
+    assert max(errors[10:]) < 0.1
+
+
+def test_single_outlier_is_rejected():
+    ball_filter = BallFilter()
+    rng = random.Random(2)
+    for tick in range(1, FUSION_HZ):
+        ball_filter.update(observations((6.0, 4.5), tick, rng=rng, now=tick / FUSION_HZ), tick / FUSION_HZ)
+    now = 1.0
+    # One robot reports a reflection 3 m away for a single frame
+    assert not ball_filter.update([(0, FUSION_HZ, now, (9.0, 4.5), (2.0, 4.0), 0.9)], now)
+    x, y = ball_filter.position
+    assert abs(x - 6.0) < 0.05 and abs(y - 4.5) < 0.05
+
+
+def test_obstacles_outside_the_field_are_ignored():
+    fusion = ObstacleFusion(field_dimensions=(12, 9), field_margin=0.3)
+    detections = [(3.77, -0.5, 1.0), (5.0, 9.5, 1.0), (-1.0, 4.0, 1.0), (12.2, 4.0, 1.0), (6.0, 4.5, 1.0)]
+    obstacles = fusion.update([(1, 1, detections)], now=0.0)
+    assert sorted((x, y) for x, y, _ in obstacles) == [(6.0, 4.5), (12.2, 4.0)]
+
+
+def test_tracker_snapshot_holds_only_slotted_tracks():
+    tracker = OpponentTracker(max_tracks=2)
+    detections = [(2.0, 2.0, 1.0), (5.0, 5.0, 1.0), (9.0, 7.0, 1.0)]
+    for tick in range(5):
+        tracker.update(detections, now=tick * 0.02)
+    assert len(tracker.confirmed) == 3
+    assert len(tracker.snapshot) == 2
+    slotted = {t.track_id for t in tracker.tracks if t.slot is not None}
+    assert {entry[0] for entry in tracker.snapshot} == slotted
+
+
+def test_one_obstacle_seen_by_every_robot_is_fused_once():
+    fusion = ObstacleFusion()
+    observations = [(1, 1, [(4.0, 4.0, 0.5)]), (2, 1, [(4.1, 4.0, 0.5)]), (3, 1, [(4.2, 4.0, 0.5)])]
+    [(x, y, confidence)] = fusion.update(observations, now=0.0)
+    assert x == pytest.approx(4.1) and y == pytest.approx(4.0)
+    assert confidence == pytest.approx(1.0 - 0.5 ** 3)
+
+
+def test_opponents_side_by_side_are_kept_apart():
+    fusion = ObstacleFusion(merge_radius=0.5)
+    pair = [(5.0, 4.5, 0.9), (5.4, 4.5, 0.9)]
+    for tick in range(3):
+        obstacles = fusion.update([(robot, tick, pair) for robot in range(3)], now=tick * 0.02)
+        assert sorted((round(x, 6), round(y, 6)) for x, y, _ in obstacles) == [(5.0, 4.5), (5.4, 4.5)]
+
+
+def test_detections_on_a_teammate_are_ignored():
+    fusion = ObstacleFusion(teammate_radius=0.35)
+    obstacles = fusion.update([(1, 1, [(3.0, 3.0), (3.2, 3.1), (8.0, 6.0)])], teammates=[(3.1, 3.0)], now=0.0)
+    assert obstacles == [(8.0, 6.0, 1.0)]
@@ -0,0 +1,45 @@
+from base_station_recorder import MatchRecorder, MatchLog, TELEMETRY, COMMAND
+
+
+def read_records(path):
+    with MatchLog(path) as log:
+        return [(record_type, source, payload) for record_type, source, _, payload, _ in log.records()]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "match.erarec")
+    recorder = MatchRecorder()
+    recorder.start(path)
+    recorder.record(TELEMETRY, 1, b"abc")
+    recorder.record(COMMAND, 2, b"PLAY")
+    recorder.stop()
+    assert recorder.records == 2
+    assert read_records(path) == [(TELEMETRY, 1, b"abc"), (COMMAND, 2, b"PLAY")]
+
+
+def test_record_racing_stop_stays_out_of_next_recording(tmp_path):
+    first = str(tmp_path / "first.erarec")
+    second = str(tmp_path / "second.erarec")
+    recorder = MatchRecorder()
+    recorder.start(first)
+    recorder.record(TELEMETRY, 1, b"first")
+    # A producer that read the session just before stop() and only puts after it
+    records, start = recorder._session
+    recorder.stop()
+    recorder.start(second)
+    records.put((TELEMETRY, 1, 1000.0, b"late"))
+    recorder.record(TELEMETRY, 1, b"second")
+    recorder.stop()
+    assert read_records(first) == [(TELEMETRY, 1, b"first")]
+    assert read_records(second) == [(TELEMETRY, 1, b"second")]
+    with MatchLog(second) as log:
+        assert log.duration < 1.0
+
+
+def test_record_when_not_recording_is_ignored(tmp_path):
+    recorder = MatchRecorder()
+    recorder.record(TELEMETRY, 1, b"nobody listens")
+    path = str(tmp_path / "match.erarec")
+    recorder.start(path)
+    recorder.stop()
+    assert read_records(path) == []
@@ -0,0 +1,99 @@
+import json
+
+from base_station_refbox import RefBoxStreamParser
+
+
+def message(command, team="224.16.32.201"):
+    return json.dumps({"command": command, "targetTeam": team}).encode() + b"\0"
+
+
+def feed_all(parser, chunks):
+    commands = []
+    for chunk in chunks:
+        commands.extend(parser.feed(chunk))
+    return commands
+
+
+def test_message_split_at_every_byte():
+    data = message("KICKOFF")
+    for cut in range(1, len(data)):
+        parser = RefBoxStreamParser()
+        assert parser.feed(data[:cut]) == []
+        commands = parser.feed(data[cut:])
+        assert [c.command for c in commands] == ["KICKOFF"]
+        assert commands[0].target_team == "224.16.32.201"
+        assert parser.buffer == bytearray()
+
+
+def test_message_fed_one_byte_at_a_time():
+    parser = RefBoxStreamParser()
+    data = message("START") + message("STOP")
+    commands = feed_all(parser, [data[i:i + 1] for i in range(len(data))])
+    assert [c.command for c in commands] == ["START", "STOP"]
+
+
+def test_several_messages_in_one_chunk():
+    parser = RefBoxStreamParser()
+    commands = parser.feed(message("START") + message("STOP") + b"DROPBALL\0" + message("GOAL")[:10])
+    assert [c.command for c in commands] == ["START", "STOP", "DROPBALL"]
+    assert commands[2].payload == {}
+    assert [c.command for c in parser.feed(message("GOAL")[10:])] == ["GOAL"]
+
+
+def test_delimiter_at_chunk_boundary():
+    parser = RefBoxStreamParser()
+    first = message("START")
+    # Chunk ends right before the delimiter, the next one starts with it
+    assert parser.feed(first[:-1]) == []
+    assert [c.command for c in parser.feed(b"\0" + message("STOP"))] == ["START", "STOP"]
+    # Chunk ends right after the delimiter
+    assert [c.command for c in parser.feed(message("HALT"))] == ["HALT"]
+    assert parser.feed(b"") == []
+
+
+def test_multibyte_delimiter_split_across_chunks():
+    parser = RefBoxStreamParser(delimiter=b"\r\n")
+    assert parser.feed(b"START\r") == []
+    assert [c.command for c in parser.feed(b"\nSTOP\r\n")] == ["START", "STOP"]
+
+
+def test_empty_messages_are_skipped():
+    parser = RefBoxStreamParser()
+    assert [c.command for c in parser.feed(b"\0\0  \0" + message("START"))] == ["START"]
+
+
+def test_oversize_message_resyncs():
+    parser = RefBoxStreamParser(max_message_size=64)
+    assert parser.feed(b"x" * 40) == []
+    assert parser.dropped == 0
+    # Past the limit without a delimiter: the garbage is dropped
+    assert parser.feed(b"x" * 40) == []
+    assert parser.dropped == 1
+    assert parser.buffer == bytearray()
+    # The tail of the oversize message is skipped up to its delimiter
+    commands = parser.feed(b"xxxx\0" + message("START"))
+    assert [c.command for c in commands] == ["START"]
+    assert parser.dropped == 1
+
+
+def test_oversize_tail_spanning_chunks_is_skipped():
+    parser = RefBoxStreamParser(max_message_size=64)
+    parser.feed(b"x" * 80)
+    assert parser.feed(b"x" * 100) == []
+    assert parser.feed(b"xx") == []
+    assert [c.command for c in parser.feed(b"x\0" + message("START"))] == ["START"]
+    assert [c.command for c in parser.feed(message("STOP"))] == ["STOP"]
+
+
+def test_oversize_tail_with_delimiter_split_across_chunks():
+    parser = RefBoxStreamParser(delimiter=b"\r\n", max_message_size=16)
+    parser.feed(b"y" * 20)
+    assert parser.feed(b"yy\r") == []
+    assert [c.command for c in parser.feed(b"\nSTART\r\n")] == ["START"]
+
+
+def test_reset_discards_partial_message():
+    parser = RefBoxStreamParser()
+    parser.feed(message("START")[:5])
+    parser.reset()
+    assert [c.command for c in parser.feed(message("STOP"))] == ["STOP"]
@@ -0,0 +1,29 @@
+import pytest
+
+import base_station_telemetry as telemetry
+
+
+def packet(robot_id=3, obstacles=((1.0, 2.0, 0.5),)):
+    return telemetry.encode(robot_id, 7, 12.5, (4.0, 3.0), 90.0, (6.0, 4.5), 0.8, obstacles, battery=42)
+
+
+def test_round_trip():
+    data = packet()
+    state = telemetry.decode_state(memoryview(data), len(data), telemetry.INITIAL_STATE, 1.0, robot_id=3)
+    assert (state.sequence, state.timestamp, state.last_update) == (7, 12.5, 1.0)
+    assert state.position == (4.0, 3.0) and state.orientation == 90.0
+    assert state.ball_visible and state.ball_position == (6.0, 4.5)
+    assert state.obstacles == ((1.0, 2.0, 0.5),)
+    assert state.battery == 42
+
+
+def test_packet_from_another_robot_is_rejected():
+    data = packet(robot_id=4)
+    with pytest.raises(telemetry.TelemetryError, match="robot 4, expected 3"):
+        telemetry.decode_state(data, len(data), telemetry.INITIAL_STATE, 1.0, robot_id=3)
+
+
+def test_truncated_packet_is_rejected():
+    data = packet(obstacles=[(1.0, 2.0, 0.5)] * 3)
+    with pytest.raises(telemetry.TelemetryError, match="truncated"):
+        telemetry.decode_state(data, len(data) - 1, telemetry.INITIAL_STATE, 1.0)